@@ -0,0 +1,111 @@
+"""
+Denoise backend calibration: speed and effect on OCR input quality
+
+Usage: PYTHONPATH=src python benchmarks/bench_denoise.py [--output results.json]
+
+Reports ms per megapixel per channel (the unit of DENOISE_COSTS), PSNR
+against the clean page and, when the Tesseract binary is available, mean
+OCR word confidence for each backend and noise level
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from modules.document_processor import DENOISE_COSTS, DocumentEnhancer
+
+NOISE_LEVELS = [5, 10, 20]
+
+
+def render_page(height: int = 2200, width: int = 1700) -> np.ndarray:
+    """Clean grayscale text page"""
+    rng = np.random.default_rng(0)
+    image = np.full((height, width), 235, dtype=np.uint8)
+    for y in range(80, height - 60, 45):
+        text = ''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 '), 40))
+        cv2.putText(image, text, (60, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2)
+    return image
+
+
+def psnr(image: np.ndarray, reference: np.ndarray) -> float:
+    mse = np.mean((image.astype(np.float64) - reference) ** 2)
+    return float(10 * np.log10(255 ** 2 / mse)) if mse else float('inf')
+
+
+def ocr_confidence(image: np.ndarray) -> float:
+    """Mean word confidence, or None when Tesseract is not installed"""
+    try:
+        import pytesseract
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    except Exception:
+        return None
+    confidences = [float(c) for c in data['conf'] if float(c) > 0]
+    return round(float(np.mean(confidences)), 1) if confidences else 0.0
+
+
+def run(repeats: int = 3) -> list:
+    enhancer = DocumentEnhancer()
+    clean = render_page()
+    megapixels = clean.size / 1e6
+    rng = np.random.default_rng(1)
+    results = []
+    for sigma in NOISE_LEVELS:
+        noisy = np.clip(clean + rng.normal(0, sigma, clean.shape), 0, 255).astype(np.uint8)
+        results.append({
+            'noise_sigma': sigma,
+            'backend': 'none',
+            'ms_per_mp': 0.0,
+            'psnr_db': round(psnr(noisy, clean), 2),
+            'ocr_confidence': ocr_confidence(noisy)
+        })
+        for backend in DENOISE_COSTS:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                denoised = enhancer.remove_noise(noisy, backend, sigma)
+                timings.append(time.perf_counter() - start)
+            results.append({
+                'noise_sigma': sigma,
+                'backend': backend,
+                'ms_per_mp': round(float(np.median(timings)) * 1000 / megapixels, 1),
+                'psnr_db': round(psnr(denoised, clean), 2),
+                'ocr_confidence': ocr_confidence(denoised)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+
+    print(f"{'sigma':>5} {'backend':>10} {'ms/MP':>7} {'PSNR dB':>8} {'OCR conf':>9}")
+    for row in results:
+        confidence = '-' if row['ocr_confidence'] is None else row['ocr_confidence']
+        print(f"{row['noise_sigma']:>5} {row['backend']:>10} {row['ms_per_mp']:>7} "
+              f"{row['psnr_db']:>8} {confidence:>9}")
+
+    # Suggested DENOISE_COSTS: backends ranked by mean PSNR (or OCR
+    # confidence when measured), with their median cost
+    ranking = {}
+    for backend in DENOISE_COSTS:
+        rows = [row for row in results if row['backend'] == backend]
+        key = 'ocr_confidence' if rows[0]['ocr_confidence'] is not None else 'psnr_db'
+        ranking[backend] = (float(np.mean([row[key] for row in rows])),
+                            float(np.median([row['ms_per_mp'] for row in rows])))
+    ordered = sorted(ranking, key=lambda backend: -ranking[backend][0])
+    print('\nDENOISE_COSTS =', {backend: ranking[backend][1] for backend in ordered})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Rotation estimation benchmark across document text densities
+
+Usage: PYTHONPATH=src python benchmarks/bench_rotation.py [--output results.json]
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from modules.document_processor import RotationEstimator
+
+LINE_COUNTS = [0, 10, 30, 60, 100]
+
+
+def render_document(line_count: int, height: int = 3000, width: int = 2200,
+                    angle: float = 2.5) -> np.ndarray:
+    """Deterministic grayscale page with line_count rows of text, skewed by angle"""
+    rng = np.random.default_rng(line_count)
+    image = np.full((height, width), 235, dtype=np.uint8)
+    for i in range(line_count):
+        y = int(80 + i * (height - 160) / max(line_count, 1))
+        text = ''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 '), 60))
+        cv2.putText(image, text, (60, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 20, 2)
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), borderValue=235)
+
+
+def legacy_hough(gray: np.ndarray) -> float:
+    """Original full-resolution estimator: every Hough line, Python loop"""
+    edges = cv2.Canny(gray, 50, 150)
+    lines = cv2.HoughLines(edges, 1, np.pi/180, 100)
+    if lines is None:
+        return 0.0
+    angles = []
+    for line in lines:
+        rho, theta = line[0]
+        angle = np.degrees(theta)
+        if angle > 90:
+            angle = angle - 180
+        angles.append(angle)
+    return abs(np.mean(angles))
+
+
+def time_call(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run(repeats: int = 3) -> list:
+    estimator = RotationEstimator()
+    results = []
+    for line_count in LINE_COUNTS:
+        gray = render_document(line_count)
+        proxy = RotationEstimator.downsample(gray)
+        results.append({
+            'lines_of_text': line_count,
+            'legacy_hough_ms': round(time_call(lambda: legacy_hough(gray), repeats) * 1000, 1),
+            'hough_ms': round(time_call(lambda: estimator.estimate_hough(RotationEstimator.downsample(gray)), repeats) * 1000, 1),
+            'projection_ms': round(time_call(lambda: estimator.estimate_projection(RotationEstimator.downsample(gray)), repeats) * 1000, 1),
+            'hough_angle': round(estimator.estimate_hough(proxy)[0], 2),
+            'projection_angle': round(estimator.estimate_projection(proxy)[0], 2)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+
+    header = f"{'lines':>6} {'legacy ms':>10} {'hough ms':>9} {'proj ms':>8} {'hough°':>7} {'proj°':>6}"
+    print(header)
+    for row in results:
+        print(f"{row['lines_of_text']:>6} {row['legacy_hough_ms']:>10} {row['hough_ms']:>9} "
+              f"{row['projection_ms']:>8} {row['hough_angle']:>7} {row['projection_angle']:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Per-stage pipeline benchmark on synthetic ID documents
+
+Usage: PYTHONPATH=src python benchmarks/bench_stages.py [--output results.json]
+           [--baseline benchmarks/baseline.json] [--threshold 0.2] [--save-baseline]
+
+Times each DocumentQualityAssessor metric, each DocumentEnhancer stage,
+MismatchDetector/RiskAssessor and the Database writes and reads separately,
+for every resolution and degradation in benchmarks/synthetic.py. With
+--baseline, stages whose median is more than --threshold slower than the
+baseline (and at least --min-delta-ms slower) are reported and the exit
+status is 1
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from database import Database
+from modules.document_processor import DocumentEnhancer, DocumentQualityAssessor
+from modules.mismatch_detector import MismatchDetector, RiskAssessor
+from synthetic import RESOLUTIONS_DPI, VARIANTS, document_fields, generate_corpus, perturb_fields
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def time_call(func, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(float(np.median(timings)), 3), 'min_ms': round(min(timings), 3)}
+
+
+def image_stages(image: np.ndarray) -> dict:
+    """Stage name -> call for one document image"""
+    assessor = DocumentQualityAssessor()
+    enhancer = DocumentEnhancer()
+    metrics = assessor.assess_image_quality(image)['metrics']
+    angle = metrics['rotation']['angle']
+    return {
+        'quality.dpi': lambda: assessor.assess_dpi(image),
+        'quality.contrast': lambda: assessor.assess_contrast(image),
+        'quality.rotation': lambda: assessor.assess_rotation(image),
+        'quality.blur': lambda: assessor.assess_blur(image),
+        'quality.brightness': lambda: assessor.assess_brightness(image),
+        'quality.total': lambda: assessor.assess_image_quality(image),
+        'enhance.rotation': lambda: enhancer.correct_rotation(image, angle),
+        'enhance.perspective': lambda: enhancer.correct_perspective(image),
+        'enhance.clahe': lambda: enhancer.apply_clahe(image),
+        'enhance.denoise': lambda: enhancer.remove_noise(image),
+        'enhance.brightness': lambda: enhancer.normalize_brightness(image),
+        'enhance.adaptive_gray': lambda: enhancer.enhance_adaptive(image, metrics, grayscale=True)
+    }
+
+
+def field_stages(pairs: int) -> dict:
+    """Mismatch detection and risk assessment over document field pairs"""
+    detector = MismatchDetector()
+    risk_assessor = RiskAssessor()
+    field_pairs = []
+    for seed in range(pairs):
+        fields = document_fields(seed)
+        field_pairs.append((fields, perturb_fields(fields, seed)))
+    mismatches = [detector.detect_mismatches(*pair) for pair in field_pairs]
+    return {
+        'mismatch.detect': lambda: [detector.detect_mismatches(*pair) for pair in field_pairs],
+        'mismatch.risk': lambda: [risk_assessor.assess_risk_tier(found, 80) for found in mismatches]
+    }
+
+
+def database_stages(db: Database, rows: int) -> dict:
+    """Database writes and reads of rows verifications"""
+    counter = iter(range(10 ** 9))
+
+    def verification():
+        return {
+            'id': f"ver_bench_{next(counter)}",
+            'customer_id': 'customer_bench',
+            'document_paths': ['doc1.png', 'doc2.png'],
+            'extracted_data': {'doc1': {'fields': document_fields(0)}, 'doc2': {'fields': document_fields(1)}},
+            'quality_score': 80,
+            'risk_tier': 1,
+            'decision': 'APPROVE'
+        }
+
+    db.save_verification(verification())
+    return {
+        'database.save_verification': lambda: [db.save_verification(verification()) for _ in range(rows)],
+        'database.save_verifications': lambda: db.save_verifications([verification() for _ in range(rows)]),
+        'database.get_verification': lambda: [db.get_verification('ver_bench_0') for _ in range(rows)],
+        'database.save_audit_entry': lambda: [db.save_audit_entry('verification', 'ver_bench_0', 'CREATED',
+                                                                  {'decision': 'APPROVE'}) for _ in range(rows)]
+    }
+
+
+def run(repeats: int = 3, resolutions=RESOLUTIONS_DPI, variants=VARIANTS,
+        field_pairs: int = 200, database_rows: int = 50) -> list:
+    results = []
+    for case, image, _ in generate_corpus(resolutions, variants):
+        for stage, func in image_stages(image).items():
+            results.append({'stage': stage, 'case': case, **time_call(func, repeats)})
+
+    for stage, func in field_stages(field_pairs).items():
+        results.append({'stage': stage, 'case': f"{field_pairs} pairs", **time_call(func, repeats)})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'bench.db'))
+        for stage, func in database_stages(db, database_rows).items():
+            results.append({'stage': stage, 'case': f"{database_rows} rows", **time_call(func, repeats)})
+    return results
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__
+    }
+
+
+def compare(results: list, baseline: list, threshold: float, min_delta_ms: float) -> list:
+    """Results slower than their baseline median by more than threshold and min_delta_ms"""
+    reference = {(row['stage'], row['case']): row['median_ms'] for row in baseline}
+    regressions = []
+    for row in results:
+        before = reference.get((row['stage'], row['case']))
+        if before is None:
+            continue
+        delta = row['median_ms'] - before
+        if delta > min_delta_ms and delta > threshold * before:
+            regressions.append({**row, 'baseline_ms': before,
+                                'change': round(delta / before, 3) if before else float('inf')})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--resolutions', type=int, nargs='+', default=RESOLUTIONS_DPI,
+                        help='Document resolutions in DPI')
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='Ignore slowdowns smaller than this')
+    args = parser.parse_args()
+
+    results = run(args.repeats, args.resolutions, {name: VARIANTS[name] for name in args.variants})
+    report = {'environment': environment(), 'repeats': args.repeats, 'results': results}
+
+    print(f"{'stage':<28} {'case':<20} {'median ms':>10} {'min ms':>9}")
+    for row in results:
+        print(f"{row['stage']:<28} {row['case']:<20} {row['median_ms']:>10} {row['min_ms']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.threshold, args.min_delta_ms)
+    if baseline['environment'] != report['environment']:
+        print("\nWarning: baseline was recorded in a different environment")
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} of {args.baseline}")
+        return 0
+    print(f"\n{len(regressions)} regressions beyond {args.threshold:.0%}:")
+    for row in regressions:
+        print(f"  {row['stage']:<28} {row['case']:<20} {row['baseline_ms']:>10} -> {row['median_ms']} ms "
+              f"(+{row['change']:.0%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
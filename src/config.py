@@ -21,7 +21,145 @@ class Config:
             'contrast': {'min': 60, 'target': 75},
             'rotation': {'max': 5, 'target': 1},
             'blur': {'max': 40, 'target': 30},
-            'brightness': {'min': 30, 'max': 225, 'target_min': 50, 'target_max': 200}
+            'brightness': {'min': 30, 'max': 225, 'target_min': 50, 'target_max': 200, 'saturated': 250}
+        }
+        
+        # Upload budget, checked from image headers before any decode;
+        # max_pixels applies to each page of multi-page documents
+        self.image_limits = {
+            'max_file_bytes': 16 * 1024 * 1024,
+            'max_pixels': 150_000_000,
+            'max_pages': 50
+        }
+        
+        # Early-exit quality gate; metrics in reject_on reject a document
+        # once they breach the hard limits in quality_thresholds. Contrast
+        # and rotation are left to enhancement by default; brightness only
+        # rejects under-exposed (below min) or saturated pages, since white
+        # paper scans routinely sit above the advisory max
+        self.quality_gate = {
+            'enabled': True,
+            'thumbnail_max_dimension': 256,
+            'reject_on': ['dpi', 'blur', 'brightness']
+        }
+        
+        # Decoded images shared across the gate, enhancement and OCR stages
+        self.image_cache = {
+            'max_bytes': 256 * 1024 * 1024
+        }
+        
+        # Adaptive enhancement limits; contrast, rotation and brightness
+        # targets come from quality_thresholds. denoise_backend is one of
+        # bilateral, median, gaussian, nlmeans or auto (best backend within
+        # denoise_budget_ms for the image size)
+        self.enhancement = {
+            'noise_sigma': 4.0,
+            'min_dynamic_range': 128,
+            'min_document_area': 0.25,
+            'outline_max_dimension': 1024,
+            'denoise_backend': 'auto',
+            'denoise_budget_ms': 150
+        }
+        
+        # OCR engine: 'auto' runs a pool of persistent tesserocr workers
+        # when tesserocr is installed, otherwise pytesseract
+        self.ocr = {
+            'backend': 'auto',
+            'workers': 2,
+            'language': 'eng',
+            'timeout_seconds': 30
+        }
+        
+        # Crop-level OCR: detected text lines are OCR'd in parallel; pages
+        # whose regions cover more than max_coverage are OCR'd whole, and so
+        # are all pages unless the OCR backend is the persistent worker pool
+        self.text_regions = {
+            'enabled': True,
+            'workers': 4,
+            'max_coverage': 0.6
+        }
+        
+        # Shared executor for concurrent per-document processing in /verify
+        self.pipeline = {
+            'workers': 4
+        }
+        
+        # Background verification jobs: workers lease queued jobs from the
+        # database and retry them (up to max_attempts) when a worker fails
+        # or its lease expires; disabled runs verification in the request
+        self.jobs = {
+            'enabled': True,
+            'workers': 2,
+            'lease_seconds': 120,
+            'max_attempts': 3,
+            'poll_interval': 0.5,
+            'max_buffered_documents': 32
+        }
+        
+        # SQLite connections: one per thread, WAL journal so readers never
+        # block the writer; writers wait up to busy_timeout_ms for the lock
+        self.database = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout_ms': 30000,
+            'cache_size_kb': 16 * 1024,
+            'mmap_size': 256 * 1024 * 1024,
+            'cached_statements': 256
+        }
+        
+        # Method timings, counters and gauges served on /metrics; worker
+        # processes share samples through files in multiprocess_dir
+        self.metrics = {
+            'enabled': True,
+            'multiprocess_dir': os.path.join('data', 'metrics'),
+            'flush_interval': 5.0
+        }
+        
+        # On-demand profiling of /upload, /verify, /report and verification
+        # jobs: requests carrying admin_token in the X-Profile header, a
+        # random sample_rate of requests, and (stack-sampled) requests
+        # slower than latency_threshold_ms. Captures are kept in folder as
+        # a ring buffer; disabled adds no per-request work
+        self.profiling = {
+            'enabled': False,
+            'folder': os.path.join('data', 'profiles'),
+            'admin_token': os.environ.get('RPR_ADMIN_TOKEN'),
+            'mode': 'cprofile',
+            'sample_rate': 0.0,
+            'latency_threshold_ms': None,
+            'sampling_interval_ms': 5,
+            'max_profiles': 50,
+            'max_bytes': 64 * 1024 * 1024
+        }
+        
+        # Headless batch verification (src/main.py): document pairs in
+        # flight across workers, results written batch_size at a time
+        self.batch = {
+            'workers': 4,
+            'batch_size': 50
+        }
+        
+        # Multi-page documents (TIFF/GIF frames, PDF pages rendered at
+        # pdf_dpi): at most pages_in_flight pages are decoded at once
+        self.documents = {
+            'pdf_dpi': 200,
+            'pages_in_flight': 2
+        }
+        
+        # Persistent quality/OCR results for re-uploaded documents, keyed
+        # by file digest; entries unused for max_age_days are evicted
+        self.result_cache = {
+            'enabled': True,
+            'max_age_days': 30,
+            'max_bytes': 64 * 1024 * 1024
+        }
+        
+        # Quality assessment resolution ('full' or 'proxy') and skew
+        # estimator ('hough' or 'projection')
+        self.quality_assessment = {
+            'fidelity': 'full',
+            'proxy_max_dimension': 1024,
+            'rotation_method': 'hough'
         }
         
         # Risk assessment thresholds
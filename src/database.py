@@ -4,23 +4,96 @@ Database Module for SQLite Setup
 
 import sqlite3
 import json
-from datetime import datetime
-from typing import Dict, List
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
 import logging
+import os
+import threading
 
+from modules.metrics import instrumented
+
+@instrumented
 class Database:
     """
     SQLite database handler for CIS Dashboard
+    
+    Each thread keeps one open connection (statements stay prepared in
+    its cache) instead of connecting per call. The database runs in WAL
+    mode, so readers never block the writer; write transactions take the
+    write lock up front (BEGIN IMMEDIATE) and wait up to busy_timeout_ms
+    for other writers. Connection settings come from Config.database
     """
     
-    def __init__(self, db_path: str = "data/database.db"):
+    def __init__(self, db_path: str = "data/database.db", settings: Dict = None):
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        self.settings = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout_ms': 30000,
+            'cache_size_kb': 16 * 1024,
+            'mmap_size': 256 * 1024 * 1024,
+            'cached_statements': 256
+        }
+        self.settings.update(settings or {})
+        self._local = threading.local()
         self.init_database()
     
+    def close(self):
+        """Close the calling thread's connection; the next call reopens it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened and tuned on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode: transactions are begun explicitly by _transaction
+            conn = sqlite3.connect(self.db_path, timeout=self.settings['busy_timeout_ms'] / 1000,
+                                   isolation_level=None,
+                                   cached_statements=self.settings['cached_statements'])
+            conn.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout_ms'])}")
+            conn.execute(f"PRAGMA synchronous = {self.settings['synchronous']}")
+            conn.execute(f"PRAGMA cache_size = -{int(self.settings['cache_size_kb'])}")
+            conn.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block in one transaction on the thread's connection
+        immediate=True takes the write lock at BEGIN, so a writer waits for
+        the lock instead of failing to upgrade a read snapshot. A block
+        inside another transaction joins it
+        """
+        conn = self._connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        # WAL is a persistent property of the database file, set outside a transaction
+        mode = self._connection().execute(
+            f"PRAGMA journal_mode = {self.settings['journal_mode']}").fetchone()[0]
+        if mode.upper() != self.settings['journal_mode'].upper():
+            self.logger.warning(f"SQLite journal mode is {mode}, not {self.settings['journal_mode']}")
+        
+        with self._transaction(immediate=True) as conn:
             cursor = conn.cursor()
             
             # Verifications table
@@ -70,11 +143,51 @@ class Database:
                 )
             ''')
             
-            conn.commit()
+            # Content-addressed pipeline results (quality, OCR) keyed by
+            # file digest and pipeline fingerprint
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    digest TEXT,
+                    fingerprint TEXT,
+                    kind TEXT,
+                    payload TEXT,
+                    size INTEGER,
+                    created_at TEXT,
+                    accessed_at TEXT,
+                    PRIMARY KEY (digest, fingerprint, kind)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_result_cache_accessed
+                ON result_cache (accessed_at)
+            ''')
+            
+            # Durable background job queue; a running job whose lease has
+            # expired (crashed worker) is claimed again
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    payload TEXT,
+                    status TEXT,
+                    attempts INTEGER,
+                    max_attempts INTEGER,
+                    worker_id TEXT,
+                    lease_expires_at TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    updated_at TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_jobs_status
+                ON jobs (status, created_at)
+            ''')
     
     def save_verification(self, verification: Dict):
         """Save verification record"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction(immediate=True) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO verifications 
@@ -92,11 +205,44 @@ class Database:
                 verification.get('created_at', datetime.utcnow().isoformat()),
                 datetime.utcnow().isoformat()
             ))
-            conn.commit()
+    
+    def save_verifications(self, verifications: List[Dict]):
+        """Save many verification records in one transaction"""
+        timestamp = datetime.utcnow().isoformat()
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO verifications 
+                (id, customer_id, document_paths, extracted_data, quality_score, 
+                 risk_tier, decision, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                verification['id'],
+                verification.get('customer_id'),
+                json.dumps(verification.get('document_paths', [])),
+                json.dumps(verification.get('extracted_data', {})),
+                verification.get('quality_score', 0),
+                verification.get('risk_tier', 1),
+                verification.get('decision', 'UNKNOWN'),
+                verification.get('created_at', timestamp),
+                timestamp
+            ) for verification in verifications])
+    
+    def get_existing_verification_ids(self, verification_ids: List[str]) -> set:
+        """Get which of the given verification IDs are already recorded"""
+        existing = set()
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(verification_ids), 500):
+                chunk = verification_ids[start:start + 500]
+                cursor.execute(
+                    f"SELECT id FROM verifications WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+        return existing
     
     def get_verification(self, verification_id: str) -> Dict:
         """Get verification by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM verifications WHERE id = ?', (verification_id,))
             row = cursor.fetchone()
@@ -117,7 +263,7 @@ class Database:
     
     def save_dispute(self, dispute: Dict):
         """Save dispute record"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction(immediate=True) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO disputes 
@@ -137,11 +283,10 @@ class Database:
                 dispute.get('created_at'),
                 datetime.utcnow().isoformat()
             ))
-            conn.commit()
     
     def get_dispute(self, dispute_id: str) -> Dict:
         """Get dispute by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,))
             row = cursor.fetchone()
@@ -164,7 +309,7 @@ class Database:
     
     def get_all_disputes(self) -> List[Dict]:
         """Get all disputes"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM disputes')
             rows = cursor.fetchall()
@@ -189,7 +334,7 @@ class Database:
     def save_audit_entry(self, entity_type: str, entity_id: str, action: str, 
                         details: Dict, user_id: str = None):
         """Save audit trail entry"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction(immediate=True) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO audit_trail 
@@ -204,4 +349,179 @@ class Database:
                 datetime.utcnow().isoformat(),
                 None  # Placeholder for encrypted data
             ))
-            conn.commit()
\ No newline at end of file
+    
+    def get_cached_result(self, digest: str, fingerprint: str, kind: str) -> str:
+        """Get a cached payload and mark it as recently used"""
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT payload FROM result_cache
+                WHERE digest = ? AND fingerprint = ? AND kind = ?
+            ''', (digest, fingerprint, kind))
+            row = cursor.fetchone()
+        
+        if row:
+            # Touch in a separate write transaction, so lookups only take
+            # the write lock on a hit
+            with self._transaction(immediate=True) as conn:
+                conn.execute('''
+                    UPDATE result_cache SET accessed_at = ?
+                    WHERE digest = ? AND fingerprint = ? AND kind = ?
+                ''', (datetime.utcnow().isoformat(), digest, fingerprint, kind))
+            return row[0]
+        return None
+    
+    def save_cached_result(self, digest: str, fingerprint: str, kind: str, payload: str):
+        """Save a cached payload"""
+        timestamp = datetime.utcnow().isoformat()
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO result_cache
+                (digest, fingerprint, kind, payload, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (digest, fingerprint, kind, payload, len(payload), timestamp, timestamp))
+    
+    def evict_cached_results(self, older_than: str = None, max_bytes: int = None) -> int:
+        """
+        Evict cached results last used before older_than (ISO timestamp),
+        then least recently used entries beyond max_bytes of payload
+        Returns the number of entries removed
+        """
+        removed = 0
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            if older_than:
+                cursor.execute('DELETE FROM result_cache WHERE accessed_at < ?', (older_than,))
+                removed += cursor.rowcount
+            if max_bytes is not None:
+                cursor.execute('''
+                    DELETE FROM result_cache WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, SUM(size) OVER (
+                                ORDER BY accessed_at DESC, rowid DESC
+                            ) AS running_size
+                            FROM result_cache
+                        ) WHERE running_size > ?
+                    )
+                ''', (max_bytes,))
+                removed += cursor.rowcount
+        return removed
+    
+    def get_result_cache_usage(self) -> Dict:
+        """Get the number of cached results and their total payload size"""
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache')
+            row = cursor.fetchone()
+            return {'entries': row[0], 'bytes': row[1]}
+    
+    def enqueue_job(self, job_id: str, kind: str, payload: str, max_attempts: int = 3):
+        """Add a queued job; payload is JSON text"""
+        timestamp = datetime.utcnow().isoformat()
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO jobs
+                (id, kind, payload, status, attempts, max_attempts, worker_id,
+                 lease_expires_at, result, error, created_at, updated_at)
+                VALUES (?, ?, ?, 'queued', 0, ?, NULL, NULL, NULL, NULL, ?, ?)
+            ''', (job_id, kind, payload, max_attempts, timestamp, timestamp))
+    
+    def claim_job(self, worker_id: str, lease_seconds: float, kind: str = None) -> Dict:
+        """
+        Atomically lease the oldest queued job, or a running job whose lease
+        expired, to worker_id. Expired jobs out of attempts are marked failed
+        Returns the claimed job, or None when there is nothing to do
+        """
+        now = datetime.utcnow()
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute('''
+                    SELECT id, status, attempts, max_attempts FROM jobs
+                    WHERE (status = 'queued' OR (status = 'running' AND lease_expires_at < ?))
+                    AND (? IS NULL OR kind = ?)
+                    ORDER BY created_at, rowid LIMIT 1
+                ''', (now.isoformat(), kind, kind))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                
+                job_id, status, attempts, max_attempts = row
+                if status == 'running' and attempts >= max_attempts:
+                    cursor.execute('''
+                        UPDATE jobs SET status = 'failed', error = ?, worker_id = NULL,
+                        lease_expires_at = NULL, updated_at = ? WHERE id = ?
+                    ''', ('Worker lease expired', now.isoformat(), job_id))
+                    continue
+                
+                cursor.execute('''
+                    UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?,
+                    lease_expires_at = ?, updated_at = ? WHERE id = ?
+                ''', (worker_id, (now + timedelta(seconds=lease_seconds)).isoformat(),
+                      now.isoformat(), job_id))
+                break
+        return self.get_job(job_id)
+    
+    def renew_job_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a running job's lease; False if the worker no longer holds it"""
+        now = datetime.utcnow()
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            ''', ((now + timedelta(seconds=lease_seconds)).isoformat(), now.isoformat(),
+                  job_id, worker_id))
+            return cursor.rowcount == 1
+    
+    def finish_job(self, job_id: str, worker_id: str, status: str, result: str = None,
+                   error: str = None) -> bool:
+        """
+        Record the outcome of a job held by worker_id: 'done' with a result,
+        'failed', or 'queued' to retry. False if the lease was lost
+        """
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, worker_id = NULL,
+                lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            ''', (status, result, error, datetime.utcnow().isoformat(), job_id, worker_id))
+            return cursor.rowcount == 1
+    
+    def get_job(self, job_id: str) -> Dict:
+        """Get job by ID"""
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, kind, payload, status, attempts, max_attempts, worker_id,
+                lease_expires_at, result, error, created_at, updated_at
+                FROM jobs WHERE id = ?
+            ''', (job_id,))
+            row = cursor.fetchone()
+            
+            if row:
+                return {
+                    'id': row[0],
+                    'kind': row[1],
+                    'payload': json.loads(row[2]) if row[2] else {},
+                    'status': row[3],
+                    'attempts': row[4],
+                    'max_attempts': row[5],
+                    'worker_id': row[6],
+                    'lease_expires_at': row[7],
+                    'result': json.loads(row[8]) if row[8] else None,
+                    'error': row[9],
+                    'created_at': row[10],
+                    'updated_at': row[11]
+                }
+            return None
+    
+    def get_job_counts(self) -> Dict:
+        """Get the number of jobs in each status"""
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+            return dict(cursor.fetchall())
@@ -1,2 +1,246 @@
+"""
+Batch Verification CLI
+Runs the verification pipeline headless over a manifest of document pairs
+
+Usage: PYTHONPATH=src python src/main.py MANIFEST [--workers N] [--batch-size N] [--rerun]
+
+The manifest is CSV (a header with doc1, doc2 and optionally id) or
+NDJSON (one {"doc1": ..., "doc2": ..., "id": ...} object per line).
+Pairs without an id get one derived from their paths, so a run that is
+interrupted can be started again and skips pairs already recorded
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import sys
+import time
+
+from config import Config
+from database import Database
+from modules.image_io import configure_image_cache
+from modules.pipeline import configure_executor
+from modules.verification import VerificationPipeline, create_verification_pipeline, read_document
+
+logger = logging.getLogger(__name__)
+
+
+def pair_id(doc1: str, doc2: str) -> str:
+    """Stable verification id for a document pair without one in the manifest"""
+    return 'ver_' + hashlib.sha256(f"{doc1}\0{doc2}".encode('utf-8')).hexdigest()[:16]
+
+
+def read_manifest(path: str) -> List[Dict]:
+    """
+    Document pairs from a CSV or NDJSON manifest, as {'id', 'doc1', 'doc2'}
+    Files ending in .csv are read as CSV, anything else as NDJSON
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    
+    pairs = []
+    for line_number, row in enumerate(rows, start=1):
+        if not row.get('doc1') or not row.get('doc2'):
+            raise ValueError(f"{path}: entry {line_number} needs doc1 and doc2")
+        pairs.append({
+            'id': row.get('id') or pair_id(row['doc1'], row['doc2']),
+            'doc1': row['doc1'],
+            'doc2': row['doc2']
+        })
+    return pairs
+
+
+def pending_pairs(database: Database, pairs: List[Dict]) -> List[Dict]:
+    """Pairs whose verification is not yet recorded"""
+    existing = database.get_existing_verification_ids([pair['id'] for pair in pairs])
+    return [pair for pair in pairs if pair['id'] not in existing]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class BatchStats:
+    """Counts, per-pair latency and per-stage time of a batch run"""
+    
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.decisions = {}
+        self.latencies_ms = []
+        self.stage_ms = {}
+    
+    def add(self, context: Dict, latency_ms: float):
+        """Count a recorded verification"""
+        self.completed += 1
+        self.latencies_ms.append(latency_ms)
+        decision = context['verification']['decision']
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+        for stage, elapsed in context.get('timings_ms', {}).items():
+            self.stage_ms[stage] = self.stage_ms.get(stage, 0.0) + elapsed
+    
+    def summary(self, elapsed_seconds: float) -> Dict:
+        """Throughput, latency percentiles and total/mean time per stage"""
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'decisions': self.decisions,
+            'elapsed_seconds': round(elapsed_seconds, 2),
+            'throughput_per_second': round(self.completed / elapsed_seconds, 3) if elapsed_seconds > 0 else 0.0,
+            'latency_ms': {
+                'p50': round(percentile(self.latencies_ms, 50), 2),
+                'p90': round(percentile(self.latencies_ms, 90), 2),
+                'p99': round(percentile(self.latencies_ms, 99), 2),
+                'max': round(max(self.latencies_ms, default=0.0), 2)
+            },
+            'stages_ms': {
+                stage: {'total': round(total, 2), 'mean': round(total / max(1, self.completed), 2)}
+                for stage, total in self.stage_ms.items()
+            }
+        }
+
+
+def verify_pair(pipeline: VerificationPipeline, pair: Dict) -> tuple:
+    """Verify one manifest pair without recording it; returns (context, latency_ms)"""
+    start = time.perf_counter()
+    context = pipeline.verify(read_document(pair['doc1']), read_document(pair['doc2']),
+                              verification_id=pair['id'], record=False)
+    return context, (time.perf_counter() - start) * 1000
+
+
+def run_batch(pipeline: VerificationPipeline, pairs: Iterable[Dict], workers: int,
+              batch_size: int, stats: BatchStats) -> BatchStats:
+    """
+    Verify pairs on a pool of worker threads, recording results batch_size at a time
+    At most two pairs per worker are in flight. A pair that fails is logged
+    and left unrecorded, so the next run retries it. On interruption the
+    pairs already running are finished and recorded before returning
+    """
+    completed = []
+    
+    def flush():
+        if completed:
+            pipeline.record([context for context, _ in completed])
+            for context, latency_ms in completed:
+                stats.add(context, latency_ms)
+            completed.clear()
+    
+    def collect(future, pair):
+        try:
+            completed.append(future.result())
+        except Exception as e:
+            stats.failed += 1
+            logger.error(f"Verification {pair['id']} failed: {str(e)}")
+        if len(completed) >= batch_size:
+            flush()
+    
+    pairs = iter(pairs)
+    in_flight = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='batch')
+    try:
+        while True:
+            while len(in_flight) < 2 * max(1, workers):
+                pair = next(pairs, None)
+                if pair is None:
+                    break
+                in_flight[executor.submit(verify_pair, pipeline, pair)] = pair
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future, in_flight.pop(future))
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for future, pair in in_flight.items():
+            if not future.cancelled():
+                collect(future, pair)
+        flush()
+    return stats
+
+
+def format_summary(summary: Dict) -> str:
+    """Human-readable run summary"""
+    latency = summary['latency_ms']
+    lines = [
+        f"Verified {summary['completed']} pairs ({summary['failed']} failed, "
+        f"{summary['skipped']} already recorded) in {summary['elapsed_seconds']}s",
+        f"Throughput: {summary['throughput_per_second']} pairs/s",
+        f"Latency: p50 {latency['p50']}ms, p90 {latency['p90']}ms, "
+        f"p99 {latency['p99']}ms, max {latency['max']}ms",
+        "Decisions: " + ', '.join(f"{decision} {count}" for decision, count in sorted(summary['decisions'].items()))
+    ]
+    if summary['stages_ms']:
+        lines.append("Stage time (total / mean per pair):")
+        for stage, stage_time in summary['stages_ms'].items():
+            lines.append(f"  {stage:<12} {stage_time['total']:>12.1f}ms {stage_time['mean']:>10.1f}ms")
+    return '\n'.join(lines)
+
+
+def create_pipeline(config: Config, database: Database) -> VerificationPipeline:
+    """Verification pipeline with the same caches and OCR backend as the UI"""
+    configure_image_cache(config.image_cache['max_bytes'])
+    configure_executor(config.pipeline['workers'])
+    return create_verification_pipeline(config, database)
+
+
+def main(argv: List[str] = None) -> int:
+    config = Config()
+    parser = argparse.ArgumentParser(description='Verify document pairs from a manifest')
+    parser.add_argument('manifest', help='CSV or NDJSON manifest of document pairs')
+    parser.add_argument('--workers', type=int, default=config.batch['workers'],
+                        help='document pairs verified concurrently')
+    parser.add_argument('--batch-size', type=int, default=config.batch['batch_size'],
+                        help='verifications written per database transaction')
+    parser.add_argument('--database', default=config.database_path)
+    parser.add_argument('--rerun', action='store_true',
+                        help='verify pairs that are already recorded again')
+    parser.add_argument('--summary-json', help='also write the run summary to this file')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
+    pairs = read_manifest(args.manifest)
+    database = Database(args.database, config.database)
+    stats = BatchStats()
+    if not args.rerun:
+        remaining = pending_pairs(database, pairs)
+        stats.skipped = len(pairs) - len(remaining)
+        pairs = remaining
+    
+    pipeline = create_pipeline(config, database)
+    start = time.perf_counter()
+    interrupted = False
+    try:
+        run_batch(pipeline, pairs, args.workers, args.batch_size, stats)
+    except KeyboardInterrupt:
+        interrupted = True
+        logger.warning("Interrupted; run again to resume with the remaining pairs")
+    
+    summary = stats.summary(time.perf_counter() - start)
+    print(format_summary(summary))
+    if args.summary_json:
+        with open(args.summary_json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if interrupted:
+        return 130
+    return 1 if stats.failed else 0
+
+
 if __name__ == "__main__":
-    print("RPR CIS Dashboard v6.0 - Ready for Implementation")
\ No newline at end of file
+    sys.exit(main())
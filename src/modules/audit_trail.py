@@ -9,6 +9,9 @@ import hashlib
 import logging
 import os
 
+from .metrics import instrumented
+
+@instrumented
 class AuditTrail:
     """
     7-year immutable audit trail with encryption
@@ -7,6 +7,9 @@ from typing import Dict, List
 import uuid
 import logging
 
+from .metrics import instrumented
+
+@instrumented
 class DisputeManager:
     """
     Handles customer disputes and appeals
@@ -0,0 +1,185 @@
+"""
+Document Source Module
+Lazy page access for single images, multi-frame TIFF/GIF and PDF files
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Dict, Iterator, Tuple
+import importlib.util
+import io
+import logging
+import os
+import threading
+
+from .image_io import ImageSource, is_buffer, probe_image, read_image
+from .metrics import instrumented
+
+PDF_SIGNATURE = b'%PDF-'
+
+logger = logging.getLogger(__name__)
+
+# PDFium is not thread-safe: every call into it, from opening a document to
+# closing it, holds this lock. Pages are rendered one call at a time, so
+# concurrent documents interleave page by page
+_pdfium_lock = threading.Lock()
+
+
+class RendererUnavailable(RuntimeError):
+    """The renderer a document format needs is not installed"""
+
+
+def is_pdf(path: ImageSource) -> bool:
+    """Detect PDFs from the file signature rather than the extension"""
+    if is_buffer(path):
+        return bytes(memoryview(path)[:len(PDF_SIGNATURE)]) == PDF_SIGNATURE
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(PDF_SIGNATURE)) == PDF_SIGNATURE
+    except OSError:
+        return False
+
+
+def _require_pdfium():
+    if importlib.util.find_spec('pypdfium2') is None:
+        raise RendererUnavailable('PDF support requires pypdfium2')
+    import pypdfium2
+    return pypdfium2
+
+
+def _open(path: ImageSource):
+    """Path or file object for Pillow"""
+    return io.BytesIO(path) if is_buffer(path) else path
+
+
+def _pdf_input(path: ImageSource):
+    """pypdfium2 takes paths and bytes but not other buffers"""
+    return path if isinstance(path, (str, bytes)) else bytes(path)
+
+
+def probe_document(path: ImageSource, pdf_dpi: int = 200) -> Dict:
+    """
+    probe_image metadata plus the page count, without decoding pages
+    Dimensions are those of the first page; for PDFs they are the rendered
+    size at pdf_dpi, which is then also the trusted resolution
+    """
+    if not is_pdf(path):
+        metadata = probe_image(path)
+        if metadata['success']:
+            try:
+                with Image.open(_open(path)) as img:
+                    metadata['pages'] = getattr(img, 'n_frames', 1)
+            except Exception:
+                metadata['pages'] = 1
+        return metadata
+    
+    try:
+        pdfium = _require_pdfium()
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(_pdf_input(path))
+            try:
+                pages = len(document)
+                width_pt, height_pt = document.get_page_size(0) if pages else (0, 0)
+            finally:
+                document.close()
+    except RendererUnavailable as e:
+        # A problem of this installation, not of the document
+        logger.error(f"PDF probe failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'environment_error': True
+        }
+    except Exception as e:
+        logger.error(f"PDF probe failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    
+    width = int(round(width_pt * pdf_dpi / 72))
+    height = int(round(height_pt * pdf_dpi / 72))
+    return {
+        'success': True,
+        'format': 'PDF',
+        'width': width,
+        'height': height,
+        'pixels': width * height,
+        'file_size': memoryview(path).nbytes if is_buffer(path) else os.path.getsize(path),
+        'declared_dpi': (pdf_dpi, pdf_dpi),
+        'dpi': pdf_dpi,
+        'pages': pages
+    }
+
+
+@instrumented
+class DocumentSource:
+    """
+    The pages of one document file (a path or its contents in memory),
+    decoded one at a time
+    Single images go through the decoded image cache; TIFF/GIF frames are
+    read with Pillow and PDF pages rendered with pypdfium2 (optional) at
+    pdf_dpi. pages() is a generator, so a caller holding one page at a
+    time processes long statements with constant memory
+    """
+    
+    def __init__(self, path: ImageSource, pdf_dpi: int = 200):
+        self.path = path
+        self.pdf_dpi = pdf_dpi
+        self.format = 'PDF' if is_pdf(path) else None
+        self._page_count = None
+    
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            metadata = probe_document(self.path, self.pdf_dpi)
+            self._page_count = metadata.get('pages', 1) if metadata['success'] else 1
+        return self._page_count
+    
+    @property
+    def is_multi_page(self) -> bool:
+        return self.format == 'PDF' or self.page_count > 1
+    
+    def pages(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (page index, BGR image) in page order, decoding lazily
+        Raises RendererUnavailable for PDFs when pypdfium2 is not installed
+        """
+        if self.format == 'PDF':
+            yield from self._pdf_pages()
+        elif self.page_count > 1:
+            yield from self._frame_pages()
+        else:
+            image = read_image(self.path)
+            if image is None:
+                raise ValueError('Failed to load image')
+            yield 0, image
+    
+    def _frame_pages(self) -> Iterator[Tuple[int, np.ndarray]]:
+        with Image.open(_open(self.path)) as img:
+            for index in range(self.page_count):
+                img.seek(index)
+                yield index, cv2.cvtColor(np.asarray(img.convert('RGB')), cv2.COLOR_RGB2BGR)
+    
+    def _pdf_pages(self) -> Iterator[Tuple[int, np.ndarray]]:
+        pdfium = _require_pdfium()
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(_pdf_input(self.path))
+            page_count = len(document)
+        try:
+            for index in range(page_count):
+                with _pdfium_lock:
+                    page = document[index]
+                    try:
+                        bitmap = page.render(scale=self.pdf_dpi / 72)
+                        try:
+                            rendered = bitmap.to_pil().convert('RGB')
+                        finally:
+                            bitmap.close()
+                    finally:
+                        page.close()
+                yield index, cv2.cvtColor(np.asarray(rendered), cv2.COLOR_RGB2BGR)
+        finally:
+            with _pdfium_lock:
+                document.close()
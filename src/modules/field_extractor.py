@@ -0,0 +1,290 @@
+"""
+Field Extraction Module
+Single-pass extraction of identity fields from OCR word streams
+"""
+
+from datetime import date
+from typing import Dict, Iterable, Iterator, List
+import logging
+import re
+
+from .metrics import instrumented
+
+FIELDS = ['name', 'date_of_birth', 'address', 'postcode', 'abn', 'acn']
+
+ABN_WEIGHTS = [10, 1, 3, 5, 7, 9, 11, 13, 15, 17, 19]
+ACN_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 1]
+
+MONTHS = {name: index for index, names in enumerate(
+    [('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'),
+     ('may',), ('jun', 'june'), ('jul', 'july'), ('aug', 'august'),
+     ('sep', 'sept', 'september'), ('oct', 'october'), ('nov', 'november'), ('dec', 'december')],
+    start=1) for name in names}
+
+STATES = ('NSW', 'VIC', 'QLD', 'SA', 'WA', 'TAS', 'NT', 'ACT')
+
+STREET_TYPES = ('ST', 'STREET', 'RD', 'ROAD', 'AVE', 'AVENUE', 'DR', 'DRIVE', 'CT', 'COURT',
+                'PL', 'PLACE', 'CRES', 'CRESCENT', 'LN', 'LANE', 'TCE', 'TERRACE', 'HWY',
+                'HIGHWAY', 'BLVD', 'BOULEVARD', 'PDE', 'PARADE', 'WAY', 'CL', 'CLOSE')
+
+# Words that appear on ID documents but are never part of a person's name
+NAME_STOPWORDS = frozenset((
+    'AUSTRALIA', 'AUSTRALIAN', 'DRIVER', 'DRIVERS', 'LICENCE', 'LICENSE', 'PASSPORT', 'CARD',
+    'STATEMENT', 'BANK', 'ACCOUNT', 'GOVERNMENT', 'DEPARTMENT', 'MEDICARE', 'CERTIFICATE',
+    'ISSUED', 'EXPIRY', 'CLASS', 'TYPE', 'NUMBER', 'DATE', 'BIRTH', 'ADDRESS', 'NAME',
+    'PTY', 'LTD', 'LIMITED', 'INVOICE', 'TAX', 'ABN', 'ACN', 'DOB', 'SEX', 'NATIONALITY'
+) + STATES + STREET_TYPES)
+
+
+def valid_abn(digits: str) -> bool:
+    """ABN checksum: subtract 1 from the first digit, weighted sum divisible by 89"""
+    if len(digits) != 11 or not digits.isdigit() or digits[0] == '0':
+        return False
+    values = [int(d) for d in digits]
+    values[0] -= 1
+    return sum(w * v for w, v in zip(ABN_WEIGHTS, values)) % 89 == 0
+
+
+def valid_acn(digits: str) -> bool:
+    """ACN check digit: complement of the weighted sum modulo 10"""
+    if len(digits) != 9 or not digits.isdigit():
+        return False
+    total = sum(w * int(d) for w, d in zip(ACN_WEIGHTS, digits))
+    return (10 - total % 10) % 10 == int(digits[8])
+
+
+def normalize_date(day: int, month: int, year: int) -> str:
+    """ISO date string, or None for an impossible date"""
+    if year < 100:
+        year += 2000 if year <= date.today().year % 100 else 1900
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+@instrumented
+class FieldExtractor:
+    """
+    Precompiled, single-pass field extraction over OCR words
+    Words are grouped into lines from their boxes while streaming; each
+    completed line is scanned once by a combined pattern that emits dates,
+    ABN/ACN and postcode candidates, and line labels (Name, DOB, Address)
+    direct the next values. Each field carries the minimum confidence and
+    the union box of the words it came from
+    """
+    
+    LINE_PATTERN = re.compile(r'''
+        (?P<label>\b(?:full\s+name|name|surname|given\s+names?|date\s+of\s+birth|d\.?o\.?b\.?|born
+                   |residential\s+address|address)\b\s*:?)
+      | (?P<iso>\b(?P<iso_y>(?:19|20)\d{2})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})\b)
+      | (?P<dmy>\b(?P<dmy_d>\d{1,2})[/.\-](?P<dmy_m>\d{1,2})[/.\-](?P<dmy_y>\d{4}|\d{2})\b)
+      | (?P<dmon>\b(?P<dmon_d>\d{1,2})[\s\-]+(?P<dmon_m>[A-Za-z]{3,9})\.?[\s\-]+(?P<dmon_y>\d{4})\b)
+      | (?P<state_postcode>\b(?:%s)\s+(?P<state_digits>\d{4})\b)
+      | (?P<abn>\b\d{2}\s?\d{3}\s?\d{3}\s?\d{3}\b)
+      | (?P<acn>\b\d{3}\s?\d{3}\s?\d{3}\b)
+      | (?P<postcode>\b\d{4}\b)
+    ''' % '|'.join(STATES), re.IGNORECASE | re.VERBOSE)
+    
+    STREET = re.compile(r'^\s*(?:(?:unit|u|apt|lot)\s*\d+[a-z]?\s*/?\s*)?\d+[a-z]?(?:[/-]\d+[a-z]?)?\s+'
+                        r'[A-Za-z][A-Za-z\s\']*?\b(?:%s)\b\.?' % '|'.join(STREET_TYPES), re.IGNORECASE)
+    NAME_WORD = re.compile(r"^[A-Za-z][A-Za-z'\-]+$")
+    
+    def __init__(self, min_confidence: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.min_confidence = min_confidence
+    
+    def extract(self, extraction_results: Dict) -> Dict:
+        """
+        Fields from one extract_text_with_confidence result
+        Returns fields, per-field confidence and boxes, and the raw text
+        """
+        state = {
+            'fields': {field: None for field in FIELDS},
+            'confidence': {},
+            'boxes': {},
+            'dates': [],
+            'pending_label': None,
+            'pending_address': None,
+            'other': []
+        }
+        
+        words = []
+        line = []
+        for word in extraction_results.get('extractions', []):
+            if word.get('confidence', 100) < self.min_confidence:
+                continue
+            words.append(word['text'])
+            if line and not self._same_line(line[-1], word):
+                self._scan_line(line, state)
+                line = []
+            line.append(word)
+        if line:
+            self._scan_line(line, state)
+        
+        return self._finish(state, ' '.join(words))
+    
+    def extract_bulk(self, extraction_results: Iterable[Dict]) -> Iterator[Dict]:
+        """Stream fields for many OCR results, e.g. for backfills"""
+        for result in extraction_results:
+            yield self.extract(result)
+    
+    def _same_line(self, previous: Dict, word: Dict) -> bool:
+        a, b = previous.get('box'), word.get('box')
+        if not a or not b:
+            return False
+        center = b['y'] + b['h'] / 2
+        return a['y'] <= center <= a['y'] + a['h'] and b['x'] >= a['x']
+    
+    def _scan_line(self, line: List[Dict], state: Dict):
+        # Map character offsets of the joined line back to its words
+        text = ''
+        spans = []
+        for word in line:
+            if text:
+                text += ' '
+            spans.append((len(text), len(text) + len(word['text']), word))
+            text += word['text']
+        
+        def words_between(start: int, end: int) -> List[Dict]:
+            return [word for s, e, word in spans if s < end and e > start]
+        
+        # A label alone on the previous line applies to this one
+        label, own_label = state['pending_label'], None
+        address = state['pending_address']
+        state['pending_label'] = state['pending_address'] = None
+        label_end = 0
+        state_postcode = None
+        postcode = None
+        
+        for match in self.LINE_PATTERN.finditer(text):
+            kind = match.lastgroup
+            matched = words_between(match.start(), match.end())
+            
+            if kind == 'label':
+                label = own_label = self._label_field(match.group('label'))
+                label_end = match.end()
+            elif kind in ('iso', 'dmy', 'dmon'):
+                parsed = self._parse_date(match, kind)
+                if parsed:
+                    state['dates'].append((parsed, label == 'date_of_birth', matched))
+            elif kind == 'state_postcode':
+                state_postcode = match
+            elif kind == 'postcode':
+                if postcode is None and 200 <= int(match.group()) <= 9999:
+                    postcode = match
+            elif kind == 'abn':
+                digits = re.sub(r'\s', '', match.group())
+                if valid_abn(digits):
+                    self._set(state, 'abn', digits, matched)
+                else:
+                    state['other'].append(digits)
+            elif kind == 'acn':
+                digits = re.sub(r'\s', '', match.group())
+                if valid_acn(digits):
+                    self._set(state, 'acn', digits, matched)
+                else:
+                    state['other'].append(digits)
+        
+        rest = text[label_end:].strip()
+        rest_words = words_between(label_end, len(text))
+        
+        # Postcode: prefer one following a state abbreviation
+        if state_postcode:
+            self._set(state, 'postcode', state_postcode.group('state_digits'),
+                      words_between(state_postcode.start('state_digits'), state_postcode.end()),
+                      prefer=True)
+        elif postcode:
+            self._set(state, 'postcode', postcode.group(), words_between(postcode.start(), postcode.end()))
+        
+        # Address: labelled, or a street line continued by a suburb/state line
+        if label == 'address' and rest:
+            state['pending_address'] = (rest, rest_words)
+        elif own_label == 'address':
+            state['pending_label'] = 'address'
+        elif address and state_postcode:
+            self._set(state, 'address', f"{address[0]}, {text.strip()}", address[1] + line, prefer=True)
+        elif address:
+            self._set(state, 'address', address[0], address[1])
+        elif self.STREET.match(text):
+            if state_postcode:
+                self._set(state, 'address', text.strip(), line)
+            else:
+                state['pending_address'] = (text.strip(), line)
+        
+        # Name: labelled, or the first line made only of name-like words
+        if label == 'name':
+            if rest:
+                self._set(state, 'name', rest, rest_words, prefer=True)
+            elif own_label:
+                state['pending_label'] = 'name'
+        elif own_label == 'date_of_birth' and not any(d[1] for d in state['dates']):
+            state['pending_label'] = 'date_of_birth'
+        elif state['fields']['name'] is None and self._looks_like_name(line):
+            self._set(state, 'name', text.strip(), line)
+    
+    def _finish(self, state: Dict, raw_text: str) -> Dict:
+        if state['pending_address'] and state['fields']['address'] is None:
+            self._set(state, 'address', *state['pending_address'])
+        
+        # Date of birth: a labelled date, otherwise the earliest past date
+        # (issue and expiry dates are later)
+        today = date.today().isoformat()
+        labelled = [d for d in state['dates'] if d[1]]
+        past = sorted((d for d in state['dates'] if d[0] < today), key=lambda d: d[0])
+        chosen = labelled[0] if labelled else (past[0] if past else None)
+        if chosen:
+            self._set(state, 'date_of_birth', chosen[0], chosen[2])
+        
+        fields = dict(state['fields'])
+        fields['other'] = state['other']
+        return {
+            'fields': fields,
+            'confidence': state['confidence'],
+            'boxes': state['boxes'],
+            'raw_text': raw_text
+        }
+    
+    def _set(self, state: Dict, field: str, value: str, words: List[Dict], prefer: bool = False):
+        if state['fields'][field] is not None and not prefer:
+            return
+        state['fields'][field] = value
+        confidences = [word['confidence'] for word in words if 'confidence' in word]
+        if confidences:
+            state['confidence'][field] = min(confidences)
+        boxes = [word['box'] for word in words if word.get('box')]
+        if boxes:
+            x0 = min(b['x'] for b in boxes)
+            y0 = min(b['y'] for b in boxes)
+            state['boxes'][field] = {
+                'x': x0,
+                'y': y0,
+                'w': max(b['x'] + b['w'] for b in boxes) - x0,
+                'h': max(b['y'] + b['h'] for b in boxes) - y0
+            }
+    
+    def _label_field(self, label: str) -> str:
+        label = label.lower()
+        if 'address' in label:
+            return 'address'
+        if 'birth' in label or 'born' in label or label.replace('.', '').startswith('dob'):
+            return 'date_of_birth'
+        return 'name'
+    
+    def _parse_date(self, match, kind: str) -> str:
+        if kind == 'iso':
+            return normalize_date(int(match.group('iso_d')), int(match.group('iso_m')),
+                                  int(match.group('iso_y')))
+        if kind == 'dmy':
+            return normalize_date(int(match.group('dmy_d')), int(match.group('dmy_m')),
+                                  int(match.group('dmy_y')))
+        month = MONTHS.get(match.group('dmon_m').lower())
+        if month is None:
+            return None
+        return normalize_date(int(match.group('dmon_d')), month, int(match.group('dmon_y')))
+    
+    def _looks_like_name(self, line: List[Dict]) -> bool:
+        texts = [word['text'] for word in line]
+        return (2 <= len(texts) <= 4
+                and all(self.NAME_WORD.match(text) for text in texts)
+                and not any(text.upper() in NAME_STOPWORDS for text in texts))
@@ -0,0 +1,255 @@
+"""
+Image I/O Module
+Header-only probing and decode-once caching of document images
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+import hashlib
+import io
+import logging
+import os
+import threading
+
+# Resolutions written by default by most capture software and screenshots;
+# they say nothing about the physical size of the document
+PLACEHOLDER_DPI = (72, 96)
+
+logger = logging.getLogger(__name__)
+
+# A document given by path or as the encoded file contents in memory
+ImageSource = Union[str, bytes, bytearray, memoryview]
+
+
+def is_buffer(source) -> bool:
+    """True for in-memory encoded file contents"""
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def save_stream(stream: BinaryIO, path: str, chunk_size: int = 1024 * 1024) -> Tuple[bytes, str]:
+    """
+    Persist an upload stream while hashing and buffering it, in one pass
+    Returns the contents and their SHA-256 (the result cache key), so
+    processing starts from memory instead of reading the file back. The
+    file is not fsynced before processing begins
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+            f.write(chunk)
+            chunks.append(chunk)
+    return b''.join(chunks), digest.hexdigest()
+
+
+def describe_source(source) -> str:
+    """Path, or the size of an in-memory buffer, for log messages"""
+    if is_buffer(source):
+        return f'<{memoryview(source).nbytes} byte buffer>'
+    return str(source)
+
+
+def probe_image(source: ImageSource) -> Dict:
+    """
+    Read dimensions and declared physical resolution from the file header
+    Pillow's Image.open is lazy, so no pixel data is decoded. Declared
+    resolution comes from JFIF density / EXIF (JPEG), pHYs (PNG) or
+    XResolution (TIFF); 'dpi' is only set when it is not a placeholder.
+    source is a path or the file contents in memory. Failures to read the
+    file itself, rather than to parse it, are flagged 'environment_error'
+    """
+    try:
+        if is_buffer(source):
+            file_size = memoryview(source).nbytes
+            source = io.BytesIO(source)
+        else:
+            file_size = os.path.getsize(source)
+    except OSError as e:
+        logger.error(f"Image probe failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'environment_error': True
+        }
+    
+    try:
+        with Image.open(source) as img:
+            width, height = img.size
+            image_format = img.format
+            declared = img.info.get('dpi')
+    except Image.DecompressionBombError as e:
+        return {
+            'success': False,
+            'error': f'Image exceeds pixel limit: {str(e)}',
+            'over_budget': True
+        }
+    except Exception as e:
+        logger.error(f"Image probe failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    
+    declared_dpi = None
+    if declared and declared[0]:
+        declared_dpi = (int(round(float(declared[0]))), int(round(float(declared[1] or declared[0]))))
+    trusted = declared_dpi is not None and declared_dpi[0] not in PLACEHOLDER_DPI
+    
+    return {
+        'success': True,
+        'format': image_format,
+        'width': width,
+        'height': height,
+        'pixels': width * height,
+        'file_size': file_size,
+        'declared_dpi': declared_dpi,
+        'dpi': declared_dpi[0] if trusted else None
+    }
+
+
+def check_image_budget(metadata: Dict, max_file_bytes: int = None, max_pixels: int = None,
+                       max_pages: int = None) -> List[str]:
+    """
+    Return reasons a probed image exceeds the size, pixel or page budget
+    The pixel budget applies per page. An empty list means the image may
+    be decoded
+    """
+    if not metadata.get('success'):
+        return [metadata.get('error', 'Unreadable image header')]
+    
+    reasons = []
+    if max_file_bytes and metadata['file_size'] > max_file_bytes:
+        reasons.append(f"file size: {metadata['file_size']} bytes above limit {max_file_bytes}")
+    if max_pixels and metadata['pixels'] > max_pixels:
+        reasons.append(f"pixels: {metadata['width']}x{metadata['height']} above limit {max_pixels}")
+    if max_pages and metadata.get('pages', 1) > max_pages:
+        reasons.append(f"pages: {metadata['pages']} above limit {max_pages}")
+    return reasons
+
+
+class DecodedImageCache:
+    """
+    Process-wide LRU cache of decoded images
+    Keyed by SHA-256 of the file bytes (plus decode flags), so identical
+    uploads under different names - e.g. dispute re-submissions - share an
+    entry. Least-recently-used images are evicted beyond max_bytes.
+    Cached arrays are read-only; callers copy before modifying in place.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def load(self, image_path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """
+        Decode an image file, reusing a cached decode of identical bytes
+        Returns None if the file cannot be read or decoded, like cv2.imread
+        """
+        try:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        return self.decode(data, flags)
+    
+    def decode(self, data: Union[bytes, memoryview], flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """
+        Decode encoded image bytes through the cache
+        Any buffer works (bytes, bytearray, memoryview); it is hashed and
+        handed to cv2.imdecode without copying
+        """
+        key = (hashlib.sha256(data).hexdigest(), flags)
+        
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+        
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+        if image is None:
+            return None
+        image.flags.writeable = False
+        self.put(key, image)
+        return image
+    
+    def put(self, key, image: np.ndarray):
+        if image.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = image
+            self.current_bytes += image.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+_image_cache = DecodedImageCache()
+
+
+def get_image_cache() -> DecodedImageCache:
+    """Return the process-wide decoded image cache"""
+    return _image_cache
+
+
+def configure_image_cache(max_bytes: int) -> DecodedImageCache:
+    """Resize the process-wide cache, evicting down to the new budget"""
+    with _image_cache._lock:
+        _image_cache.max_bytes = max_bytes
+        while _image_cache.current_bytes > max_bytes and _image_cache._entries:
+            _, evicted = _image_cache._entries.popitem(last=False)
+            _image_cache.current_bytes -= evicted.nbytes
+            _image_cache.evictions += 1
+    return _image_cache
+
+
+def load_image(image_path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """Decode an image file through the process-wide cache"""
+    return _image_cache.load(image_path, flags)
+
+
+def decode_image(data: Union[bytes, memoryview], flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """Decode in-memory file contents through the process-wide cache"""
+    return _image_cache.decode(data, flags)
+
+
+def read_image(source: Union[ImageSource, np.ndarray], flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """
+    Decoded image from a path, an in-memory buffer or an already decoded array
+    Returns None if the source cannot be read or decoded
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if is_buffer(source):
+        return decode_image(source, flags)
+    return load_image(source, flags)
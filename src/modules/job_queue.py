@@ -0,0 +1,149 @@
+"""
+Job Queue Module
+Durable SQLite-backed background jobs with leased workers
+"""
+
+from datetime import datetime
+from typing import Callable, Dict
+import json
+import logging
+import os
+import threading
+import uuid
+
+from .metrics import instrumented
+from .result_cache import json_default
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+@instrumented
+class JobQueue:
+    """
+    Background jobs stored in the application database
+    Workers lease a job for lease_seconds and renew the lease while it
+    runs. A job whose handler raises is re-queued until max_attempts; a
+    job whose worker died (lease expired) is claimed again by another
+    worker, so work survives crashes and restarts
+    """
+    
+    def __init__(self, database, lease_seconds: float = 120, max_attempts: int = 3):
+        self.logger = logging.getLogger(__name__)
+        self.db = database
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+    
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Queue a job and return its id"""
+        job_id = f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.db.enqueue_job(job_id, kind, json.dumps(payload, default=json_default), self.max_attempts)
+        return job_id
+    
+    def get(self, job_id: str) -> Dict:
+        return self.db.get_job(job_id)
+    
+    def claim(self, worker_id: str, kind: str = None) -> Dict:
+        return self.db.claim_job(worker_id, self.lease_seconds, kind)
+    
+    def renew(self, job: Dict, worker_id: str) -> bool:
+        return self.db.renew_job_lease(job['id'], worker_id, self.lease_seconds)
+    
+    def complete(self, job: Dict, worker_id: str, result: Dict) -> bool:
+        return self.db.finish_job(job['id'], worker_id, 'done',
+                                  result=json.dumps(result, default=json_default))
+    
+    def fail(self, job: Dict, worker_id: str, error: str) -> bool:
+        """Re-queue the job for another attempt, or mark it failed when out of attempts"""
+        status = 'queued' if job['attempts'] < job['max_attempts'] else 'failed'
+        return self.db.finish_job(job['id'], worker_id, status, error=error)
+    
+    def stats(self) -> Dict:
+        counts = self.db.get_job_counts()
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+
+class JobWorkerPool:
+    """
+    Worker threads that run queued jobs of one kind through handler
+    handler(payload) returns the JSON-serialisable job result. Each worker
+    renews its lease every lease_seconds / 3 while the handler runs; a
+    handler that loses its lease (it ran past the lease while the process
+    was stalled) has its outcome discarded, as the job was handed on
+    """
+    
+    def __init__(self, queue: JobQueue, kind: str, handler: Callable[[Dict], Dict],
+                 workers: int = 2, poll_interval: float = 0.5):
+        self.logger = logging.getLogger(__name__)
+        self.queue = queue
+        self.kind = kind
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+    
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            worker_id = f"{os.getpid()}-{index}-{uuid.uuid4().hex[:6]}"
+            thread = threading.Thread(target=self._run, args=(worker_id,),
+                                      name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def notify(self):
+        """Wake idle workers after a submit instead of waiting for the next poll"""
+        self._wake.set()
+    
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def run_once(self, worker_id: str = 'inline') -> bool:
+        """Claim and run one job; False when the queue is empty"""
+        job = self.queue.claim(worker_id, self.kind)
+        if job is None:
+            return False
+        
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, worker_id, finished),
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handler(job['payload'])
+        except Exception as e:
+            self.logger.error(f"Job {job['id']} failed (attempt {job['attempts']}): {str(e)}")
+            recorded = self.queue.fail(job, worker_id, str(e))
+        else:
+            recorded = self.queue.complete(job, worker_id, result)
+        finally:
+            finished.set()
+            heartbeat.join()
+        
+        if not recorded:
+            self.logger.warning(f"Lease on job {job['id']} was lost; outcome discarded")
+        self.processed += 1
+        return True
+    
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                if self.run_once(worker_id):
+                    continue
+            except Exception as e:
+                self.logger.error(f"Job worker {worker_id} error: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def _heartbeat(self, job: Dict, worker_id: str, done: threading.Event):
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.renew(job, worker_id):
+                return
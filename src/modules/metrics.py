@@ -0,0 +1,350 @@
+"""
+Metrics Module
+In-process timers, counters and gauges exposed in Prometheus text format
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+import atexit
+import functools
+import glob
+import inspect
+import json
+import logging
+import multiprocessing.util
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set by configure_metrics so spawned worker processes inherit the settings
+METRICS_DIR_ENV = 'RPR_METRICS_DIR'
+METRICS_ENABLED_ENV = 'RPR_METRICS_ENABLED'
+METRICS_FLUSH_ENV = 'RPR_METRICS_FLUSH_INTERVAL'
+
+METHOD_DURATION = 'rpr_method_duration_seconds'
+METHOD_ERRORS = 'rpr_method_errors_total'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Histograms, counters and gauges of one process
+    With a multiprocess_dir every process (web workers, quality batch
+    pool, OCR workers) writes its samples to <pid>.json there at most
+    every flush_interval seconds; render() sums histograms and counters
+    over all files and gauges over live processes, so a scrape of any
+    worker sees the whole deployment. Gauges registered with a callback
+    are read at scrape time in the scraping process only
+    """
+    
+    def __init__(self, enabled: bool = True, multiprocess_dir: str = None,
+                 flush_interval: float = 5.0, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}  # (name, labels) -> value
+        self._callbacks = {}  # name -> callback returning [(labels dict, value)]
+        self._help = {
+            METHOD_DURATION: 'Duration of instrumented method calls',
+            METHOD_ERRORS: 'Instrumented method calls that raised'
+        }
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+    
+    def observe(self, name: str, labels: Labels, seconds: float):
+        """Add a duration to a histogram"""
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[bisect_left(self.buckets, seconds)] += 1
+            histogram[-1] += seconds
+        self._maybe_flush()
+    
+    def inc(self, name: str, labels: Labels = (), amount: float = 1):
+        """Increase a counter"""
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+        self._maybe_flush()
+    
+    def set_gauge(self, name: str, labels: Labels, value: float):
+        """Set a gauge owned by this process"""
+        with self._lock:
+            self._gauges[(name, labels)] = value
+        self._maybe_flush()
+    
+    def register_gauge(self, name: str, help_text: str, callback: Callable[[], Iterable]):
+        """Gauge read at scrape time; callback returns (labels dict, value) pairs"""
+        self._help[name] = help_text
+        self._callbacks[name] = callback
+    
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+    
+    def snapshot(self) -> Dict:
+        """Samples of this process in the <pid>.json format"""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'buckets': list(self.buckets),
+                'histograms': [[name, list(labels), list(values)]
+                               for (name, labels), values in self._histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self._gauges.items()]
+            }
+    
+    def flush(self):
+        """Write this process's samples to the multiprocess directory"""
+        if not self.multiprocess_dir:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+        try:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {path}: {str(e)}")
+    
+    def prune(self):
+        """Remove the sample files of processes that are no longer running"""
+        if not self.multiprocess_dir:
+            return
+        for path in glob.glob(os.path.join(self.multiprocess_dir, '*.json')):
+            pid = os.path.basename(path)[:-len('.json')]
+            if pid.isdigit() and int(pid) != os.getpid() and not _process_alive(int(pid)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def collect(self) -> Dict:
+        """Samples of this process merged with the other processes' files"""
+        snapshots = [self.snapshot()]
+        if self.multiprocess_dir:
+            for path in glob.glob(os.path.join(self.multiprocess_dir, '*.json')):
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if snapshot['pid'] != os.getpid():
+                    snapshots.append(snapshot)
+        
+        histograms, counters, gauges = {}, {}, {}
+        for snapshot in snapshots:
+            if snapshot['buckets'] != list(self.buckets):
+                continue
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                histograms[key] = [a + b for a, b in zip(merged, values)]
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            if snapshot['pid'] == os.getpid() or _process_alive(snapshot['pid']):
+                for name, labels, value in snapshot['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+        
+        for name, callback in self._callbacks.items():
+            try:
+                for labels, value in callback():
+                    gauges[(name, tuple(sorted(labels.items())))] = value
+            except Exception as e:
+                logger.warning(f"Metrics gauge {name} failed: {str(e)}")
+        return {'histograms': histograms, 'counters': counters, 'gauges': gauges}
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        collected = self.collect()
+        lines = []
+        
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        for kind, samples in (('counter', collected['counters']), ('gauge', collected['gauges'])):
+            for name in sorted({name for name, _ in samples}):
+                header(name, kind)
+                for (sample_name, labels), value in sorted(samples.items()):
+                    if sample_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        
+        histograms = collected['histograms']
+        bounds = list(self.buckets) + [float('inf')]
+        for name in sorted({name for name, _ in histograms}):
+            header(name, 'histogram')
+            for (sample_name, labels), values in sorted(histograms.items()):
+                if sample_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds, values[:-1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_value(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+    
+    def _maybe_flush(self):
+        if (self.multiprocess_dir and time.monotonic() - self._last_flush >= self.flush_interval
+                and self._flush_lock.acquire(blocking=False)):
+            try:
+                self.flush()
+            finally:
+                self._flush_lock.release()
+
+
+_registry = MetricsRegistry(
+    enabled=os.environ.get(METRICS_ENABLED_ENV, '1') != '0',
+    multiprocess_dir=os.environ.get(METRICS_DIR_ENV) or None,
+    flush_interval=float(os.environ.get(METRICS_FLUSH_ENV, 5.0))
+)
+# Flush the last samples on exit; multiprocessing children skip atexit
+# handlers but run their finalizers
+atexit.register(_registry.flush)
+multiprocessing.util.Finalize(_registry, _registry.flush, exitpriority=10)
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    return _registry
+
+
+def configure_metrics(enabled: bool = True, multiprocess_dir: str = None,
+                      flush_interval: float = 5.0) -> MetricsRegistry:
+    """
+    Configure the process-wide registry, for this process and the worker
+    processes it spawns afterwards; sample files left by processes that
+    have exited are removed
+    """
+    _registry.enabled = enabled
+    _registry.multiprocess_dir = multiprocess_dir
+    _registry.flush_interval = flush_interval
+    os.environ[METRICS_ENABLED_ENV] = '1' if enabled else '0'
+    os.environ[METRICS_FLUSH_ENV] = str(flush_interval)
+    if multiprocess_dir:
+        os.environ[METRICS_DIR_ENV] = multiprocess_dir
+        os.makedirs(multiprocess_dir, exist_ok=True)
+        _registry.prune()
+    else:
+        os.environ.pop(METRICS_DIR_ENV, None)
+    return _registry
+
+
+def timed(component: str, method: str) -> Callable:
+    """Decorator recording call durations and errors under component/method labels"""
+    labels = (('component', component), ('method', method))
+    
+    def decorate(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            # Time the generator's own work: each resume up to its next
+            # yield, not the caller's work between yields
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not _registry.enabled:
+                    return (yield from func(*args, **kwargs))
+                generator = func(*args, **kwargs)
+                resume, argument = generator.send, None
+                elapsed = 0.0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            value = resume(argument)
+                        except StopIteration as stop:
+                            return stop.value
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        try:
+                            argument = yield value
+                            resume = generator.send
+                        except GeneratorExit:
+                            start = time.perf_counter()
+                            try:
+                                generator.close()
+                            finally:
+                                elapsed += time.perf_counter() - start
+                            raise
+                        except BaseException as e:
+                            resume, argument = generator.throw, e
+                except GeneratorExit:
+                    raise
+                except Exception:
+                    _registry.inc(METHOD_ERRORS, labels)
+                    raise
+                finally:
+                    _registry.observe(METHOD_DURATION, labels, elapsed)
+            return generator_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                _registry.inc(METHOD_ERRORS, labels)
+                raise
+            finally:
+                _registry.observe(METHOD_DURATION, labels, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def instrumented(cls: type) -> type:
+    """
+    Class decorator timing every public method defined on cls
+    Properties, static and class methods are left as they are
+    """
+    for name, value in list(vars(cls).items()):
+        if not name.startswith('_') and inspect.isfunction(value):
+            setattr(cls, name, timed(cls.__name__, name)(value))
+    return cls
@@ -6,6 +6,9 @@ from difflib import SequenceMatcher
 from typing import Dict, List, Tuple
 import logging
 
+from .metrics import instrumented
+
+@instrumented
 class MismatchDetector:
     """
     Detects mismatches between document fields
@@ -108,6 +111,7 @@ class MismatchDetector:
         return mismatches
 
 
+@instrumented
 class RiskAssessor:
     """
     Assigns risk tier (1, 2, 3) based on mismatches and evidence
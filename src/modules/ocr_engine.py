@@ -0,0 +1,322 @@
+"""
+OCR Engine Module
+Tesseract backends: pytesseract (one process per call) and a pool of
+persistent workers that load the language model once
+"""
+
+import numpy as np
+from typing import Callable, Dict, List
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+from .metrics import instrumented
+
+OCR_BACKENDS = ('auto', 'pytesseract', 'tesserocr')
+
+# Columns of Tesseract's TSV output, as returned by pytesseract's image_to_data
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """Parse Tesseract TSV rows into pytesseract's Output.DICT layout"""
+    data = {column: [] for column in TSV_COLUMNS}
+    for line in tsv.splitlines():
+        fields = line.split('\t', len(TSV_COLUMNS) - 1)
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append('')
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column == 'text':
+                data[column].append(value)
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+
+@instrumented
+class PytesseractBackend:
+    """
+    Fallback backend: pytesseract spawns tesseract for every call
+    Requires: pytesseract and Tesseract OCR engine
+    """
+    
+    name = 'pytesseract'
+    # Every call pays the process start and model load
+    persistent = False
+    
+    def image_to_data(self, image: np.ndarray, psm: int = None) -> Dict[str, List]:
+        import pytesseract
+        from pytesseract import Output
+        
+        config = f'--psm {psm}' if psm is not None else ''
+        return pytesseract.image_to_data(image, config=config, output_type=Output.DICT)
+    
+    def health(self) -> Dict:
+        try:
+            import pytesseract
+            version = str(pytesseract.get_tesseract_version())
+            return {'backend': self.name, 'healthy': True, 'version': version}
+        except Exception as e:
+            return {'backend': self.name, 'healthy': False, 'error': str(e)}
+    
+    def close(self):
+        pass
+
+
+@instrumented
+class TesserocrEngine:
+    """
+    In-process Tesseract API used inside pool workers
+    Requires: tesserocr (optional); the language model loads once per engine
+    """
+    
+    def __init__(self, language: str = 'eng'):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.api = tesserocr.PyTessBaseAPI(lang=language)
+    
+    def image_to_data(self, image: np.ndarray, psm: int = None) -> Dict[str, List]:
+        from PIL import Image
+        
+        self.api.SetPageSegMode(psm if psm is not None else self.tesserocr.PSM.AUTO)
+        self.api.SetImage(Image.fromarray(image))
+        return parse_tsv(self.api.GetTSVText(0))
+
+
+@instrumented
+class OCRWorkerPool:
+    """
+    Pool of long-lived OCR worker processes
+    Each worker builds its engine once (loading the language model) and
+    receives raw image buffers over a pipe. Workers are started on first
+    use; a worker that crashes or times out is restarted, and a crashed
+    request is retried once on the fresh worker. A worker that fails to
+    restart is dropped and replaced by the next request
+    """
+    
+    name = 'tesserocr'
+    persistent = True
+    
+    def __init__(self, size: int = 2, language: str = 'eng', timeout_seconds: float = 30.0,
+                 engine_factory: Callable = TesserocrEngine):
+        self.logger = logging.getLogger(__name__)
+        self.size = max(1, size)
+        self.language = language
+        self.timeout_seconds = timeout_seconds
+        self.engine_factory = engine_factory
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start missing workers; called by every request"""
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = _OCRWorker(self._context, self.engine_factory, self.language,
+                                    self.timeout_seconds)
+                self._workers.append(worker)
+                self._idle.put(worker)
+    
+    def image_to_data(self, image: np.ndarray, psm: int = None) -> Dict[str, List]:
+        self.start()
+        try:
+            worker = self._idle.get(timeout=self.timeout_seconds)
+        except queue.Empty:
+            raise TimeoutError(f'No OCR worker became free within {self.timeout_seconds}s')
+        healthy = True
+        try:
+            for attempt in range(2):
+                try:
+                    return worker.request(image, psm)
+                except TimeoutError:
+                    # A hung page would hang the retry too; TimeoutError is
+                    # an OSError, so it must be handled before crashes
+                    self.logger.error(f"OCR worker {worker.pid} timed out")
+                    healthy = self._restart(worker)
+                    raise
+                except (EOFError, OSError) as e:
+                    self.logger.error(f"OCR worker {worker.pid} crashed: {str(e)}")
+                    healthy = self._restart(worker)
+                    if attempt or not healthy:
+                        raise RuntimeError(f'OCR worker crashed: {str(e)}')
+        finally:
+            # A worker that failed to restart is dead; start() replaces it
+            if healthy:
+                self._idle.put(worker)
+    
+    def check_health(self) -> Dict:
+        """Ping idle workers and restart any that are unresponsive"""
+        checked = []
+        while True:
+            try:
+                checked.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        
+        healthy = 0
+        for worker in checked:
+            if worker.ping():
+                healthy += 1
+            else:
+                self.logger.warning(f"Restarting unresponsive OCR worker {worker.pid}")
+                if not self._restart(worker):
+                    continue
+            self._idle.put(worker)
+        
+        return {
+            'backend': self.name,
+            'healthy': healthy == len(checked),
+            'workers': len(self._workers),
+            'checked': len(checked),
+            'responsive': healthy,
+            'restarts': self.restarts
+        }
+    
+    def health(self) -> Dict:
+        self.start()
+        return self.check_health()
+    
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+    
+    def _restart(self, worker: '_OCRWorker') -> bool:
+        """Restart a worker; one that does not come back is dropped from the pool"""
+        self.restarts += 1
+        try:
+            worker.restart()
+            return True
+        except Exception as e:
+            self.logger.error(f"OCR worker failed to restart: {str(e)}")
+            with self._lock:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+            return False
+
+
+class _OCRWorker:
+    """Parent-side handle of one worker process"""
+    
+    def __init__(self, context, engine_factory: Callable, language: str, timeout_seconds: float):
+        self.context = context
+        self.engine_factory = engine_factory
+        self.language = language
+        self.timeout_seconds = timeout_seconds
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.launch()
+    
+    def launch(self):
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_ocr_worker_main,
+                                            args=(child_conn, self.engine_factory, self.language),
+                                            daemon=True)
+        self.process.start()
+        child_conn.close()
+        try:
+            status, detail = self._receive()
+        except (EOFError, OSError) as e:
+            status, detail = 'error', str(e) or type(e).__name__
+        if status != 'ready':
+            self.stop()
+            raise RuntimeError(f'OCR worker failed to start: {detail}')
+        self.pid = detail
+    
+    def request(self, image: np.ndarray, psm: int = None) -> Dict[str, List]:
+        image = np.ascontiguousarray(image)
+        self.conn.send(('ocr', image.shape, image.dtype.str, psm))
+        self.conn.send_bytes(memoryview(image).cast('B'))
+        status, detail = self._receive()
+        if status == 'error':
+            raise RuntimeError(detail)
+        return detail
+    
+    def ping(self) -> bool:
+        if not self.process.is_alive():
+            return False
+        try:
+            self.conn.send(('ping',))
+            return self._receive(timeout=5.0)[0] == 'pong'
+        except (EOFError, OSError, TimeoutError):
+            return False
+    
+    def restart(self):
+        self.stop()
+        self.launch()
+    
+    def stop(self):
+        try:
+            self.conn.send(('stop',))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+    
+    def _receive(self, timeout: float = None):
+        if not self.conn.poll(timeout or self.timeout_seconds):
+            raise TimeoutError('OCR worker did not respond')
+        return self.conn.recv()
+
+
+def _ocr_worker_main(conn, engine_factory: Callable, language: str):
+    try:
+        engine = engine_factory(language)
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+    conn.send(('ready', os.getpid()))
+    
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        
+        command = message[0]
+        if command == 'stop':
+            return
+        if command == 'ping':
+            conn.send(('pong', os.getpid()))
+            continue
+        
+        _, shape, dtype, psm = message
+        image = np.frombuffer(conn.recv_bytes(), dtype=dtype).reshape(shape)
+        try:
+            conn.send(('ok', engine.image_to_data(image, psm)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+
+
+def create_ocr_backend(backend: str = 'auto', workers: int = 2, language: str = 'eng',
+                       timeout_seconds: float = 30.0):
+    """
+    Build the configured OCR backend
+    'auto' and 'tesserocr' use the worker pool when tesserocr is installed
+    and otherwise fall back to pytesseract
+    """
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    
+    if backend != 'pytesseract':
+        if importlib.util.find_spec('tesserocr') is not None:
+            return OCRWorkerPool(workers, language, timeout_seconds)
+        if backend == 'tesserocr':
+            logging.getLogger(__name__).warning("tesserocr is not installed; using pytesseract")
+    return PytesseractBackend()
@@ -0,0 +1,179 @@
+"""
+OCR Results Module
+Columnar (struct-of-arrays) storage of recognised words
+"""
+
+import numpy as np
+from typing import Dict, Iterator, List, Union
+import base64
+
+SERIAL_FORMAT = 'ocr-words/1'
+
+BOX_COLUMNS = ('left', 'top', 'width', 'height')
+
+
+def _encode(array: np.ndarray) -> Dict:
+    return {'dtype': array.dtype.str, 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def _decode(encoded: Dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded['data']), dtype=encoded['dtype'])
+
+
+def _smallest_unsigned(array: np.ndarray) -> np.ndarray:
+    if array.size == 0 or (array.min() >= 0 and array.max() <= np.iinfo(np.uint16).max):
+        return array.astype('<u2')
+    return array.astype('<i4')
+
+
+class OCRWords:
+    """
+    Recognised words as columns instead of one dict per word
+    All text lives in one buffer sliced by per-word offsets; confidence
+    and boxes (x, y, w, h) are NumPy columns. Indexing and iteration give
+    dict views in the original {'text', 'confidence', 'box'} format, built
+    on demand; extra numeric columns (e.g. calibrated confidence) appear
+    as additional keys. Views are copies, so changes are made on columns
+    """
+    
+    def __init__(self, text: str = '', offsets: np.ndarray = None, confidence: np.ndarray = None,
+                 boxes: np.ndarray = None, columns: Dict[str, np.ndarray] = None):
+        self.text = text
+        self.offsets = np.zeros(1, dtype=np.int32) if offsets is None else np.asarray(offsets, dtype=np.int32)
+        count = len(self.offsets) - 1
+        self.confidence = (np.zeros(count, dtype=np.int16) if confidence is None
+                           else np.asarray(confidence, dtype=np.int16))
+        self.boxes = (np.zeros((count, 4), dtype=np.int32) if boxes is None
+                      else np.asarray(boxes, dtype=np.int32).reshape(count, 4))
+        self.columns = dict(columns or {})
+    
+    @classmethod
+    def from_image_data(cls, data: Dict[str, List], offset_x: int = 0, offset_y: int = 0) -> 'OCRWords':
+        """
+        Words with positive confidence from image_to_data output
+        Boxes are shifted by the offset of the crop they came from
+        """
+        confidence = np.asarray(data['conf'], dtype=np.float32).astype(np.int16)
+        keep = np.flatnonzero(confidence > 0)  # Skip empty detections
+        texts = [data['text'][i] for i in keep]
+        boxes = np.stack([np.asarray(data[column], dtype=np.int32)[keep] for column in BOX_COLUMNS],
+                         axis=1) if len(keep) else None
+        if boxes is not None:
+            boxes += np.array([offset_x, offset_y, 0, 0], dtype=np.int32)
+        return cls(''.join(texts), cls._offsets(texts), confidence[keep], boxes)
+    
+    @classmethod
+    def from_dicts(cls, words: List[Dict]) -> 'OCRWords':
+        """Columns from the list-of-dicts word format"""
+        texts = [word['text'] for word in words]
+        boxes = [[word['box'][key] for key in ('x', 'y', 'w', 'h')] if word.get('box') else [0, 0, 0, 0]
+                 for word in words]
+        return cls(''.join(texts), cls._offsets(texts), [word['confidence'] for word in words],
+                   np.array(boxes, dtype=np.int32).reshape(len(words), 4))
+    
+    @classmethod
+    def concatenate(cls, parts: List['OCRWords']) -> 'OCRWords':
+        """
+        Join word sets in order, e.g. crop results of one page or the pages
+        of a document; extra columns are kept when every part has them
+        """
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls()
+        lengths = np.concatenate([np.diff(part.offsets) for part in parts])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        shared = [name for name in parts[0].columns if all(name in part.columns for part in parts)]
+        return cls(''.join(part.text for part in parts), offsets,
+                   np.concatenate([part.confidence for part in parts]),
+                   np.concatenate([part.boxes for part in parts]),
+                   {name: np.concatenate([part.columns[name] for part in parts]) for name in shared})
+    
+    @staticmethod
+    def _offsets(texts: List[str]) -> np.ndarray:
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return offsets
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __bool__(self) -> bool:
+        return len(self) > 0
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self.word(index)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, 'OCRWords']:
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('word index out of range')
+        return self.word(index)
+    
+    def word_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+    
+    def texts(self) -> List[str]:
+        return [self.word_text(index) for index in range(len(self))]
+    
+    def word(self, index: int) -> Dict:
+        """Dict view of one word"""
+        x, y, w, h = self.boxes[index].tolist()
+        view = {
+            'text': self.word_text(index),
+            'confidence': int(self.confidence[index]),
+            'box': {'x': x, 'y': y, 'w': w, 'h': h}
+        }
+        for name, column in self.columns.items():
+            view[name] = column[index].item()
+        return view
+    
+    def take(self, indices: np.ndarray) -> 'OCRWords':
+        """Subset of words in the given order"""
+        texts = [self.word_text(index) for index in indices]
+        return OCRWords(''.join(texts), self._offsets(texts), self.confidence[indices],
+                        self.boxes[indices],
+                        {name: column[indices] for name, column in self.columns.items()})
+    
+    def mean_confidence(self) -> float:
+        return float(self.confidence.mean()) if len(self) else 0
+    
+    def to_dicts(self) -> List[Dict]:
+        return list(self)
+    
+    @property
+    def nbytes(self) -> int:
+        return (len(self.text.encode('utf-8')) + self.offsets.nbytes + self.confidence.nbytes
+                + self.boxes.nbytes + sum(column.nbytes for column in self.columns.values()))
+    
+    def to_json(self) -> Dict:
+        """
+        Compact JSON-safe form: the text buffer, word lengths and columns
+        as base64 little-endian arrays in the smallest fitting type
+        """
+        return {
+            'format': SERIAL_FORMAT,
+            'text': self.text,
+            'lengths': _encode(_smallest_unsigned(np.diff(self.offsets))),
+            'confidence': _encode(self.confidence.astype('<i1')),
+            'boxes': _encode(_smallest_unsigned(self.boxes.ravel())),
+            'columns': {name: _encode(column.astype(column.dtype.newbyteorder('<')))
+                        for name, column in self.columns.items()}
+        }
+    
+    @classmethod
+    def from_json(cls, payload: Dict) -> 'OCRWords':
+        lengths = _decode(payload['lengths']).astype(np.int32)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(payload['text'], offsets, _decode(payload['confidence']),
+                   _decode(payload['boxes']).reshape(len(lengths), 4),
+                   {name: _decode(column) for name, column in payload.get('columns', {}).items()})
+    
+    @staticmethod
+    def is_serialized(payload) -> bool:
+        return isinstance(payload, dict) and payload.get('format') == SERIAL_FORMAT
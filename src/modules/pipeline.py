@@ -0,0 +1,123 @@
+"""
+Pipeline Module
+Shared executor for concurrent per-document processing
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker_state = threading.local()
+
+# Thread ident -> tag of the work it is running; unlike a thread-local it
+# can be read from other threads (the profiler's stack sampler)
+_task_tags = {}
+
+
+def _mark_worker_thread():
+    _worker_state.in_pipeline = True
+
+
+def set_task_tag(tag) -> object:
+    """
+    Tag the calling thread's work, and the pipeline tasks it submits, with
+    tag (None clears it). Returns the previous tag for restoring
+    """
+    ident = threading.get_ident()
+    previous = _task_tags.get(ident)
+    if tag is None:
+        _task_tags.pop(ident, None)
+    else:
+        _task_tags[ident] = tag
+    return previous
+
+
+def tagged_threads(tag) -> List[int]:
+    """Idents of the threads currently running work tagged with tag"""
+    return [ident for ident, value in dict(_task_tags).items() if value == tag]
+
+
+def _tagged(function: Callable) -> Callable:
+    """function, running under the submitting thread's tag on a pool thread"""
+    tag = _task_tags.get(threading.get_ident())
+    if tag is None:
+        return function
+    
+    def run(*args, **kwargs):
+        previous = set_task_tag(tag)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            set_task_tag(previous)
+    return run
+
+
+def configure_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Create the process-wide pipeline executor with max_workers threads
+    An existing executor is shut down once its queued work finishes
+    """
+    global _executor
+    with _executor_lock:
+        previous = _executor
+        _executor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                       thread_name_prefix='pipeline',
+                                       initializer=_mark_worker_thread)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _executor
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the pipeline executor, created with one thread per CPU if unconfigured"""
+    if _executor is None:
+        return configure_executor(os.cpu_count() or 1)
+    return _executor
+
+
+def run_concurrently(calls: List[Callable], inline_first: bool = False) -> List:
+    """
+    Run independent calls on the shared executor, returning results in order
+    Calls made from a pipeline thread, or a single call, run inline so
+    nested use cannot exhaust the pool and deadlock. With inline_first the
+    first call runs on the calling thread while the rest run on the
+    executor, so it can still fan its own work out on the executor
+    """
+    if len(calls) <= 1 or getattr(_worker_state, 'in_pipeline', False):
+        return [call() for call in calls]
+    
+    if inline_first:
+        futures = [get_executor().submit(_tagged(call)) for call in calls[1:]]
+        first = calls[0]()
+        return [first] + [future.result() for future in futures]
+    futures = [get_executor().submit(_tagged(call)) for call in calls]
+    return [future.result() for future in futures]
+
+
+def run_bounded(function: Callable, items: Iterable, max_in_flight: int) -> Iterator:
+    """
+    Apply function to items on the shared executor, yielding results in order
+    Items are drawn lazily and at most max_in_flight are submitted at once,
+    so long inputs (e.g. the pages of a statement) run with bounded memory.
+    Like run_concurrently, calls from a pipeline thread run inline
+    """
+    if max_in_flight <= 1 or getattr(_worker_state, 'in_pipeline', False):
+        for item in items:
+            yield function(item)
+        return
+    
+    function = _tagged(function)
+    pending = deque()
+    for item in items:
+        pending.append(get_executor().submit(function, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
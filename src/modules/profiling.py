@@ -0,0 +1,261 @@
+"""
+Profiling Module
+On-demand cProfile or stack-sampling captures of selected and slow requests
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import cProfile
+import glob
+import hmac
+import json
+import logging
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from .pipeline import set_task_tag, tagged_threads
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Request header whose value (the admin token) asks for a profile of that request
+PROFILE_HEADER = 'X-Profile'
+ADMIN_HEADER = 'X-Admin-Token'
+
+# cProfile cannot run in two threads at once on every Python version, so
+# concurrent captures fall back to stack sampling
+_cprofile_lock = threading.Lock()
+
+
+def check_token(expected: Optional[str], given: Optional[str]) -> bool:
+    """Constant-time token check; nothing matches when no token is configured"""
+    return bool(expected) and bool(given) and hmac.compare_digest(expected, given)
+
+
+class StackSampler:
+    """
+    Samples the stacks of one thread, and of the pipeline threads running
+    tasks it submitted under tag, every interval seconds from a background
+    thread. Idle pool threads and tasks of other requests are not sampled
+    Output is in collapsed-stack format (one "frame;frame;... count" line
+    per distinct stack), as read by flamegraph.pl and speedscope
+    """
+    
+    def __init__(self, thread_id: int, interval: float = 0.005, tag: str = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.tag = tag
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks"""
+        self._stop.set()
+        self._thread.join()
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            # Stacks are rooted at 'request' or 'pipeline' for its tasks
+            threads = {self.thread_id: 'request'}
+            if self.tag is not None:
+                for ident in tagged_threads(self.tag):
+                    threads.setdefault(ident, 'pipeline')
+            for ident, root in threads.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples[self.collapse(root, frame)] += 1
+    
+    @staticmethod
+    def collapse(root: str, frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join([root] + stack[::-1])
+
+
+class ProfileCapture:
+    """One profiling session around a request or job, started on the calling thread"""
+    
+    def __init__(self, mode: str, reason: str, sampling_interval: float = 0.005):
+        self.reason = reason
+        self.started_at = time.perf_counter()
+        if mode == 'cprofile':
+            mode = 'sampling'
+            if _cprofile_lock.acquire(blocking=False):
+                try:
+                    self._profile = cProfile.Profile()
+                    self._profile.enable()
+                    mode = 'cprofile'
+                except ValueError:
+                    # Another profiler (e.g. a debugger) is active
+                    _cprofile_lock.release()
+        self.mode = mode
+        if mode == 'sampling':
+            # Pipeline tasks submitted from this thread carry the tag, so
+            # the sampler can follow them onto pool threads
+            self.tag = uuid.uuid4().hex
+            self._previous_tag = set_task_tag(self.tag)
+            self._sampler = StackSampler(threading.get_ident(), sampling_interval, self.tag)
+            self._sampler.start()
+    
+    def stop(self) -> Tuple[bytes, str]:
+        """Stop capturing; returns the profile data and its file extension"""
+        if self.mode == 'cprofile':
+            try:
+                self._profile.disable()
+                self._profile.create_stats()
+                return marshal.dumps(self._profile.stats), 'prof'
+            finally:
+                _cprofile_lock.release()
+        try:
+            return self._sampler.stop().encode('utf-8'), 'txt'
+        finally:
+            set_task_tag(self._previous_tag)
+    
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+
+class ProfileStore:
+    """
+    Captured profiles in folder, kept as a ring buffer
+    Each profile is <id>.prof (pstats) or <id>.txt (collapsed stacks) with
+    an <id>.json metadata file; the oldest are deleted once there are more
+    than max_profiles or they take more than max_bytes
+    """
+    
+    def __init__(self, folder: str, max_profiles: int = 50, max_bytes: int = 64 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+    
+    def save(self, data: bytes, extension: str, metadata: Dict) -> str:
+        """Store a profile and return its id"""
+        profile_id = f"prof_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        metadata = {
+            'id': profile_id,
+            'file': f"{profile_id}.{extension}",
+            'size': len(data),
+            'created_at': datetime.now().isoformat(),
+            **metadata
+        }
+        with self._lock:
+            with open(os.path.join(self.folder, metadata['file']), 'wb') as f:
+                f.write(data)
+            with open(os.path.join(self.folder, f"{profile_id}.json"), 'w') as f:
+                json.dump(metadata, f, default=str)
+            self._evict()
+        return profile_id
+    
+    def list(self) -> List[Dict]:
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for path in glob.glob(os.path.join(self.folder, 'prof_*.json')):
+            try:
+                with open(path) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda profile: profile['created_at'], reverse=True)
+    
+    def get(self, profile_id: str) -> Optional[Dict]:
+        """Metadata of one profile, with the 'path' of its data file"""
+        for profile in self.list():
+            if profile['id'] == profile_id:
+                return {**profile, 'path': os.path.join(self.folder, profile['file'])}
+        return None
+    
+    def _evict(self):
+        profiles = self.list()
+        total = sum(profile['size'] for profile in profiles)
+        while profiles and (len(profiles) > self.max_profiles or total > self.max_bytes):
+            oldest = profiles.pop()
+            total -= oldest['size']
+            for name in (oldest['file'], f"{oldest['id']}.json"):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError as e:
+                    self.logger.warning(f"Failed to remove profile {name}: {str(e)}")
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and stores their captures
+    A request is profiled with the configured mode when it carries the
+    admin token in PROFILE_HEADER, or at random with sample_rate. With a
+    latency_threshold_ms every other request is stack-sampled and kept
+    only if it took at least that long (cProfile is too costly to run on
+    every request). When disabled the app creates no profiler at all
+    """
+    
+    def __init__(self, store: ProfileStore, admin_token: str = None, mode: str = 'cprofile',
+                 sample_rate: float = 0.0, latency_threshold_ms: float = None,
+                 sampling_interval_ms: float = 5.0):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.admin_token = admin_token
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.latency_threshold_ms = latency_threshold_ms
+        self.sampling_interval = sampling_interval_ms / 1000
+    
+    def select(self, header_value: str = None) -> Optional[str]:
+        """Why this request should be profiled ('header' or 'sampled'), or None"""
+        if check_token(self.admin_token, header_value):
+            return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+    
+    def begin(self, reason: str = None) -> Optional[ProfileCapture]:
+        """Start a capture for a selected request, or a latency watch when configured"""
+        if reason:
+            return ProfileCapture(self.mode, reason, self.sampling_interval)
+        if self.latency_threshold_ms is not None:
+            return ProfileCapture('sampling', 'latency', self.sampling_interval)
+        return None
+    
+    def finish(self, capture: ProfileCapture, metadata: Union[Dict, Callable[[], Dict]]) -> Optional[str]:
+        """
+        Stop a capture and store it, unless it was a latency watch that ran fast
+        metadata may be a callable, evaluated only for captures that are kept
+        """
+        elapsed_ms = capture.elapsed_ms
+        try:
+            data, extension = capture.stop()
+        except Exception as e:
+            self.logger.error(f"Profile capture failed: {str(e)}")
+            return None
+        if capture.reason == 'latency' and elapsed_ms < self.latency_threshold_ms:
+            return None
+        if callable(metadata):
+            try:
+                metadata = metadata()
+            except Exception as e:
+                metadata = {'metadata_error': str(e)}
+        return self.store.save(data, extension, {
+            'reason': capture.reason,
+            'mode': capture.mode,
+            'elapsed_ms': round(elapsed_ms, 2),
+            **metadata
+        })
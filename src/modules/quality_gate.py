@@ -0,0 +1,281 @@
+"""
+Quality Gating Module
+Early-exit admission of documents before enhancement and OCR
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, List, Union
+import logging
+import time
+
+from .document_processor import DocumentQualityAssessor
+from .document_source import probe_document
+from .image_io import ImageSource, check_image_budget, is_buffer, read_image
+from .metrics import instrumented
+from .pipeline import run_concurrently
+
+# Pipeline stages that follow each gate stage, in order
+DECODE_STAGES = ['decode', 'admission']
+ASSESSMENT_STAGES = ['rotation', 'blur']
+DOWNSTREAM_STAGES = ['enhancement', 'ocr']
+
+
+@instrumented
+class QualityGate:
+    """
+    Staged quality gate driven by Config.quality_thresholds
+    
+    Stage 0 (probe): file size and pixel budget from the image header,
+    before any pixel data is decoded (path inputs only)
+    Stage 1 (admission): DPI from the image dimensions, brightness and
+    contrast on a thumbnail - milliseconds per document
+    Stage 2 (assessment): the full DocumentQualityAssessor metrics
+    A document is rejected as soon as any metric listed in the policy's
+    reject_on breaches its hard limit; later stages are then skipped
+    
+    Multi-page documents and PDFs pass stage 0 as a whole; stages 1 and
+    2 run on each page as it is decoded (evaluate on the page image), and
+    aggregate_pages combines the page results
+    """
+    
+    def __init__(self, quality_thresholds: Dict, policy: Dict = None,
+                 assessor: DocumentQualityAssessor = None, image_limits: Dict = None,
+                 pdf_dpi: int = 200):
+        self.logger = logging.getLogger(__name__)
+        self.thresholds = quality_thresholds
+        self.image_limits = image_limits or {}
+        self.pdf_dpi = pdf_dpi
+        self.policy = {
+            'enabled': True,
+            'thumbnail_max_dimension': 256,
+            'reject_on': ['dpi', 'blur', 'brightness']
+        }
+        self.policy.update(policy or {})
+        self.assessor = assessor or DocumentQualityAssessor()
+    
+    def check_metric(self, name: str, metric: Dict) -> str:
+        """
+        Return a rejection reason if the metric breaches its hard limit
+        Blur limits apply to the sharpness score reported as 'blur', where
+        'max' marks the severe-blur boundary. Brightness rejects pages below
+        'min' or above 'saturated'; its 'max' is advisory only, because
+        clean scans of white paper are brighter than that
+        """
+        limits = self.thresholds.get(name)
+        if not limits or name not in self.policy['reject_on']:
+            return None
+        
+        if name == 'dpi' and metric['dpi'] < limits['min']:
+            return f"dpi: {metric['dpi']} below minimum {limits['min']}"
+        if name == 'contrast' and metric['contrast'] < limits['min']:
+            return f"contrast: {metric['contrast']}% below minimum {limits['min']}%"
+        if name == 'rotation' and metric['rotation'] > limits['max']:
+            return f"rotation: {metric['rotation']}° above maximum {limits['max']}°"
+        if name == 'blur' and metric['blur'] <= limits['max']:
+            return f"blur: {metric['blur']}% sharpness at or below {limits['max']}%"
+        if name == 'brightness' and metric['brightness'] < limits['min']:
+            return f"brightness: {metric['brightness']} below minimum {limits['min']} (under-exposed)"
+        if name == 'brightness' and metric['brightness'] > limits.get('saturated', 255):
+            return f"brightness: {metric['brightness']} above {limits.get('saturated', 255)} (saturated)"
+        return None
+    
+    def run_probe(self, image_path: ImageSource) -> Dict:
+        """
+        Stage 0: header-only probe against the size and pixel budget
+        image_path may also be the file contents in memory. The probed
+        metadata is kept on the result for later stages
+        """
+        start = time.perf_counter()
+        metadata = probe_document(image_path, self.pdf_dpi)
+        reasons = check_image_budget(metadata, self.image_limits.get('max_file_bytes'),
+                                     self.image_limits.get('max_pixels'),
+                                     self.image_limits.get('max_pages'))
+        quality = {'success': not reasons, 'score': 0}
+        if reasons:
+            quality['error'] = reasons[0]
+            result = self._result('REJECT', 'probe', reasons, quality,
+                                  DECODE_STAGES + ASSESSMENT_STAGES + DOWNSTREAM_STAGES, start)
+        else:
+            result = self._result('PASS', 'probe', [], quality, [], start)
+        result['metadata'] = metadata
+        if metadata.get('environment_error'):
+            # Says nothing about the document, so must not be cached for it
+            result['environment_error'] = True
+        return result
+    
+    def run_admission(self, image: np.ndarray, metadata: Dict = None) -> Dict:
+        """
+        Stage 1: cheap checks on dimensions and a thumbnail
+        metadata from run_probe supplies the declared DPI when present
+        Returns a gate result with decision PASS or REJECT
+        """
+        start = time.perf_counter()
+        declared_dpi = (metadata or {}).get('dpi')
+        
+        if image is None:
+            return self._result('REJECT', 'admission', ['Failed to load image'],
+                                {'success': False, 'error': 'Failed to load image', 'score': 0},
+                                ASSESSMENT_STAGES + DOWNSTREAM_STAGES, start)
+        
+        h, w = image.shape[:2]
+        scale = self.policy['thumbnail_max_dimension'] / max(h, w)
+        thumbnail = image
+        if scale < 1:
+            thumbnail = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        metrics = {
+            'dpi': self.assessor.assess_dpi(image, declared_dpi=declared_dpi),
+            'contrast': self.assessor.assess_contrast(thumbnail),
+            'brightness': self.assessor.assess_brightness(thumbnail)
+        }
+        score = self.assessor.get_quality_score(metrics)
+        quality = {
+            'success': True,
+            'partial': True,
+            'score': score,
+            'level': self.assessor.get_quality_level(score),
+            'metrics': metrics
+        }
+        
+        reasons = self._reasons(metrics)
+        if reasons:
+            return self._result('REJECT', 'admission', reasons, quality,
+                                ASSESSMENT_STAGES + DOWNSTREAM_STAGES, start)
+        return self._result('PASS', 'admission', [], quality, [], start)
+    
+    def run_assessment(self, image: np.ndarray, admission: Dict) -> Dict:
+        """
+        Stage 2: full quality assessment for documents that passed admission
+        """
+        start = time.perf_counter()
+        declared_dpi = admission.get('metadata', {}).get('dpi')
+        quality = self.assessor.assess_image_quality(image, declared_dpi=declared_dpi)
+        
+        if not quality.get('success'):
+            result = self._result('REJECT', 'assessment', [quality.get('error', 'Assessment failed')],
+                                  quality, DOWNSTREAM_STAGES, start)
+        else:
+            reasons = self._reasons(quality['metrics'])
+            decision = 'REJECT' if reasons else 'PASS'
+            result = self._result(decision, 'assessment', reasons, quality,
+                                  DOWNSTREAM_STAGES if reasons else [], start)
+        
+        return self._carry_forward(admission, result)
+    
+    def evaluate(self, source: Union[ImageSource, np.ndarray]) -> Dict:
+        """Run all stages on a single document, stopping at the first rejection"""
+        return self.evaluate_documents([source])[0]
+    
+    def evaluate_documents(self, sources: List[Union[ImageSource, np.ndarray]]) -> List[Dict]:
+        """
+        Gate documents that are verified together
+        Sources are image paths or in-memory file contents (both probed
+        before decoding) or decoded images.
+        Each stage runs on all documents concurrently on the shared pipeline
+        executor before the next stage starts, and the pipeline stops after
+        the first stage with a rejection because the outcome of the
+        verification is then determined
+        """
+        probes = run_concurrently([
+            (lambda source=source:
+             self.run_probe(source) if isinstance(source, str) or is_buffer(source) else None)
+            for source in sources
+        ])
+        if any(probe and probe['decision'] == 'REJECT' for probe in probes):
+            results = []
+            for probe in probes:
+                if probe is None:
+                    probe = self._result('PASS', 'probe', [], {'success': True, 'score': 0}, [],
+                                         time.perf_counter())
+                probe['skipped_stages'] = DECODE_STAGES + ASSESSMENT_STAGES + DOWNSTREAM_STAGES
+                results.append(probe)
+            return results
+        
+        def admit(source, probe):
+            metadata = probe['metadata'] if probe else {}
+            if metadata.get('pages', 1) > 1 or metadata.get('format') == 'PDF':
+                return None, probe  # Gated page by page
+            image = read_image(source)
+            admission = self.run_admission(image, probe['metadata'] if probe else None)
+            return image, self._carry_forward(probe, admission) if probe else admission
+        
+        admitted = run_concurrently([
+            (lambda source=source, probe=probe: admit(source, probe))
+            for source, probe in zip(sources, probes)
+        ])
+        images = [image for image, _ in admitted]
+        results = [result for _, result in admitted]
+        
+        if any(result['decision'] == 'REJECT' for result in results):
+            for result in results:
+                result['skipped_stages'] = ASSESSMENT_STAGES + DOWNSTREAM_STAGES
+            return results
+        
+        results = run_concurrently([
+            (lambda image=image, admission=admission:
+             admission if admission['stage'] == 'probe' else self.run_assessment(image, admission))
+            for image, admission in zip(images, results)
+        ])
+        if any(result['decision'] == 'REJECT' for result in results):
+            for result in results:
+                result['skipped_stages'] = list(DOWNSTREAM_STAGES)
+        return results
+    
+    def aggregate_pages(self, page_results: List[Dict]) -> Dict:
+        """
+        Document gate result from the gate results of its pages
+        Rejected pages are reported but only reject the document when no
+        page passes; quality is that of the lowest-scoring accepted page,
+        with every page's score under 'pages'
+        """
+        start = time.perf_counter()
+        accepted = [result for result in page_results if result['decision'] != 'REJECT']
+        rejected = [(page, result) for page, result in enumerate(page_results, start=1)
+                    if result['decision'] == 'REJECT']
+        reasons = [f"page {page}: {reason}" for page, result in rejected for reason in result['reasons']]
+        
+        candidates = accepted or page_results
+        worst = min(candidates, key=lambda result: result['quality'].get('score', 0)) if candidates else None
+        quality = dict(worst['quality']) if worst else {'success': False, 'error': 'No pages', 'score': 0}
+        quality['pages'] = [result['quality'].get('score', 0) for result in page_results]
+        
+        if accepted:
+            result = self._result('PASS', 'pages', [], quality, [], start)
+        else:
+            result = self._result('REJECT', 'pages', reasons or ['No pages'], quality,
+                                  list(DOWNSTREAM_STAGES), start)
+        result['rejected_pages'] = [page for page, _ in rejected]
+        result['page_reasons'] = reasons
+        for page_result in page_results:
+            for stage, ms in page_result.get('timings_ms', {}).items():
+                result['timings_ms'][stage] = round(result['timings_ms'].get(stage, 0) + ms, 2)
+        return result
+    
+    def _carry_forward(self, previous: Dict, result: Dict) -> Dict:
+        """Merge timings and probed metadata from an earlier stage"""
+        result['timings_ms'] = {**previous.get('timings_ms', {}), **result['timings_ms']}
+        if 'metadata' in previous:
+            result['metadata'] = previous['metadata']
+        return result
+    
+    def _reasons(self, metrics: Dict) -> List[str]:
+        if not self.policy['enabled']:
+            return []
+        reasons = []
+        for name, metric in metrics.items():
+            reason = self.check_metric(name, metric)
+            if reason:
+                reasons.append(reason)
+        return reasons
+    
+    def _result(self, decision: str, stage: str, reasons: List[str], quality: Dict,
+                skipped_stages: List[str], start: float) -> Dict:
+        return {
+            'decision': decision,
+            'stage': stage,
+            'reasons': reasons,
+            'skipped_stages': list(skipped_stages),
+            'quality': quality,
+            'timings_ms': {stage: round((time.perf_counter() - start) * 1000, 2)}
+        }
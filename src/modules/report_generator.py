@@ -7,6 +7,9 @@ from typing import Dict, List
 import json
 import logging
 
+from .metrics import instrumented
+
+@instrumented
 class ReportGenerator:
     """
     Generates external and internal reports
@@ -0,0 +1,150 @@
+"""
+Result Cache Module
+Content-addressed persistence of quality assessment and OCR outputs
+"""
+
+import cv2
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+import hashlib
+import json
+import logging
+import threading
+
+from .metrics import instrumented
+from .ocr_results import OCRWords
+
+# Bump whenever quality assessment, enhancement or OCR output changes so
+# results computed by an older pipeline are no longer served
+PIPELINE_VERSION = '6'
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def buffer_digest(data) -> str:
+    """SHA-256 of file contents already in memory; matches file_digest"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def pipeline_fingerprint(*settings: Dict) -> str:
+    """
+    Fingerprint of the pipeline version, OpenCV build and the settings
+    that shape its output (thresholds, gate policy, assessment options)
+    """
+    payload = json.dumps([PIPELINE_VERSION, cv2.__version__, *settings],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, OCRWords):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@instrumented
+class ResultCache:
+    """
+    Persistent cache of per-document pipeline results
+    Entries live in the database's result_cache table, keyed by the
+    SHA-256 of the file bytes, the pipeline fingerprint and the result
+    kind ('quality', 'ocr'), so re-uploads of the same document skip
+    assessment, enhancement and Tesseract entirely
+    """
+    
+    def __init__(self, database, fingerprint: str, enabled: bool = True, max_age_days: int = 30,
+                 max_bytes: int = 64 * 1024 * 1024, evict_every: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.db = database
+        self.enabled = enabled
+        self.fingerprint = fingerprint
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        # Shared by the pipeline threads and the job workers
+        self._lock = threading.Lock()
+    
+    def get(self, digest: str, kind: str) -> Dict:
+        """Return the cached result, or None on a miss"""
+        if not self.enabled:
+            return None
+        
+        try:
+            payload = self.db.get_cached_result(digest, self.fingerprint, kind)
+        except Exception as e:
+            self.logger.error(f"Result cache read failed: {str(e)}")
+            payload = None
+        
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if payload is None:
+            return None
+        return json.loads(payload)
+    
+    def put(self, digest: str, kind: str, result: Dict):
+        """Store a result; eviction runs every evict_every writes"""
+        if not self.enabled:
+            return
+        
+        try:
+            payload = json.dumps(result, default=json_default)
+            self.db.save_cached_result(digest, self.fingerprint, kind, payload)
+            with self._lock:
+                self._writes += 1
+                due = self._writes % self.evict_every == 0
+            if due:
+                self.evict()
+        except Exception as e:
+            self.logger.error(f"Result cache write failed: {str(e)}")
+    
+    def get_or_compute(self, digest: str, kind: str, compute: Callable[[], Dict]) -> Dict:
+        """
+        Return the cached result or compute and store it
+        Unsuccessful results are returned but not cached
+        """
+        result = self.get(digest, kind)
+        if result is not None:
+            return result
+        
+        result = compute()
+        if result.get('success', True):
+            self.put(digest, kind, result)
+        return result
+    
+    def evict(self) -> int:
+        """Remove entries past max_age_days, then beyond max_bytes"""
+        older_than = None
+        if self.max_age_days:
+            older_than = (datetime.utcnow() - timedelta(days=self.max_age_days)).isoformat()
+        return self.db.evict_cached_results(older_than, self.max_bytes)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            **self.db.get_result_cache_usage()
+        }
@@ -0,0 +1,340 @@
+"""
+Verification Module
+The quality -> enhance -> OCR -> mismatch -> risk pipeline for a document pair,
+shared by the web UI, background jobs and the batch CLI
+"""
+
+import numpy as np
+from datetime import datetime
+from typing import Dict, List
+import logging
+import time
+import uuid
+
+from .audit_trail import AuditTrail
+from .document_processor import DocumentQualityAssessor, DocumentEnhancer, OCRExtractor
+from .document_source import DocumentSource
+from .metrics import instrumented
+from .mismatch_detector import MismatchDetector, RiskAssessor
+from .ocr_engine import create_ocr_backend
+from .ocr_results import OCRWords
+from .pipeline import run_bounded, run_concurrently
+from .quality_gate import QualityGate
+from .result_cache import ResultCache, buffer_digest, pipeline_fingerprint
+
+
+def new_verification_id() -> str:
+    """Timestamped id with a random suffix, unique across concurrent workers"""
+    return f"ver_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def read_document(path: str) -> Dict:
+    """A stored document loaded into memory once, in the VerificationPipeline.verify format"""
+    with open(path, 'rb') as f:
+        contents = f.read()
+    return {'path': path, 'contents': contents, 'digest': buffer_digest(contents)}
+
+
+def gate_summary(gate_result: Dict) -> Dict:
+    """Quality gate outcome without the nested quality metrics"""
+    return {key: value for key, value in gate_result.items() if key != 'quality'}
+
+
+def create_verification_pipeline(config, database, audit_trail: AuditTrail = None) -> 'VerificationPipeline':
+    """
+    Verification pipeline with the configured OCR backend and a result
+    cache keyed by every setting that changes results
+    The web UI and the batch CLI both build their pipeline here, so they
+    share cache entries
+    """
+    ocr_backend = create_ocr_backend(**config.ocr)
+    result_cache = ResultCache(
+        database,
+        pipeline_fingerprint(config.quality_thresholds, config.quality_gate,
+                             config.quality_assessment, config.image_limits, config.enhancement,
+                             config.text_regions, config.documents, ocr_backend.name),
+        **config.result_cache
+    )
+    return VerificationPipeline(config, database, result_cache, ocr_backend,
+                                audit_trail or AuditTrail(config.audit_folder))
+
+
+@instrumented
+class VerificationPipeline:
+    """
+    Verifies document pairs with the configured gate, enhancement and OCR
+    Quality and OCR results are served from result_cache for documents
+    seen before. verify() records each verification (database and audit
+    trail) unless record=False, in which case record() can store many at
+    once, as the batch CLI does
+    """
+    
+    def __init__(self, config, database, result_cache, ocr_backend, audit_trail):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.db = database
+        self.result_cache = result_cache
+        self.ocr_backend = ocr_backend
+        self.audit_trail = audit_trail
+    
+    def verify(self, doc1: Dict, doc2: Dict, verification_id: str = None, record: bool = True) -> Dict:
+        """
+        Verify two documents held in memory
+        Each document is a dict with its stored 'path', the file 'contents'
+        and their 'digest'. Every stage decodes from the contents, so nothing
+        is read back from disk; paths are only recorded
+        Returns the result.html context, with per-stage 'timings_ms'
+        """
+        config = self.config
+        doc1_path, doc2_path = doc1['path'], doc2['path']
+        timings = {}
+        start = time.perf_counter()
+        
+        # Staged quality gate: cheap checks on both documents first, full
+        # assessment only if both pass, enhancement and OCR only if
+        # nothing was rejected. Documents run concurrently within each stage
+        assessor = DocumentQualityAssessor(**config.quality_assessment)
+        gate = QualityGate(config.quality_thresholds, config.quality_gate, assessor,
+                           config.image_limits, config.documents['pdf_dpi'])
+        digests = [doc1['digest'], doc2['digest']]
+        gate1, gate2 = self.gate_documents(gate, [doc1['contents'], doc2['contents']], digests)
+        quality1 = gate1['quality']
+        quality2 = gate2['quality']
+        start = self._lap(timings, 'gate', start)
+        
+        if 'REJECT' in (gate1['decision'], gate2['decision']):
+            return self._rejected(doc1_path, doc2_path, gate1, gate2, verification_id, record, timings)
+        
+        # Enhancement, OCR and field extraction, one chain per document, run
+        # concurrently (served from the result cache for known documents).
+        # Multi-page documents also fan their pages out on the executor
+        enhancer = DocumentEnhancer(config.quality_thresholds, config.enhancement)
+        ocr = OCRExtractor(self.ocr_backend)
+        sources = [DocumentSource(doc1['contents'], config.documents['pdf_dpi']),
+                   DocumentSource(doc2['contents'], config.documents['pdf_dpi'])]
+        
+        calls = [
+            (lambda source=source, digest=digest, quality=quality:
+             self.extract_pages(gate, enhancer, ocr, source, digest) if source.is_multi_page
+             else self.extract_document(enhancer, ocr, source.path, digest, quality))
+            for source, digest, quality in zip(sources, digests, (quality1, quality2))
+        ]
+        # A multi-page document is extracted on this thread, so its pages
+        # still fan out on the executor while the other document runs there
+        if sources[1].is_multi_page and not sources[0].is_multi_page:
+            extraction2, extraction1 = run_concurrently(calls[::-1], inline_first=True)
+        else:
+            extraction1, extraction2 = run_concurrently(calls, inline_first=True)
+        start = self._lap(timings, 'extraction', start)
+        
+        # Multi-page documents are gated page by page during extraction
+        if sources[0].is_multi_page:
+            gate1, quality1 = extraction1['gate'], extraction1['gate']['quality']
+        if sources[1].is_multi_page:
+            gate2, quality2 = extraction2['gate'], extraction2['gate']['quality']
+        if 'REJECT' in (gate1['decision'], gate2['decision']):
+            return self._rejected(doc1_path, doc2_path, gate1, gate2, verification_id, record, timings)
+        
+        structured1 = extraction1['structured']
+        structured2 = extraction2['structured']
+        
+        # Mismatch detection
+        detector = MismatchDetector()
+        mismatches = detector.detect_mismatches(
+            structured1.get('fields', {}),
+            structured2.get('fields', {})
+        )
+        start = self._lap(timings, 'mismatch', start)
+        
+        # Risk assessment
+        risk_assessor = RiskAssessor()
+        risk_result = risk_assessor.assess_risk_tier(
+            mismatches,
+            min(quality1.get('score', 0), quality2.get('score', 0))
+        )
+        self._lap(timings, 'risk', start)
+        
+        verification = {
+            'id': verification_id or new_verification_id(),
+            'customer_id': 'customer_123',  # Would come from session/user
+            'document_paths': [doc1_path, doc2_path],
+            'extracted_data': {
+                'doc1': structured1,
+                'doc2': structured2,
+                'quality_gate': {'doc1': gate_summary(gate1), 'doc2': gate_summary(gate2)},
+                'enhancement': {'doc1': extraction1['enhancement'], 'doc2': extraction2['enhancement']}
+            },
+            'quality_score': min(quality1.get('score', 0), quality2.get('score', 0)),
+            'risk_tier': risk_result['tier'],
+            'decision': risk_result['decision'],
+            'created_at': datetime.now().isoformat()
+        }
+        
+        context = {
+            'verification': verification,
+            'quality1': quality1,
+            'quality2': quality2,
+            'mismatches': mismatches,
+            'risk': risk_result,
+            'gate': [gate1, gate2],
+            'audit': {'decision': risk_result['decision'], 'risk_tier': risk_result['tier']},
+            'timings_ms': timings
+        }
+        if record:
+            self.record([context])
+        return context
+    
+    def record(self, contexts: List[Dict]):
+        """Save verifications in one database transaction and log them to the audit trail"""
+        start = time.perf_counter()
+        self.db.save_verifications([context['verification'] for context in contexts])
+        for context in contexts:
+            self.audit_trail.log_event('verification', context['verification']['id'], 'CREATED',
+                                       context['audit'])
+        elapsed = (time.perf_counter() - start) * 1000 / max(1, len(contexts))
+        for context in contexts:
+            context['timings_ms']['record'] = round(elapsed, 2)
+    
+    def gate_documents(self, gate: QualityGate, sources: List, digests: List[str]) -> List[Dict]:
+        """
+        Quality gate results, from the result cache when every document is known
+        Only outcomes that depend on the document alone are cached: a full
+        assessment, or a rejection of that document itself. Failures of the
+        environment (a missing PDF renderer, an unreadable file) are not
+        """
+        cached = [self.result_cache.get(digest, 'quality') for digest in digests]
+        if all(cached):
+            return cached
+        
+        results = gate.evaluate_documents(sources)
+        for digest, gate_result in zip(digests, results):
+            if gate_result.get('environment_error'):
+                continue
+            if gate_result['stage'] == 'assessment' or gate_result['decision'] == 'REJECT':
+                self.result_cache.put(digest, 'quality', gate_result)
+        return results
+    
+    def extract_document(self, enhancer: DocumentEnhancer, ocr: OCRExtractor, contents,
+                         digest: str, quality: Dict) -> Dict:
+        """
+        Enhance and OCR one document, reusing cached output for identical files
+        Enhancement runs only the stages the gate's quality metrics call for,
+        on the single grayscale channel Tesseract reads
+        """
+        def run_ocr():
+            enhanced, _, report = enhancer.enhance_adaptive(contents, quality.get('metrics', {}),
+                                                            grayscale=True)
+            extracted = self.ocr_image(ocr, enhanced)
+            return {
+                'success': extracted.get('success', False),
+                'enhancement': report,
+                'extracted': extracted,
+                'structured': ocr.extract_structured_data(enhanced, extracted)
+            }
+        return self._restore_words(self.result_cache.get_or_compute(digest, 'ocr', run_ocr))
+    
+    def extract_pages(self, gate: QualityGate, enhancer: DocumentEnhancer, ocr: OCRExtractor,
+                      source: DocumentSource, digest: str) -> Dict:
+        """
+        Gate, enhance and OCR a multi-page document one page at a time
+        Pages are decoded lazily with at most config.documents['pages_in_flight']
+        in memory; rejected pages are skipped, and words from all pages are
+        combined (with a 'page' column) before field extraction
+        """
+        def run_page(page):
+            index, image = page
+            gate_result = gate.evaluate(image)
+            result = {'gate': gate_result, 'enhancement': None, 'words': OCRWords(), 'success': True}
+            if gate_result['decision'] == 'REJECT':
+                return result
+            enhanced, _, report = enhancer.enhance_adaptive(image, gate_result['quality'].get('metrics', {}),
+                                                            grayscale=True)
+            extracted = self.ocr_image(ocr, enhanced)
+            words = extracted['extractions']
+            words.columns['page'] = np.full(len(words), index + 1, dtype=np.int16)
+            result.update(enhancement=report, words=words, success=extracted['success'])
+            return result
+        
+        def run_ocr():
+            pages = list(run_bounded(run_page, source.pages(), self.config.documents['pages_in_flight']))
+            words = OCRWords.concatenate([page['words'] for page in pages])
+            extracted = {
+                'success': all(page['success'] for page in pages),
+                'extractions': words,
+                'overall_confidence': words.mean_confidence(),
+                'pages': len(pages)
+            }
+            return {
+                'success': extracted['success'],
+                'gate': gate.aggregate_pages([page['gate'] for page in pages]),
+                'enhancement': {'pages': [page['enhancement'] for page in pages]},
+                'extracted': extracted,
+                'structured': ocr.extract_structured_data(None, extracted)
+            }
+        return self._restore_words(self.result_cache.get_or_compute(digest, 'ocr', run_ocr))
+    
+    def ocr_image(self, ocr: OCRExtractor, enhanced: np.ndarray) -> Dict:
+        """Crop-level or whole-page OCR of an enhanced image, per config.text_regions"""
+        text_regions = self.config.text_regions
+        if text_regions['enabled']:
+            return ocr.extract_text_by_regions(enhanced,
+                                               max_workers=text_regions['workers'],
+                                               max_coverage=text_regions['max_coverage'])
+        return ocr.extract_text_with_confidence(enhanced)
+    
+    def _restore_words(self, result: Dict) -> Dict:
+        """Rebuild columnar OCR words in a result served from the cache"""
+        extractions = result['extracted'].get('extractions')
+        if OCRWords.is_serialized(extractions):
+            result['extracted']['extractions'] = OCRWords.from_json(extractions)
+        return result
+    
+    def _rejected(self, doc1_path: str, doc2_path: str, gate1: Dict, gate2: Dict,
+                  verification_id: str, record: bool, timings: Dict) -> Dict:
+        """Verification rejected by the quality gate; returns the result.html context"""
+        reasons = [f"Document {index}: {reason}"
+                   for index, gate_result in enumerate((gate1, gate2), start=1)
+                   for reason in gate_result['reasons']]
+        risk_result = {
+            'tier': 3,
+            'confidence': 1.0,
+            'reasoning': 'Rejected by quality gate - ' + '; '.join(reasons),
+            'red_flags': 0,
+            'yellow_flags': 0,
+            'green_matches': 0,
+            'decision': 'REJECT',
+            'mismatches': []
+        }
+        
+        verification = {
+            'id': verification_id or new_verification_id(),
+            'customer_id': 'customer_123',  # Would come from session/user
+            'document_paths': [doc1_path, doc2_path],
+            'extracted_data': {
+                'quality_gate': {'doc1': gate_summary(gate1), 'doc2': gate_summary(gate2)}
+            },
+            'quality_score': min(gate1['quality'].get('score', 0), gate2['quality'].get('score', 0)),
+            'risk_tier': risk_result['tier'],
+            'decision': risk_result['decision'],
+            'created_at': datetime.now().isoformat()
+        }
+        
+        context = {
+            'verification': verification,
+            'quality1': gate1['quality'],
+            'quality2': gate2['quality'],
+            'mismatches': [],
+            'risk': risk_result,
+            'gate': [gate1, gate2],
+            'audit': {'decision': risk_result['decision'], 'risk_tier': risk_result['tier'],
+                      'quality_gate': reasons},
+            'timings_ms': timings
+        }
+        if record:
+            self.record([context])
+        return context
+    
+    def _lap(self, timings: Dict, stage: str, start: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = round((now - start) * 1000, 2)
+        return now
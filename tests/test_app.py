@@ -0,0 +1,185 @@
+"""
+Route tests for the Flask UI Application
+"""
+
+import unittest
+import importlib
+import io
+import os
+import sys
+import tempfile
+from unittest import mock
+import numpy as np
+from PIL import Image
+from main import create_pipeline
+from modules.metrics import configure_metrics
+from modules.profiling import ADMIN_HEADER, ProfileStore, RequestProfiler
+
+UI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ui')
+
+def png_bytes(width: int, height: int, value: int = 235) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((height, width, 3), value, dtype=np.uint8)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+class FakePipeline:
+    """Records the documents it verifies and returns a minimal result.html context"""
+    
+    def __init__(self):
+        self.documents = []
+        self.error = None
+    
+    def verify(self, doc1, doc2):
+        if self.error:
+            raise RuntimeError(self.error)
+        self.documents.append((doc1, doc2))
+        return {
+            'verification': {'id': 'ver_route_test', 'decision': 'APPROVE', 'risk_tier': 1,
+                             'quality_score': 80},
+            'quality1': {'score': 80, 'level': 'GOOD'},
+            'quality2': {'score': 82, 'level': 'GOOD'},
+            'mismatches': [],
+            'risk': {'tier': 1, 'decision': 'APPROVE', 'confidence': 90, 'reasoning': 'No mismatches',
+                     'red_flags': 0, 'yellow_flags': 0},
+            'gate': [],
+            'timings_ms': {'gate': 1.0}
+        }
+
+class TestApp(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        # The app keeps its database, uploads and metrics under ./data
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.tmp_dir.name)
+        sys.path.insert(0, UI_DIR)
+        cls.app_module = importlib.import_module('app')
+        # Jobs are run explicitly with run_once instead of by the worker threads
+        cls.app_module.verification_workers.stop()
+        cls.client = cls.app_module.app.test_client()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.app_module.db.close()
+        os.chdir(cls.cwd)
+        sys.path.remove(UI_DIR)
+        configure_metrics()
+        cls.tmp_dir.cleanup()
+    
+    def setUp(self):
+        self.pipeline = FakePipeline()
+        patcher = mock.patch.object(self.app_module, 'verification_pipeline', self.pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.upload_folder = self.app_module.app.config['UPLOAD_FOLDER']
+    
+    def upload(self, *documents):
+        return self.client.post('/upload', data={
+            'documents': [(io.BytesIO(contents), name) for name, contents in documents]
+        }, content_type='multipart/form-data')
+    
+    def run_jobs(self):
+        while self.app_module.verification_workers.run_once():
+            pass
+    
+    def test_upload_queues_job_and_redirects_to_status(self):
+        """Test the upload -> job -> result flow, verified from the upload buffers"""
+        front, back = png_bytes(40, 30), png_bytes(30, 40)
+        response = self.upload(('front.png', front), ('back.png', back))
+        self.assertEqual(response.status_code, 302)
+        job_url = response.headers['Location']
+        job_id = job_url.rsplit('/', 1)[1]
+        self.assertEqual(job_url, f'/jobs/{job_id}')
+        
+        page = self.client.get(job_url)
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b'Verification in Progress', page.data)
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual((status['status'], status['result_url']), ('queued', None))
+        
+        self.run_jobs()
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual((status['status'], status['attempts']), ('done', 1))
+        self.assertEqual(status['result_url'], job_url)
+        self.assertIn(b'ver_route_test', self.client.get(job_url).data)
+        
+        doc1, doc2 = self.pipeline.documents[0]
+        self.assertEqual((doc1['contents'], doc2['contents']), (front, back))
+        self.assertEqual(doc1['path'], os.path.join(self.upload_folder, 'front.png'))
+        self.assertEqual(self.client.get('/api/jobs').get_json()['done'], 1)
+    
+    def test_failed_job_reports_error(self):
+        """Test that a job failing every attempt shows its error"""
+        self.pipeline.error = 'OCR unavailable'
+        response = self.upload(('a.png', png_bytes(20, 20)), ('b.png', png_bytes(20, 21)))
+        job_id = response.headers['Location'].rsplit('/', 1)[1]
+        self.run_jobs()
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual((status['status'], status['attempts']), ('failed', 3))
+        self.assertIn(b'Verification failed: OCR unavailable', self.client.get(f'/jobs/{job_id}').data)
+    
+    def test_unknown_job_is_not_found(self):
+        """Test both job status routes for an unknown id"""
+        self.assertEqual(self.client.get('/jobs/job_missing').status_code, 404)
+        self.assertEqual(self.client.get('/api/jobs/job_missing').status_code, 404)
+    
+    def test_upload_over_budget_is_rejected(self):
+        """Test that a document over the pixel budget is refused before any job is queued"""
+        queued = self.client.get('/api/jobs').get_json()['queued']
+        with mock.patch.dict(self.app_module.config.image_limits, {'max_pixels': 1000}):
+            response = self.upload(('small.png', png_bytes(20, 20)), ('large.png', png_bytes(50, 50)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'large.png: pixels: 50x50 above limit 1000', response.data)
+        self.assertEqual(self.client.get('/api/jobs').get_json()['queued'], queued)
+        # Files saved earlier in the same request are removed too
+        self.assertFalse(os.path.exists(os.path.join(self.upload_folder, 'small.png')))
+        self.assertFalse(os.path.exists(os.path.join(self.upload_folder, 'large.png')))
+    
+    def test_upload_needs_two_documents(self):
+        """Test the upload form errors"""
+        response = self.upload(('only.png', png_bytes(20, 20)))
+        self.assertIn(b'Please upload at least 2 documents', response.data)
+    
+    def test_cli_shares_result_cache_keys(self):
+        """Test that the batch CLI builds its pipeline with the app's cache fingerprint"""
+        pipeline = create_pipeline(self.app_module.config, self.app_module.db)
+        self.assertEqual(pipeline.result_cache.fingerprint, self.app_module.result_cache.fingerprint)
+        self.assertEqual(pipeline.ocr_backend.name, self.app_module.ocr_backend.name)
+    
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves method timings and the queue and cache gauges"""
+        self.client.get('/api/jobs')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        self.assertIn('# TYPE rpr_jobs gauge', text)
+        self.assertIn('rpr_jobs{status="queued"}', text)
+        self.assertIn('rpr_upload_buffers ', text)
+        self.assertIn('rpr_image_cache{stat=', text)
+        self.assertIn('rpr_method_duration_seconds_count{component="JobQueue",method="stats"}', text)
+    
+    def test_admin_profiles_require_token(self):
+        """Test that profiles are only listed and served with the admin token"""
+        self.assertEqual(self.client.get('/admin/profiles', headers={ADMIN_HEADER: 'secret'}).status_code, 404)
+        
+        profiler = RequestProfiler(ProfileStore(os.path.join('data', 'profiles')), admin_token='secret')
+        profile_id = profiler.store.save(b'request;main 1\n', 'txt', {'route': '/verify'})
+        with mock.patch.object(self.app_module, 'profiler', profiler), \
+                mock.patch.dict(self.app_module.config.profiling, {'admin_token': 'secret'}):
+            for headers in ({}, {ADMIN_HEADER: 'guess'}):
+                self.assertEqual(self.client.get('/admin/profiles', headers=headers).status_code, 404)
+                self.assertEqual(self.client.get(f'/admin/profiles/{profile_id}', headers=headers).status_code, 404)
+            
+            admin = {ADMIN_HEADER: 'secret'}
+            listed = self.client.get('/admin/profiles', headers=admin).get_json()
+            self.assertEqual([profile['id'] for profile in listed], [profile_id])
+            download = self.client.get(f'/admin/profiles/{profile_id}', headers=admin)
+            self.assertEqual(download.data, b'request;main 1\n')
+            self.assertIn(f'{profile_id}.txt', download.headers['Content-Disposition'])
+            download.close()
+            self.assertEqual(self.client.get('/admin/profiles/prof_missing', headers=admin).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
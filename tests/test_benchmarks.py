@@ -0,0 +1,40 @@
+"""
+Smoke tests for the Benchmark Suite
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from database import Database
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from bench_stages import database_stages, field_stages, image_stages, time_call
+from synthetic import document_fields, generate_corpus, render_id_document
+
+class TestBenchmarks(unittest.TestCase):
+    
+    def test_synthetic_card_is_deterministic(self):
+        """Test that one seed always renders the same card and fields"""
+        fields = document_fields(3)
+        self.assertRegex(fields['id_number'], r'^[A-Z]{2}\d{7}$')
+        image = render_id_document(fields, dpi=150, noise_sigma=8.0, seed=3)
+        self.assertEqual(image.shape, (319, 506, 3))
+        self.assertTrue((image == render_id_document(fields, dpi=150, noise_sigma=8.0, seed=3)).all())
+    
+    def test_every_stage_runs_once(self):
+        """Test one iteration of each benchmark stage on one synthetic card"""
+        case, image, _ = next(generate_corpus([150], {'degraded': {'noise_sigma': 8.0, 'skew_degrees': 2.5}}))
+        self.assertEqual(case, 'degraded@150dpi')
+        stages = {**image_stages(image), **field_stages(2)}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'bench.db'))
+            stages.update(database_stages(db, 2))
+            for stage, func in stages.items():
+                with self.subTest(stage=stage):
+                    timing = time_call(func, 1)
+                    self.assertGreaterEqual(timing['median_ms'], 0)
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
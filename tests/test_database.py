@@ -0,0 +1,79 @@
+"""
+Unit tests for Database connection handling
+"""
+
+import unittest
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from database import Database
+
+class TestDatabase(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'cis.db'))
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+    
+    def test_wal_mode_and_connection_settings(self):
+        """Test that the database runs in WAL mode with the configured pragmas"""
+        conn = self.db._connection()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+        self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone()[0], 30000)
+        
+        tuned = Database(os.path.join(self.tmp_dir.name, 'tuned.db'), {'busy_timeout_ms': 500})
+        self.assertEqual(tuned._connection().execute('PRAGMA busy_timeout').fetchone()[0], 500)
+        tuned.close()
+    
+    def test_connection_is_reused_per_thread(self):
+        """Test that calls on one thread share a connection and threads do not"""
+        self.db.get_job_counts()
+        conn = self.db._connection()
+        self.db.get_verification('missing')
+        self.assertIs(self.db._connection(), conn)
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.db._connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+        
+        self.db.close()
+        self.assertIsNot(self.db._connection(), conn)
+    
+    def test_failed_transaction_is_rolled_back(self):
+        """Test that writes joined to a failing transaction are discarded"""
+        with self.assertRaises(RuntimeError):
+            with self.db._transaction(immediate=True):
+                self.db.save_verification({'id': 'ver_1'})
+                raise RuntimeError('abort')
+        self.assertIsNone(self.db.get_verification('ver_1'))
+        self.assertFalse(self.db._connection().in_transaction)
+        
+        self.db.save_verification({'id': 'ver_2'})
+        self.assertEqual(self.db.get_verification('ver_2')['id'], 'ver_2')
+    
+    def test_concurrent_writers_and_claims(self):
+        """Test that threads write without lock errors and claim each job once"""
+        def enqueue(index):
+            self.db.enqueue_job(f'job_{index}', 'verification', '{}')
+            self.db.save_verification({'id': f'ver_{index}'})
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(enqueue, range(40)))
+            claims = list(executor.map(lambda index: self.db.claim_job(f'worker_{index}', 60),
+                                       range(50)))
+        
+        claimed = [job['id'] for job in claims if job]
+        self.assertEqual(len(claimed), 40)
+        self.assertEqual(len(set(claimed)), 40)
+        self.assertEqual(self.db.get_job_counts().get('running'), 40)
+        self.assertEqual(len(self.db.get_existing_verification_ids([f'ver_{i}' for i in range(40)])), 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Unit tests for Document Source Module
+"""
+
+import unittest
+import os
+import tempfile
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import numpy as np
+from PIL import Image
+from modules.document_source import DocumentSource, is_pdf, probe_document
+from modules.image_io import check_image_budget
+
+class TestDocumentSource(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        frames = [Image.new('RGB', (120, 80), color) for color in self.colors]
+        self.tiff_path = os.path.join(self.tmp_dir.name, 'statement.tiff')
+        frames[0].save(self.tiff_path, save_all=True, append_images=frames[1:], dpi=(300, 300))
+        self.png_path = os.path.join(self.tmp_dir.name, 'licence.png')
+        frames[0].save(self.png_path)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_probe_counts_pages(self):
+        """Test that the probe reports pages without decoding them"""
+        metadata = probe_document(self.tiff_path)
+        self.assertTrue(metadata['success'])
+        self.assertEqual(metadata['pages'], 3)
+        self.assertEqual((metadata['width'], metadata['height'], metadata['dpi']), (120, 80, 300))
+        self.assertEqual(probe_document(self.png_path)['pages'], 1)
+        self.assertEqual(check_image_budget(metadata, max_pages=2), ['pages: 3 above limit 2'])
+    
+    def test_frames_decode_lazily_as_bgr(self):
+        """Test that TIFF frames are yielded one at a time in page order"""
+        source = DocumentSource(self.tiff_path)
+        self.assertTrue(source.is_multi_page)
+        pages = source.pages()
+        index, image = next(pages)
+        self.assertEqual(index, 0)
+        self.assertEqual(image.shape, (80, 120, 3))
+        self.assertEqual(tuple(image[0, 0]), (0, 0, 255))
+        self.assertEqual([index for index, _ in pages], [1, 2])
+    
+    def test_buffer_source_matches_file(self):
+        """Test that file contents in memory give the same pages"""
+        with open(self.tiff_path, 'rb') as f:
+            contents = f.read()
+        self.assertEqual(probe_document(contents)['pages'], 3)
+        source = DocumentSource(memoryview(contents))
+        self.assertTrue(source.is_multi_page)
+        self.assertEqual([tuple(image[0, 0]) for _, image in source.pages()],
+                         [(0, 0, 255), (0, 255, 0), (255, 0, 0)])
+    
+    def test_single_image_is_one_page(self):
+        """Test that ordinary images yield one cached page"""
+        source = DocumentSource(self.png_path)
+        self.assertFalse(source.is_multi_page)
+        pages = list(source.pages())
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][1].shape, (80, 120, 3))
+    
+    def test_pdf_detected_by_signature(self):
+        """Test PDF detection and the missing-renderer error"""
+        path = os.path.join(self.tmp_dir.name, 'statement.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4\n%%EOF\n')
+        self.assertTrue(is_pdf(path))
+        self.assertFalse(is_pdf(self.tiff_path))
+        self.assertTrue(DocumentSource(path).is_multi_page)
+        metadata = probe_document(path)
+        self.assertFalse(metadata['success'])
+        if importlib.util.find_spec('pypdfium2') is None:
+            self.assertIn('pypdfium2', metadata['error'])
+            self.assertTrue(metadata['environment_error'])
+    
+    @unittest.skipIf(importlib.util.find_spec('pypdfium2') is None, 'pypdfium2 is not installed')
+    def test_pdf_pages_render_at_pdf_dpi(self):
+        """Test that PDF pages are probed and rendered at pdf_dpi as BGR"""
+        path = os.path.join(self.tmp_dir.name, 'statement.pdf')
+        frames = [Image.new('RGB', (200, 100), color) for color in self.colors[:2]]
+        frames[0].save(path, save_all=True, append_images=frames[1:], resolution=100)
+        
+        metadata = probe_document(path, pdf_dpi=200)
+        self.assertTrue(metadata['success'])
+        self.assertEqual((metadata['format'], metadata['pages']), ('PDF', 2))
+        self.assertEqual((metadata['width'], metadata['height'], metadata['dpi']), (400, 200, 200))
+        
+        with open(path, 'rb') as f:
+            source = DocumentSource(f.read(), pdf_dpi=200)
+        pages = list(source.pages())
+        self.assertEqual([index for index, _ in pages], [0, 1])
+        self.assertEqual(pages[0][1].shape, (200, 400, 3))
+        # Pillow stores the pages as JPEG, so compare the dominant channel
+        self.assertEqual(int(np.argmax(pages[0][1][100, 200])), 2)
+        self.assertEqual(int(np.argmax(pages[1][1][100, 200])), 1)
+    
+    @unittest.skipIf(importlib.util.find_spec('pypdfium2') is None, 'pypdfium2 is not installed')
+    def test_pdfs_render_one_call_at_a_time(self):
+        """Test that two threads probing and rendering PDFs never enter PDFium together"""
+        import pypdfium2
+        paths = []
+        for name, color in (('red', self.colors[0]), ('blue', self.colors[2])):
+            path = os.path.join(self.tmp_dir.name, f'{name}.pdf')
+            frames = [Image.new('RGB', (200, 100), color) for _ in range(3)]
+            frames[0].save(path, save_all=True, append_images=frames[1:], resolution=100)
+            paths.append(path)
+        
+        render = pypdfium2.PdfPage.render
+        active, overlaps = [0], []
+        counter_lock = threading.Lock()
+        
+        def tracked_render(page, *args, **kwargs):
+            with counter_lock:
+                active[0] += 1
+                overlaps.append(active[0])
+            try:
+                time.sleep(0.01)
+                return render(page, *args, **kwargs)
+            finally:
+                with counter_lock:
+                    active[0] -= 1
+        
+        def read(path):
+            pages = probe_document(path)['pages']
+            return pages, [int(np.argmax(image[50, 100])) for _, image in DocumentSource(path).pages()]
+        
+        with mock.patch.object(pypdfium2.PdfPage, 'render', tracked_render):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(read, paths * 2))
+        
+        self.assertEqual(results, [(3, [2, 2, 2]), (3, [0, 0, 0])] * 2)
+        self.assertEqual(len(overlaps), 12)
+        self.assertEqual(max(overlaps), 1)
+
+if __name__ == '__main__':
+    unittest.main()
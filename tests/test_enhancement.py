@@ -0,0 +1,119 @@
+"""
+Unit tests for Document Enhancement
+"""
+
+import unittest
+import numpy as np
+import cv2
+from config import Config
+from modules.document_processor import DENOISE_COSTS, DocumentEnhancer, DocumentQualityAssessor
+
+def text_page(height: int = 1400, width: int = 1000) -> np.ndarray:
+    """Clean black-on-white text page"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for y in range(60, height - 40, 40):
+        cv2.putText(image, 'JOHN CITIZEN 12 SAMPLE STREET', (40, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (15, 15, 15), 2)
+    return image
+
+class TestDocumentEnhancer(unittest.TestCase):
+    
+    def setUp(self):
+        config = Config()
+        self.enhancer = DocumentEnhancer(config.quality_thresholds, config.enhancement)
+        self.assessor = DocumentQualityAssessor()
+        self.page = text_page()
+    
+    def enhance(self, image: np.ndarray):
+        metrics = self.assessor.assess_image_quality(image)['metrics']
+        return self.enhancer.enhance_adaptive(image, metrics)
+    
+    def test_clean_scan_skips_stages(self):
+        """Test that a clean page passes through unchanged"""
+        enhanced, original, report = self.enhance(self.page)
+        self.assertEqual(report['stages'], [])
+        self.assertEqual(len(report['skipped_stages']), 5)
+        self.assertTrue(np.array_equal(enhanced, original))
+        self.assertIsNot(enhanced, original)
+    
+    def test_rotation_reuses_measured_angle(self):
+        """Test that deskewing uses the signed angle from assessment"""
+        h, w = self.page.shape[:2]
+        M = cv2.getRotationMatrix2D((w / 2, h / 2), 3, 1.0)
+        skewed = cv2.warpAffine(self.page, M, (w, h), borderValue=(235, 235, 235))
+        enhanced, _, report = self.enhance(skewed)
+        self.assertIn('rotation', report['stages'])
+        self.assertIn('rotation', report['timings_ms'])
+        self.assertLess(self.assessor.assess_rotation(enhanced)['rotation'], 1.0)
+    
+    def test_faded_page_gets_contrast(self):
+        """Test that CLAHE runs on a faded page only"""
+        faded = (self.page * 0.4 + 130).astype(np.uint8)
+        _, _, report = self.enhance(faded)
+        self.assertIn('contrast', report['stages'])
+        self.assertNotIn('denoise', report['stages'])
+    
+    def test_noisy_page_gets_denoised(self):
+        """Test that denoising follows the estimated noise level"""
+        rng = np.random.default_rng(0)
+        noise = rng.normal(0, 10, self.page.shape[:2])[:, :, None]
+        noisy = np.clip(self.page + noise, 0, 255).astype(np.uint8)
+        self.assertAlmostEqual(self.enhancer.estimate_noise(noisy), 10, delta=1.5)
+        self.assertLess(self.enhancer.estimate_noise(self.page), 1)
+        _, _, report = self.enhance(noisy)
+        self.assertIn('denoise', report['stages'])
+    
+    def test_find_document_outline(self):
+        """Test that only a distorted document outline is reported"""
+        h, w = self.page.shape[:2]
+        frame = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+        corners = np.float32([[120, 80], [900, 140], [940, 1320], [60, 1280]])
+        photo = cv2.warpPerspective(self.page, cv2.getPerspectiveTransform(frame, corners), (w, h),
+                                    borderValue=(40, 40, 40))
+        outline = self.enhancer.find_document_outline(photo)
+        self.assertIsNotNone(outline)
+        self.assertLess(np.abs(outline - corners).max(), 15)
+        self.assertIsNone(self.enhancer.find_document_outline(self.page))
+    
+    def test_grayscale_ocr_path(self):
+        """Test that the OCR path runs every stage on one channel"""
+        faded = (self.page * 0.4 + 130).astype(np.uint8)
+        metrics = self.assessor.assess_image_quality(faded)['metrics']
+        enhanced, original, report = self.enhancer.enhance_adaptive(faded, metrics, grayscale=True)
+        self.assertEqual(enhanced.ndim, 2)
+        self.assertEqual(original.ndim, 3)
+        self.assertIn('contrast', report['stages'])
+        self.assertIs(self.enhancer.clahe, self.enhancer.clahe)
+    
+    def test_denoise_backends(self):
+        """Test that every backend preserves shape and type"""
+        gray = cv2.cvtColor(self.page, cv2.COLOR_BGR2GRAY)
+        for backend in DENOISE_COSTS:
+            for image in (self.page, gray):
+                denoised = self.enhancer.remove_noise(image, backend, sigma=10)
+                self.assertEqual(denoised.shape, image.shape)
+                self.assertEqual(denoised.dtype, np.uint8)
+    
+    def test_auto_denoise_fits_budget(self):
+        """Test that auto selection respects the latency budget"""
+        enhancer = DocumentEnhancer(policy={'denoise_backend': 'auto', 'denoise_budget_ms': 100})
+        small = np.zeros((1000, 1000), dtype=np.uint8)
+        large = np.zeros((4000, 3000, 3), dtype=np.uint8)
+        self.assertEqual(enhancer.select_denoise_backend(small, 10), 'bilateral')
+        self.assertEqual(enhancer.select_denoise_backend(large, 10), 'median')
+        self.assertIsNone(enhancer.select_denoise_backend(large, 5))
+    
+    def test_unknown_denoise_backend(self):
+        """Test that an unknown backend is rejected"""
+        with self.assertRaises(ValueError):
+            DocumentEnhancer(policy={'denoise_backend': 'wavelet'})
+    
+    def test_missing_image(self):
+        """Test that an unreadable path returns no images"""
+        enhanced, original, report = self.enhancer.enhance_adaptive('missing.png', {})
+        self.assertIsNone(enhanced)
+        self.assertIsNone(original)
+        self.assertEqual(report['stages'], [])
+
+if __name__ == '__main__':
+    unittest.main()
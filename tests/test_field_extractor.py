@@ -0,0 +1,101 @@
+"""
+Unit tests for Field Extraction Module
+"""
+
+import unittest
+from modules.field_extractor import FieldExtractor, normalize_date, valid_abn, valid_acn
+
+def ocr_words(lines: list, confidence: int = 90) -> dict:
+    """extract_text_with_confidence-style result with one box per word"""
+    extractions = []
+    for row, line in enumerate(lines):
+        x = 10
+        for text in line.split():
+            extractions.append({
+                'text': text,
+                'confidence': confidence - row,
+                'box': {'x': x, 'y': 100 * row, 'w': 20 * len(text), 'h': 30}
+            })
+            x += 20 * len(text) + 10
+    return {'success': True, 'extractions': extractions}
+
+class TestFieldExtractor(unittest.TestCase):
+    
+    def setUp(self):
+        self.extractor = FieldExtractor()
+    
+    def test_checksums(self):
+        """Test ABN and ACN checksum validation"""
+        self.assertTrue(valid_abn('51824753556'))
+        self.assertFalse(valid_abn('51824753557'))
+        self.assertTrue(valid_acn('004085616'))
+        self.assertFalse(valid_acn('123456789'))
+    
+    def test_normalize_date(self):
+        """Test date normalisation and rejection of impossible dates"""
+        self.assertEqual(normalize_date(1, 2, 1980), '1980-02-01')
+        self.assertEqual(normalize_date(31, 12, 85), '1985-12-31')
+        self.assertIsNone(normalize_date(31, 2, 1980))
+    
+    def test_licence_layout(self):
+        """Test all fields from an unlabelled driver licence layout"""
+        result = self.extractor.extract(ocr_words([
+            'DRIVER LICENCE VICTORIA',
+            'JOHN CITIZEN',
+            '12 SAMPLE STREET',
+            'MELBOURNE VIC 3000',
+            'DOB 01/02/1980',
+            'Expiry 05 Mar 2027',
+            'ABN 51 824 753 556 ACN 004 085 616'
+        ]))
+        fields = result['fields']
+        self.assertEqual(fields['name'], 'JOHN CITIZEN')
+        self.assertEqual(fields['date_of_birth'], '1980-02-01')
+        self.assertEqual(fields['address'], '12 SAMPLE STREET, MELBOURNE VIC 3000')
+        self.assertEqual(fields['postcode'], '3000')
+        self.assertEqual(fields['abn'], '51824753556')
+        self.assertEqual(fields['acn'], '004085616')
+        self.assertEqual(result['confidence']['name'], 89)
+        self.assertEqual(result['boxes']['address']['y'], 200)
+        self.assertEqual(result['boxes']['address']['h'], 130)
+    
+    def test_labelled_layout(self):
+        """Test labels on the same and on the previous line"""
+        fields = self.extractor.extract(ocr_words([
+            'Name:',
+            'Jane Mary Doe',
+            'Address: 4/20 Ocean Rd',
+            'Bondi NSW 2026',
+            'Issued 02-03-2020',
+            'Date of Birth',
+            '1985-12-31'
+        ]))['fields']
+        self.assertEqual(fields['name'], 'Jane Mary Doe')
+        self.assertEqual(fields['address'], '4/20 Ocean Rd, Bondi NSW 2026')
+        self.assertEqual(fields['postcode'], '2026')
+        self.assertEqual(fields['date_of_birth'], '1985-12-31')
+    
+    def test_invalid_numbers_kept_as_other(self):
+        """Test that numbers failing their checksum are not reported as ABN/ACN"""
+        fields = self.extractor.extract(ocr_words(['Ref 123456789 12345678901']))['fields']
+        self.assertIsNone(fields['acn'])
+        self.assertIsNone(fields['abn'])
+        self.assertEqual(fields['other'], ['123456789', '12345678901'])
+    
+    def test_low_confidence_words_ignored(self):
+        """Test the minimum word confidence"""
+        extractor = FieldExtractor(min_confidence=95)
+        result = extractor.extract(ocr_words(['JOHN CITIZEN'], confidence=60))
+        self.assertIsNone(result['fields']['name'])
+        self.assertEqual(result['raw_text'], '')
+    
+    def test_extract_bulk(self):
+        """Test streaming extraction over many OCR results"""
+        results = list(self.extractor.extract_bulk(
+            ocr_words([f'Postcode {3000 + i}']) for i in range(5)
+        ))
+        self.assertEqual([r['fields']['postcode'] for r in results],
+                         ['3000', '3001', '3002', '3003', '3004'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Unit tests for Image I/O Module
+"""
+
+import unittest
+import io
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+from modules.image_io import (DecodedImageCache, check_image_budget, probe_image, read_image,
+                              save_stream)
+from modules.result_cache import buffer_digest, file_digest
+
+class TestImageProbe(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pixels = np.full((400, 300, 3), 230, dtype=np.uint8)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def save(self, name: str, **params) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        Image.fromarray(self.pixels).save(path, **params)
+        return path
+    
+    def test_probe_jpeg_density(self):
+        """Test JFIF density is reported as DPI"""
+        metadata = probe_image(self.save('scan.jpg', dpi=(300, 300)))
+        self.assertTrue(metadata['success'])
+        self.assertEqual(metadata['format'], 'JPEG')
+        self.assertEqual((metadata['width'], metadata['height']), (300, 400))
+        self.assertEqual(metadata['dpi'], 300)
+    
+    def test_probe_png_phys(self):
+        """Test PNG pHYs resolution is reported as DPI"""
+        metadata = probe_image(self.save('scan.png', dpi=(600, 600)))
+        self.assertEqual(metadata['dpi'], 600)
+    
+    def test_probe_tiff_resolution(self):
+        """Test TIFF XResolution is reported as DPI"""
+        metadata = probe_image(self.save('scan.tif', dpi=(200, 200)))
+        self.assertEqual(metadata['format'], 'TIFF')
+        self.assertEqual(metadata['dpi'], 200)
+    
+    def test_probe_ignores_placeholder_dpi(self):
+        """Test that software-default resolutions are not trusted"""
+        metadata = probe_image(self.save('screenshot.png', dpi=(72, 72)))
+        self.assertEqual(metadata['declared_dpi'], (72, 72))
+        self.assertIsNone(metadata['dpi'])
+    
+    def test_probe_missing_file(self):
+        """Test probing a file that does not exist"""
+        metadata = probe_image('nonexistent.jpg')
+        self.assertFalse(metadata['success'])
+        self.assertIn('error', metadata)
+    
+    def test_check_image_budget(self):
+        """Test size and pixel budget checks"""
+        metadata = probe_image(self.save('scan.png'))
+        self.assertEqual(check_image_budget(metadata, max_file_bytes=10 ** 6, max_pixels=10 ** 6), [])
+        self.assertEqual(len(check_image_budget(metadata, max_file_bytes=10, max_pixels=1000)), 2)
+        self.assertEqual(len(check_image_budget({'success': False, 'error': 'bad'})), 1)
+
+    def test_probe_buffer(self):
+        """Test that in-memory file contents probe like the file"""
+        path = self.save('scan.png', dpi=(300, 300))
+        with open(path, 'rb') as f:
+            contents = f.read()
+        metadata = probe_image(memoryview(contents))
+        self.assertEqual(metadata, probe_image(path))
+
+class TestDecodedImageCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pixels = np.random.default_rng(0).integers(0, 255, (200, 150, 3), dtype=np.uint8)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def save(self, name: str) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        Image.fromarray(self.pixels).save(path)
+        return path
+    
+    def test_identical_bytes_decoded_once(self):
+        """Test that copies of a file under different names share one decode"""
+        cache = DecodedImageCache()
+        first = cache.load(self.save('doc1.png'))
+        second = cache.load(self.save('doc2.png'))
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertFalse(first.flags.writeable)
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the byte budget evicts the oldest entry"""
+        cache = DecodedImageCache(max_bytes=self.pixels.nbytes * 2)
+        paths = []
+        for index in range(3):
+            self.pixels[0, 0, 0] = index
+            paths.append(self.save(f'doc{index}.png'))
+        for path in paths:
+            cache.load(path)
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['bytes'], cache.max_bytes)
+        cache.load(paths[0])
+        self.assertEqual(cache.stats()['misses'], 4)
+    
+    def test_unreadable_file_not_cached(self):
+        """Test that missing or undecodable files return None"""
+        cache = DecodedImageCache()
+        self.assertIsNone(cache.load(os.path.join(self.tmp_dir.name, 'missing.png')))
+        path = os.path.join(self.tmp_dir.name, 'broken.png')
+        with open(path, 'wb') as f:
+            f.write(b'not an image')
+        self.assertIsNone(cache.load(path))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_buffer_decodes_through_cache(self):
+        """Test that buffers and files with the same bytes share a decode"""
+        path = self.save('doc.png')
+        with open(path, 'rb') as f:
+            contents = f.read()
+        cache = DecodedImageCache()
+        decoded = cache.decode(memoryview(contents))
+        self.assertIs(cache.load(path), decoded)
+        np.testing.assert_array_equal(read_image(contents), self.pixels[:, :, ::-1])
+        self.assertIsNone(read_image(b'not an image'))
+
+class TestSaveStream(unittest.TestCase):
+    
+    def test_persists_hashes_and_buffers_in_one_pass(self):
+        """Test that the saved file, returned contents and digest agree"""
+        data = np.random.default_rng(1).bytes(300000)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'upload.bin')
+            contents, digest = save_stream(io.BytesIO(data), path, chunk_size=65536)
+            self.assertEqual(contents, data)
+            self.assertEqual(digest, file_digest(path))
+        self.assertEqual(digest, buffer_digest(data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Unit tests for Job Queue Module
+"""
+
+import unittest
+import os
+import tempfile
+import threading
+import time
+from database import Database
+from modules.job_queue import JobQueue, JobWorkerPool
+
+class TestJobQueue(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'jobs.db'))
+        self.queue = JobQueue(self.db, lease_seconds=60, max_attempts=2)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_claim_runs_jobs_in_order_once(self):
+        """Test that jobs are leased oldest first and completed with a result"""
+        first = self.queue.submit('verification', {'n': 1})
+        self.queue.submit('verification', {'n': 2})
+        job = self.queue.claim('w1')
+        self.assertEqual(job['id'], first)
+        self.assertEqual(job['status'], 'running')
+        self.assertEqual(job['attempts'], 1)
+        self.assertEqual(self.queue.claim('w2')['payload'], {'n': 2})
+        self.assertIsNone(self.queue.claim('w3'))
+        
+        self.assertFalse(self.queue.complete(job, 'w2', {'ok': True}))
+        self.assertTrue(self.queue.complete(job, 'w1', {'ok': True}))
+        done = self.queue.get(first)
+        self.assertEqual(done['status'], 'done')
+        self.assertEqual(done['result'], {'ok': True})
+        self.assertEqual(self.queue.stats(), {'queued': 0, 'running': 1, 'done': 1, 'failed': 0})
+    
+    def test_failures_retry_until_max_attempts(self):
+        """Test that a failing job is re-queued, then marked failed"""
+        job_id = self.queue.submit('verification', {})
+        self.queue.fail(self.queue.claim('w1'), 'w1', 'boom')
+        self.assertEqual(self.queue.get(job_id)['status'], 'queued')
+        self.queue.fail(self.queue.claim('w1'), 'w1', 'boom again')
+        failed = self.queue.get(job_id)
+        self.assertEqual(failed['status'], 'failed')
+        self.assertEqual(failed['attempts'], 2)
+        self.assertEqual(failed['error'], 'boom again')
+    
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a crashed worker's job goes to another worker"""
+        queue = JobQueue(self.db, lease_seconds=0.05, max_attempts=2)
+        job_id = queue.submit('verification', {})
+        crashed = queue.claim('crashed')
+        self.assertIsNone(queue.claim('w2'))
+        time.sleep(0.1)
+        retry = queue.claim('w2')
+        self.assertEqual(retry['id'], job_id)
+        self.assertEqual(retry['attempts'], 2)
+        self.assertFalse(queue.complete(crashed, 'crashed', {}))
+        time.sleep(0.1)
+        self.assertIsNone(queue.claim('w3'))
+        self.assertEqual(queue.get(job_id)['status'], 'failed')
+    
+    def test_concurrent_claims_are_exclusive(self):
+        """Test that parallel workers never lease the same job"""
+        for n in range(20):
+            self.queue.submit('verification', {'n': n})
+        claimed = []
+        
+        def claim_all(worker_id):
+            while True:
+                job = self.queue.claim(worker_id)
+                if job is None:
+                    return
+                claimed.append(job['payload']['n'])
+        
+        threads = [threading.Thread(target=claim_all, args=(f'w{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), list(range(20)))
+
+class TestJobWorkerPool(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(Database(os.path.join(self.tmp_dir.name, 'jobs.db')), max_attempts=2)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_workers_process_and_retry(self):
+        """Test that workers complete jobs and retry a transient failure"""
+        calls = []
+        
+        def handler(payload):
+            calls.append(payload['n'])
+            if payload['n'] == 1 and calls.count(1) == 1:
+                raise RuntimeError('transient')
+            return {'double': payload['n'] * 2}
+        
+        pool = JobWorkerPool(self.queue, 'verification', handler, workers=2, poll_interval=0.01)
+        job_ids = [self.queue.submit('verification', {'n': n}) for n in range(3)]
+        pool.start()
+        deadline = time.time() + 10
+        while self.queue.stats()['done'] < 3 and time.time() < deadline:
+            time.sleep(0.02)
+        pool.stop()
+        
+        self.assertEqual([self.queue.get(job_id)['result'] for job_id in job_ids],
+                         [{'double': 0}, {'double': 2}, {'double': 4}])
+        self.assertEqual(self.queue.get(job_ids[1])['attempts'], 2)
+        self.assertEqual(calls.count(1), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the Batch Verification CLI
+"""
+
+import unittest
+import json
+import os
+import tempfile
+from database import Database
+from main import BatchStats, pair_id, pending_pairs, percentile, read_manifest, run_batch
+
+class FakePipeline:
+    """Records what the batch runner verifies and writes"""
+    
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.recorded = []
+    
+    def verify(self, doc1, doc2, verification_id=None, record=True):
+        if verification_id in self.fail_ids:
+            raise RuntimeError('unreadable document')
+        return {
+            'verification': {'id': verification_id, 'decision': 'APPROVE'},
+            'timings_ms': {'gate': 2.0, 'extraction': 8.0}
+        }
+    
+    def record(self, contexts):
+        self.recorded.append([context['verification']['id'] for context in contexts])
+
+class TestBatchCLI(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pairs = []
+        for index in range(5):
+            paths = []
+            for side in (1, 2):
+                path = os.path.join(self.tmp_dir.name, f'doc{index}_{side}.png')
+                with open(path, 'wb') as f:
+                    f.write(f'{index}-{side}'.encode())
+                paths.append(path)
+            self.pairs.append({'id': f'ver_{index}', 'doc1': paths[0], 'doc2': paths[1]})
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_read_manifest_csv_and_ndjson(self):
+        """Test that both manifest formats give the same pairs, with stable derived ids"""
+        csv_path = os.path.join(self.tmp_dir.name, 'pairs.csv')
+        with open(csv_path, 'w') as f:
+            f.write('doc1,doc2,id\na.png,b.png,\nc.png,d.png,ver_x\n')
+        ndjson_path = os.path.join(self.tmp_dir.name, 'pairs.ndjson')
+        with open(ndjson_path, 'w') as f:
+            f.write(json.dumps({'doc1': 'a.png', 'doc2': 'b.png'}) + '\n\n')
+            f.write(json.dumps({'doc1': 'c.png', 'doc2': 'd.png', 'id': 'ver_x'}) + '\n')
+        
+        pairs = read_manifest(csv_path)
+        self.assertEqual(pairs, read_manifest(ndjson_path))
+        self.assertEqual(pairs[0]['id'], pair_id('a.png', 'b.png'))
+        self.assertEqual(pairs[1]['id'], 'ver_x')
+    
+    def test_read_manifest_rejects_incomplete_entries(self):
+        """Test that an entry without both documents is an error"""
+        path = os.path.join(self.tmp_dir.name, 'pairs.ndjson')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'doc1': 'a.png'}) + '\n')
+        with self.assertRaises(ValueError):
+            read_manifest(path)
+    
+    def test_run_batch_records_in_batches(self):
+        """Test that results are written batch_size at a time and failures are counted"""
+        pipeline = FakePipeline(fail_ids={'ver_2'})
+        stats = run_batch(pipeline, self.pairs, workers=2, batch_size=2, stats=BatchStats())
+        
+        recorded = [ver_id for batch in pipeline.recorded for ver_id in batch]
+        self.assertEqual(sorted(recorded), ['ver_0', 'ver_1', 'ver_3', 'ver_4'])
+        self.assertTrue(all(len(batch) <= 2 for batch in pipeline.recorded))
+        self.assertEqual(stats.completed, 4)
+        self.assertEqual(stats.failed, 1)
+        
+        summary = stats.summary(2.0)
+        self.assertEqual(summary['throughput_per_second'], 2.0)
+        self.assertEqual(summary['stages_ms']['extraction'], {'total': 32.0, 'mean': 8.0})
+        self.assertEqual(summary['decisions'], {'APPROVE': 4})
+    
+    def test_pending_pairs_skips_recorded_verifications(self):
+        """Test that a resumed run only verifies pairs not yet in the database"""
+        db = Database(os.path.join(self.tmp_dir.name, 'batch.db'))
+        db.save_verifications([{'id': 'ver_0'}, {'id': 'ver_3'}])
+        remaining = pending_pairs(db, self.pairs)
+        self.assertEqual([pair['id'] for pair in remaining], ['ver_1', 'ver_2', 'ver_4'])
+    
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7.0], 90), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Unit tests for Metrics Module
+"""
+
+import unittest
+import json
+import os
+import tempfile
+import time
+from modules.metrics import METHOD_DURATION, METHOD_ERRORS, MetricsRegistry, get_registry, instrumented
+
+@instrumented
+class Instrumented:
+    
+    def double(self, x):
+        return x * 2
+    
+    def fail(self):
+        raise ValueError('bad input')
+    
+    def count(self, n):
+        yield from range(n)
+    
+    def pages(self, n, delay):
+        for index in range(n):
+            time.sleep(delay)
+            received = yield index
+            if received is not None:
+                yield received
+    
+    @property
+    def name(self):
+        return 'instrumented'
+
+class TestMetrics(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        get_registry().reset()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def samples(self, text):
+        return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+    
+    def test_instrumented_methods_record_calls_and_errors(self):
+        """Test that public methods are timed, errors counted and properties left alone"""
+        obj = Instrumented()
+        self.assertEqual(obj.double(2), 4)
+        self.assertEqual(list(obj.count(3)), [0, 1, 2])
+        self.assertEqual(obj.name, 'instrumented')
+        with self.assertRaises(ValueError):
+            obj.fail()
+        
+        samples = self.samples(get_registry().render())
+        labels = 'component="Instrumented",method="{}"'
+        self.assertEqual(samples[f'{METHOD_DURATION}_count{{{labels.format("double")}}}'], '1')
+        self.assertEqual(samples[f'{METHOD_DURATION}_count{{{labels.format("count")}}}'], '1')
+        self.assertEqual(samples[f'{METHOD_ERRORS}{{{labels.format("fail")}}}'], '1')
+        self.assertNotIn(f'{METHOD_ERRORS}{{{labels.format("double")}}}', samples)
+    
+    def test_generators_are_timed_without_the_consumer(self):
+        """Test that time spent by the caller between yields is not counted"""
+        obj = Instrumented()
+        for _ in obj.pages(3, 0.02):
+            time.sleep(0.1)
+        
+        pages = obj.pages(3, 0.02)
+        self.assertEqual(next(pages), 0)
+        self.assertEqual(pages.send('echo'), 'echo')
+        time.sleep(0.1)
+        pages.close()
+        
+        samples = self.samples(get_registry().render())
+        labels = '{component="Instrumented",method="pages"}'
+        self.assertEqual(samples[f'{METHOD_DURATION}_count{labels}'], '2')
+        total = float(samples[f'{METHOD_DURATION}_sum{labels}'])
+        self.assertGreaterEqual(total, 0.08)
+        self.assertLess(total, 0.2)
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test Prometheus histogram layout with inclusive upper bounds"""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        labels = (('stage', 'ocr'),)
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            registry.observe('latency_seconds', labels, seconds)
+        
+        samples = self.samples(registry.render())
+        self.assertEqual(samples['latency_seconds_bucket{stage="ocr",le="0.1"}'], '2')
+        self.assertEqual(samples['latency_seconds_bucket{stage="ocr",le="1.0"}'], '3')
+        self.assertEqual(samples['latency_seconds_bucket{stage="ocr",le="+Inf"}'], '4')
+        self.assertEqual(samples['latency_seconds_count{stage="ocr"}'], '4')
+        self.assertAlmostEqual(float(samples['latency_seconds_sum{stage="ocr"}']), 3.65)
+    
+    def test_multiprocess_samples_are_merged(self):
+        """Test that counters and histograms from other processes' files are summed"""
+        registry = MetricsRegistry(multiprocess_dir=self.tmp_dir.name, buckets=(1.0,))
+        worker = MetricsRegistry(multiprocess_dir=self.tmp_dir.name, buckets=(1.0,))
+        for target in (registry, worker):
+            target.inc('jobs_total', (('kind', 'verification'),))
+            target.observe('latency_seconds', (), 0.5)
+            target.set_gauge('busy_workers', (), 1)
+        
+        # The worker's samples as written by another (live) process
+        snapshot = worker.snapshot()
+        snapshot['pid'] = os.getppid()
+        with open(os.path.join(self.tmp_dir.name, f'{os.getppid()}.json'), 'w') as f:
+            json.dump(snapshot, f)
+        
+        samples = self.samples(registry.render())
+        self.assertEqual(samples['jobs_total{kind="verification"}'], '2')
+        self.assertEqual(samples['latency_seconds_count'], '2')
+        self.assertEqual(samples['busy_workers'], '2')
+    
+    def test_callback_gauges_and_label_escaping(self):
+        """Test that registered gauges are read at render time"""
+        registry = MetricsRegistry()
+        queue = {'queued': 3}
+        registry.register_gauge('jobs', 'Jobs by status',
+                                lambda: [({'status': key}, value) for key, value in queue.items()])
+        registry.inc('errors_total', (('message', 'say "hi"'),))
+        queue['queued'] = 5
+        
+        text = registry.render()
+        self.assertIn('# TYPE jobs gauge', text)
+        self.assertIn('jobs{status="queued"} 5', text)
+        self.assertIn('errors_total{message="say \\"hi\\""} 1', text)
+    
+    def test_disabled_registry_records_nothing(self):
+        """Test that instrumented methods still run when metrics are disabled"""
+        registry = get_registry()
+        registry.enabled = False
+        try:
+            self.assertEqual(Instrumented().double(3), 6)
+        finally:
+            registry.enabled = True
+        self.assertNotIn('method="double"', registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,18 @@ Unit tests for OCR Extractor Module
 
 import unittest
 import numpy as np
-from modules.document_processor import OCRExtractor
+import cv2
+from modules.document_processor import OCRExtractor, TextRegionDetector
+from modules.ocr_engine import OCRWorkerPool
+from test_ocr_engine import ShapeEngine
+
+def id_card() -> np.ndarray:
+    """Sparse ID-style page: a few text lines on a large background"""
+    image = np.full((1400, 2200), 235, dtype=np.uint8)
+    for x, y, text in [(100, 150, 'DRIVER LICENCE'), (100, 400, 'JOHN CITIZEN'),
+                       (100, 500, '12 SAMPLE STREET MELBOURNE VIC 3000'), (1500, 1200, 'NO')]:
+        cv2.putText(image, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 1.4, 20, 3)
+    return image
 
 class TestOCRExtractor(unittest.TestCase):
     
@@ -45,5 +56,58 @@ class TestOCRExtractor(unittest.TestCase):
         self.assertIn('fields', result)
         self.assertIn('raw_text', result)
 
+class TestTextRegions(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = OCRWorkerPool(size=1, engine_factory=ShapeEngine)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+    
+    def test_detect_text_lines(self):
+        """Test that each text line becomes one region with a suitable PSM"""
+        regions = TextRegionDetector().detect(id_card())
+        self.assertEqual(len(regions), 4)
+        self.assertEqual([r['psm'] for r in regions], [7, 7, 7, 8])
+        self.assertTrue(regions[0]['y'] < 150 < regions[0]['y'] + regions[0]['h'])
+        self.assertLess(sum(r['w'] * r['h'] for r in regions), 0.1 * 1400 * 2200)
+    
+    def test_blank_page_has_no_regions(self):
+        """Test that background alone yields no regions"""
+        self.assertEqual(TextRegionDetector().detect(np.full((500, 800), 235, dtype=np.uint8)), [])
+    
+    def test_region_ocr_maps_boxes_to_page(self):
+        """Test that crop results are merged back in page coordinates"""
+        result = OCRExtractor(self.pool).extract_text_by_regions(id_card(), max_workers=2)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['mode'], 'regions')
+        for region, word in zip(result['regions'], result['extractions'][::2]):
+            self.assertEqual(word['text'], f"{region['w']}x{region['h']}")
+            self.assertEqual((word['box']['x'], word['box']['y']), (region['x'], region['y']))
+    
+    def test_per_process_backend_reads_whole_page(self):
+        """Test that crops are not OCR'd one tesseract process at a time"""
+        calls = []
+        
+        class ProcessBackend:
+            persistent = False
+            
+            def image_to_data(self, image, psm=None):
+                calls.append(image.shape)
+                return {'text': ['CITIZEN'], 'conf': [90.0], 'left': [0], 'top': [0],
+                        'width': [10], 'height': [10]}
+        
+        result = OCRExtractor(ProcessBackend()).extract_text_by_regions(id_card())
+        self.assertEqual(result['mode'], 'page')
+        self.assertEqual(calls, [(1400, 2200)])
+    
+    def test_dense_page_falls_back_to_full_page(self):
+        """Test that regions covering most of the page are OCR'd whole"""
+        result = OCRExtractor(self.pool).extract_text_by_regions(id_card(), max_coverage=0.01)
+        self.assertEqual(result['mode'], 'page')
+        self.assertEqual(result['extractions'][0]['text'], '2200x1400')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
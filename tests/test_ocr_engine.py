@@ -0,0 +1,138 @@
+"""
+Unit tests for OCR Engine Module
+"""
+
+import unittest
+import os
+import time
+from unittest import mock
+import numpy as np
+from modules.ocr_engine import OCRWorkerPool, PytesseractBackend, create_ocr_backend, parse_tsv
+from modules.document_processor import OCRExtractor
+
+class ShapeEngine:
+    """
+    Worker engine reporting the image it received; exits on a black image
+    and hangs on a mid-gray one
+    """
+    
+    def __init__(self, language: str):
+        self.language = language
+    
+    def image_to_data(self, image: np.ndarray, psm: int = None) -> dict:
+        if not image.any():
+            os._exit(1)
+        if (image == 128).all():
+            time.sleep(60)
+        return {
+            'text': [f'{image.shape[1]}x{image.shape[0]}', str(os.getpid())],
+            'conf': [91.0, 88.0],
+            'left': [0, 10], 'top': [0, 0], 'width': [10, 10], 'height': [10, 10]
+        }
+
+class FlakyEngine(ShapeEngine):
+    """ShapeEngine that cannot start while OCR_TEST_FAIL_START is set"""
+    
+    def __init__(self, language: str):
+        if os.environ.get('OCR_TEST_FAIL_START'):
+            raise RuntimeError('language model missing')
+        super().__init__(language)
+
+class TestOCREngine(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = OCRWorkerPool(size=1, timeout_seconds=30, engine_factory=ShapeEngine)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+    
+    def test_parse_tsv(self):
+        """Test that Tesseract TSV rows match pytesseract's dict layout"""
+        tsv = ('1\t1\t0\t0\t0\t0\t0\t0\t800\t500\t-1\t\n'
+               '5\t1\t1\t1\t1\t1\t40\t60\t120\t30\t96.5\tCITIZEN\n'
+               '5\t1\t1\t1\t1\t2\t170\t60\t60\t30\t91\t3000')
+        data = parse_tsv(tsv)
+        self.assertEqual(data['text'], ['', 'CITIZEN', '3000'])
+        self.assertEqual(data['conf'], [-1.0, 96.5, 91.0])
+        self.assertEqual(data['left'], [0, 40, 170])
+        self.assertEqual(data['height'], [500, 30, 30])
+    
+    def test_worker_persists_across_calls(self):
+        """Test that one long-lived worker serves repeated requests"""
+        image = np.full((50, 80), 255, dtype=np.uint8)
+        first = self.pool.image_to_data(image)
+        second = self.pool.image_to_data(image[:, :40])
+        self.assertEqual(first['text'][0], '80x50')
+        self.assertEqual(second['text'][0], '40x50')
+        self.assertEqual(first['text'][1], second['text'][1])
+    
+    def test_crashed_worker_is_restarted(self):
+        """Test restart-on-crash and that the pool keeps serving"""
+        restarts = self.pool.restarts
+        with self.assertRaises(RuntimeError):
+            self.pool.image_to_data(np.zeros((20, 20), dtype=np.uint8))
+        self.assertEqual(self.pool.restarts, restarts + 2)
+        result = self.pool.image_to_data(np.full((20, 30), 255, dtype=np.uint8))
+        self.assertEqual(result['text'][0], '30x20')
+        self.assertTrue(self.pool.health()['healthy'])
+    
+    def test_hung_worker_fails_after_one_timeout(self):
+        """Test that a timed-out request is not retried on a fresh worker"""
+        pool = OCRWorkerPool(size=1, timeout_seconds=1.0, engine_factory=ShapeEngine)
+        try:
+            pool.start()
+            with self.assertRaises(TimeoutError):
+                pool.image_to_data(np.full((20, 20), 128, dtype=np.uint8))
+            self.assertEqual(pool.restarts, 1)
+            result = pool.image_to_data(np.full((20, 30), 255, dtype=np.uint8))
+            self.assertEqual(result['text'][0], '30x20')
+        finally:
+            pool.close()
+    
+    def test_worker_that_fails_to_restart_is_replaced(self):
+        """Test that a dead worker is not handed out again"""
+        pool = OCRWorkerPool(size=1, timeout_seconds=5.0, engine_factory=FlakyEngine)
+        try:
+            pool.start()
+            with mock.patch.dict(os.environ, {'OCR_TEST_FAIL_START': '1'}):
+                with self.assertRaisesRegex(RuntimeError, 'OCR worker crashed'):
+                    pool.image_to_data(np.zeros((20, 20), dtype=np.uint8))
+            self.assertEqual(pool.restarts, 1)
+            self.assertEqual(pool._idle.qsize(), 0)
+            result = pool.image_to_data(np.full((20, 30), 255, dtype=np.uint8))
+            self.assertEqual(result['text'][0], '30x20')
+            self.assertEqual(pool.restarts, 1)
+        finally:
+            pool.close()
+    
+    def test_busy_pool_times_out_with_message(self):
+        """Test that waiting for a free worker fails with a clear error"""
+        pool = OCRWorkerPool(size=1, timeout_seconds=0.5, engine_factory=ShapeEngine)
+        try:
+            pool.start()
+            worker = pool._idle.get()
+            with self.assertRaisesRegex(TimeoutError, 'No OCR worker became free within 0.5s'):
+                pool.image_to_data(np.full((20, 30), 255, dtype=np.uint8))
+            pool._idle.put(worker)
+        finally:
+            pool.close()
+    
+    def test_extractor_uses_backend(self):
+        """Test that OCRExtractor reads words from the configured backend"""
+        extractor = OCRExtractor(self.pool)
+        result = extractor.extract_text_with_confidence(np.full((20, 30, 3), 255, dtype=np.uint8))
+        self.assertTrue(result['success'])
+        self.assertEqual(result['extractions'][0]['text'], '30x20')
+        self.assertEqual(result['extractions'][0]['confidence'], 91)
+    
+    def test_create_ocr_backend(self):
+        """Test backend selection and fallback"""
+        self.assertIsInstance(create_ocr_backend('pytesseract'), PytesseractBackend)
+        self.assertIn(create_ocr_backend('auto').name, ('pytesseract', 'tesserocr'))
+        with self.assertRaises(ValueError):
+            create_ocr_backend('easyocr')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit tests for OCR Results Module
+"""
+
+import unittest
+import json
+import numpy as np
+from modules.document_processor import OCRExtractor
+from modules.ocr_results import OCRWords
+
+def image_data(words):
+    """image_to_data output for (text, conf, left, top) rows"""
+    return {
+        'text': [word[0] for word in words],
+        'conf': [word[1] for word in words],
+        'left': [word[2] for word in words],
+        'top': [word[3] for word in words],
+        'width': [40] * len(words),
+        'height': [12] * len(words)
+    }
+
+class TestOCRWords(unittest.TestCase):
+    
+    def setUp(self):
+        self.words = OCRWords.from_image_data(image_data([
+            ('', -1, 0, 0),
+            ('JOHN', 91, 10, 20),
+            ('SMITH', 88.0, 60, 20),
+            (' ', 0, 0, 0),
+            ('2000', 75, 10, 40)
+        ]))
+    
+    def test_dict_view_matches_word_format(self):
+        """Test that words iterate as the original word dicts"""
+        self.assertEqual(len(self.words), 3)
+        self.assertEqual(self.words[0], {'text': 'JOHN', 'confidence': 91,
+                                         'box': {'x': 10, 'y': 20, 'w': 40, 'h': 12}})
+        self.assertEqual([word['text'] for word in self.words], ['JOHN', 'SMITH', '2000'])
+        self.assertEqual(self.words[-1]['confidence'], 75)
+        self.assertAlmostEqual(self.words.mean_confidence(), (91 + 88 + 75) / 3)
+        self.assertFalse(OCRWords())
+        self.assertEqual(OCRWords().mean_confidence(), 0)
+    
+    def test_slice_and_concatenate_keep_text_aligned(self):
+        """Test that offsets are rebuilt for subsets and joined crops"""
+        tail = self.words[1:]
+        self.assertEqual(tail.texts(), ['SMITH', '2000'])
+        shifted = OCRWords.from_image_data(image_data([('NSW', 80, 5, 5)]), 100, 200)
+        joined = OCRWords.concatenate([tail, OCRWords(), shifted])
+        self.assertEqual(joined.texts(), ['SMITH', '2000', 'NSW'])
+        self.assertEqual(joined[2]['box'], {'x': 105, 'y': 205, 'w': 40, 'h': 12})
+        self.assertEqual(OCRWords.from_dicts(joined.to_dicts()).to_dicts(), joined.to_dicts())
+    
+    def test_json_round_trip_is_compact(self):
+        """Test that serialised words round trip and beat the dict list"""
+        words = OCRWords.from_image_data(image_data(
+            [(f'WORD{i}', 50 + i % 50, i * 7, i * 3) for i in range(500)]))
+        payload = json.loads(json.dumps(words.to_json()))
+        self.assertTrue(OCRWords.is_serialized(payload))
+        restored = OCRWords.from_json(payload)
+        self.assertEqual(restored.to_dicts(), words.to_dicts())
+        self.assertLess(len(json.dumps(payload)), len(json.dumps(words.to_dicts())) / 2)
+    
+    def test_calibration_adds_columns(self):
+        """Test that calibration works on columns and shows in dict views"""
+        calibrated = OCRExtractor().calibrate_confidence_scores(self.words, 85.5)
+        self.assertEqual(calibrated[0]['confidence_original'], 91)
+        self.assertEqual(calibrated[0]['confidence_calibrated'], 81)
+        restored = OCRWords.from_json(json.loads(json.dumps(calibrated.to_json())))
+        self.assertEqual(restored.to_dicts(), calibrated.to_dicts())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit tests for Pipeline Module
+"""
+
+import unittest
+import threading
+import time
+from modules.pipeline import configure_executor, run_bounded, run_concurrently
+
+class TestPipeline(unittest.TestCase):
+    
+    def setUp(self):
+        configure_executor(2)
+    
+    def test_results_in_call_order(self):
+        """Test that results follow the order of the calls"""
+        results = run_concurrently([
+            lambda: time.sleep(0.05) or 'slow',
+            lambda: 'fast'
+        ])
+        self.assertEqual(results, ['slow', 'fast'])
+    
+    def test_calls_overlap(self):
+        """Test that independent calls run at the same time"""
+        barrier = threading.Barrier(2, timeout=5)
+        results = run_concurrently([barrier.wait, barrier.wait])
+        self.assertEqual(sorted(results), [0, 1])
+    
+    def test_nested_calls_run_inline(self):
+        """Test that nesting inside a saturated pool does not deadlock"""
+        def inner():
+            return run_concurrently([lambda: 1, lambda: 2])
+        self.assertEqual(run_concurrently([inner, inner]), [[1, 2], [1, 2]])
+    
+    def test_inline_first_runs_on_caller(self):
+        """Test that the first call runs on the calling thread and can fan out itself"""
+        def name():
+            return threading.current_thread().name
+        
+        def first():
+            # Not a pipeline thread, so this nested call uses the executor
+            return name(), run_concurrently([name, name])
+        
+        (caller, nested), pool = run_concurrently([first, name], inline_first=True)
+        self.assertEqual(caller, threading.current_thread().name)
+        self.assertTrue(pool.startswith('pipeline'))
+        self.assertTrue(all(thread.startswith('pipeline') for thread in nested))
+    
+    def test_exceptions_propagate(self):
+        """Test that a failing call raises in the caller"""
+        with self.assertRaises(ZeroDivisionError):
+            run_concurrently([lambda: 1, lambda: 1 / 0])
+    
+    def test_bounded_map_limits_items_in_flight(self):
+        """Test that items are drawn lazily and results keep input order"""
+        lock = threading.Lock()
+        state = {'drawn': 0, 'done': 0, 'max_outstanding': 0}
+        
+        def items():
+            for index in range(8):
+                with lock:
+                    state['drawn'] += 1
+                    state['max_outstanding'] = max(state['max_outstanding'],
+                                                   state['drawn'] - state['done'])
+                yield index
+        
+        def work(index):
+            time.sleep(0.01 * (index % 3))
+            with lock:
+                state['done'] += 1
+            return index * 10
+        
+        results = list(run_bounded(work, items(), 2))
+        self.assertEqual(results, [index * 10 for index in range(8)])
+        self.assertLessEqual(state['max_outstanding'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for Profiling Module
+"""
+
+import unittest
+import marshal
+import os
+import tempfile
+import threading
+import time
+from modules.pipeline import configure_executor, get_executor, run_concurrently
+from modules.profiling import ProfileCapture, ProfileStore, RequestProfiler, check_token
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class TestProfiling(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ProfileStore(os.path.join(self.tmp_dir.name, 'profiles'), max_profiles=3)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_select_by_admin_header_or_sampling(self):
+        """Test that only the admin token or the sample rate selects a request"""
+        profiler = RequestProfiler(self.store, admin_token='secret')
+        self.assertEqual(profiler.select('secret'), 'header')
+        self.assertIsNone(profiler.select('guess'))
+        self.assertIsNone(profiler.select(None))
+        self.assertIsNone(profiler.begin(None))
+        
+        sampled = RequestProfiler(self.store, sample_rate=1.0)
+        self.assertEqual(sampled.select(None), 'sampled')
+        self.assertFalse(check_token(None, None))
+    
+    def test_cprofile_capture_is_stored_with_metadata(self):
+        """Test that a selected request is stored as loadable pstats data"""
+        profiler = RequestProfiler(self.store, admin_token='secret')
+        capture = profiler.begin(profiler.select('secret'))
+        busy_wait(0.01)
+        profile_id = profiler.finish(capture, lambda: {'route': '/verify', 'timings_ms': {'gate': 1.0}})
+        
+        profile = self.store.get(profile_id)
+        self.assertEqual(profile['reason'], 'header')
+        self.assertEqual(profile['mode'], 'cprofile')
+        self.assertEqual(profile['route'], '/verify')
+        self.assertGreaterEqual(profile['elapsed_ms'], 10)
+        with open(profile['path'], 'rb') as f:
+            stats = marshal.load(f)
+        self.assertTrue(any(function[2] == 'busy_wait' for function in stats))
+    
+    def test_latency_watch_keeps_only_slow_requests(self):
+        """Test that stack-sampled captures are discarded under the threshold"""
+        profiler = RequestProfiler(self.store, latency_threshold_ms=30, sampling_interval_ms=1)
+        fast = profiler.begin(None)
+        self.assertIsNone(profiler.finish(fast, lambda: self.fail('metadata of a discarded capture')))
+        
+        slow = profiler.begin(None)
+        busy_wait(0.05)
+        profile_id = profiler.finish(slow, {'route': '/report/ver_1'})
+        profile = self.store.get(profile_id)
+        self.assertEqual((profile['reason'], profile['mode']), ('latency', 'sampling'))
+        with open(profile['path']) as f:
+            stacks = f.read().splitlines()
+        self.assertTrue(any('busy_wait' in stack for stack in stacks))
+        self.assertTrue(all(stack.startswith('request;') for stack in stacks), stacks)
+    
+    def test_sampling_follows_own_pipeline_tasks_only(self):
+        """Test that idle pool threads and other requests' tasks are not sampled"""
+        configure_executor(4)
+        release = threading.Event()
+        # Another request's task, busy on a pool thread for the whole capture
+        other = get_executor().submit(lambda: busy_wait(0.2) or release.wait())
+        
+        def own_task():
+            busy_wait(0.05)
+        
+        capture = ProfileCapture('sampling', 'header', sampling_interval=0.001)
+        try:
+            run_concurrently([own_task, own_task])
+        finally:
+            data, _ = capture.stop()
+            release.set()
+            other.result()
+        pool_stacks = [stack for stack in data.decode('utf-8').splitlines() if stack.startswith('pipeline;')]
+        self.assertTrue(any('own_task' in stack for stack in pool_stacks))
+        # Every sampled pool stack is inside a task submitted by the capture
+        self.assertTrue(all('(pipeline.py:' in stack for stack in pool_stacks), pool_stacks)
+        self.assertFalse(any('<lambda> (test_profiling.py' in stack for stack in pool_stacks), pool_stacks)
+    
+    def test_concurrent_cprofile_falls_back_to_sampling(self):
+        """Test that only one cProfile capture runs at a time"""
+        first = ProfileCapture('cprofile', 'header')
+        second = ProfileCapture('cprofile', 'header')
+        try:
+            self.assertEqual(first.mode, 'cprofile')
+            self.assertEqual(second.mode, 'sampling')
+        finally:
+            second.stop()
+            first.stop()
+        self.assertEqual(ProfileCapture('cprofile', 'header').stop()[1], 'prof')
+    
+    def test_store_is_a_bounded_ring_buffer(self):
+        """Test that the oldest profiles are evicted beyond max_profiles"""
+        ids = [self.store.save(b'x' * 10, 'txt', {'route': f'/r{index}'}) for index in range(5)]
+        listed = [profile['id'] for profile in self.store.list()]
+        self.assertEqual(listed, ids[:1:-1])
+        self.assertIsNone(self.store.get(ids[0]))
+        self.assertEqual(len(os.listdir(self.store.folder)), 6)
+        
+        small = ProfileStore(os.path.join(self.tmp_dir.name, 'small'), max_bytes=25)
+        for _ in range(3):
+            small.save(b'x' * 10, 'txt', {})
+        self.assertEqual(len(small.list()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
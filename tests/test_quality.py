@@ -7,7 +7,26 @@ import numpy as np
 import cv2
 import os
 import tempfile
-from modules.document_processor import DocumentQualityAssessor
+from unittest import mock
+from modules.document_processor import DocumentQualityAssessor, ImageAnalysisContext, RotationEstimator
+
+def synthetic_document(seed: int, height: int = 1600, width: int = 1200) -> np.ndarray:
+    """Render a deterministic text document with random blur, noise and exposure"""
+    rng = np.random.default_rng(seed)
+    background = int(rng.integers(120, 250))
+    ink = int(rng.integers(0, 90))
+    image = np.full((height, width, 3), background, dtype=np.uint8)
+    line_count = int(rng.integers(5, 40))
+    for i in range(line_count):
+        y = int(60 + i * (height - 120) / line_count)
+        text = ''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 '), int(rng.integers(8, 30))))
+        cv2.putText(image, text, (int(rng.integers(20, 120)), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    float(rng.uniform(0.6, 1.8)), (ink, ink, ink), int(rng.integers(1, 4)))
+    kernel = int(rng.choice([0, 0, 3, 5, 9, 15]))
+    if kernel:
+        image = cv2.GaussianBlur(image, (kernel, kernel), 0)
+    noise = rng.normal(0, float(rng.uniform(0, 12)), image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
 
 class TestDocumentQualityAssessor(unittest.TestCase):
     
@@ -36,6 +55,28 @@ class TestDocumentQualityAssessor(unittest.TestCase):
         self.assertIn('rotation', result)
         self.assertIn('severity', result)
         
+    def test_rotation_estimators_recover_skew(self):
+        """Test signed skew recovery by both rotation estimators"""
+        estimator = RotationEstimator()
+        image = cv2.cvtColor(synthetic_document(2, 1200, 900), cv2.COLOR_BGR2GRAY)
+        for angle in (-6.0, 3.0):
+            matrix = cv2.getRotationMatrix2D((450, 600), angle, 1.0)
+            rotated = cv2.warpAffine(image, matrix, (900, 1200), borderValue=255)
+            projection_angle, _ = estimator.estimate_projection(rotated)
+            hough_angle, lines_used = estimator.estimate_hough(rotated)
+            self.assertAlmostEqual(projection_angle, angle, delta=0.3)
+            self.assertAlmostEqual(hough_angle, angle, delta=1.0)
+            self.assertLessEqual(lines_used, estimator.max_lines)
+        
+    def test_assess_rotation_projection_method(self):
+        """Test projection-profile rotation on a blank image"""
+        assessor = DocumentQualityAssessor(rotation_method='projection')
+        result = assessor.assess_rotation(self.test_image)
+        self.assertEqual(result['rotation'], 0)
+        self.assertEqual(result['method'], 'projection')
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(rotation_method='radon')
+        
     def test_assess_blur(self):
         """Test blur assessment"""
         result = self.assessor.assess_blur(self.test_image)
@@ -66,6 +107,135 @@ class TestDocumentQualityAssessor(unittest.TestCase):
         result = self.assessor.assess_document_quality('nonexistent.jpg')
         self.assertFalse(result['success'])
         self.assertIn('error', result)
+    
+    def test_analysis_context_memoizes_derived_images(self):
+        """Test that the analysis context computes derived images once"""
+        context = ImageAnalysisContext(self.test_image)
+        self.assertIs(context.gray, context.gray)
+        self.assertIs(context.laplacian, context.laplacian)
+        self.assertEqual(context.gray.shape, self.test_image.shape[:2])
+        self.assertEqual(context.histogram.sum(), 1000 * 1500)
+        
+    def test_metrics_accept_analysis_context(self):
+        """Test that metrics give the same result for raw images and contexts"""
+        image = np.random.default_rng(0).integers(0, 256, (200, 300, 3), dtype=np.uint8)
+        context = ImageAnalysisContext(image)
+        self.assertEqual(self.assessor.assess_contrast(image), self.assessor.assess_contrast(context))
+        self.assertEqual(self.assessor.assess_brightness(image), self.assessor.assess_brightness(context))
+        self.assertEqual(self.assessor.assess_blur(image), self.assessor.assess_blur(context))
+        self.assertEqual(self.assessor.assess_rotation(image), self.assessor.assess_rotation(context))
+        
+    def test_assess_document_quality_from_file(self):
+        """Test quality assessment on an image written to disk"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'document.png')
+            cv2.imwrite(path, self.test_image)
+            result = self.assessor.assess_document_quality(path)
+        self.assertTrue(result['success'])
+        self.assertIn('metrics', result)
+        self.assertTrue(0 <= result['score'] <= 100)
+        
+    def test_invalid_fidelity_mode(self):
+        """Test that unknown fidelity modes are rejected"""
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(fidelity='draft')
+        
+    def test_proxy_analysis_level(self):
+        """Test proxy level selection and full-resolution DPI"""
+        assessor = DocumentQualityAssessor(fidelity='proxy', proxy_max_dimension=400)
+        context = assessor.create_analysis_context(self.test_image)
+        self.assertEqual(context.level, 2)
+        self.assertEqual(context.shape[:2], (250, 375))
+        self.assertEqual(assessor.assess_dpi(context), self.assessor.assess_dpi(self.test_image))
+        
+    def test_proxy_fidelity_agrees_with_full_resolution(self):
+        """Test severity agreement of proxy and full-resolution metrics on a synthetic corpus"""
+        proxy = DocumentQualityAssessor(fidelity='proxy', proxy_max_dimension=400)
+        metric_names = ('dpi', 'contrast', 'rotation', 'blur', 'brightness')
+        agreements = {name: 0 for name in metric_names}
+        corpus_size = 16
+        
+        for seed in range(corpus_size):
+            image = synthetic_document(seed)
+            full_context = self.assessor.create_analysis_context(image)
+            proxy_context = proxy.create_analysis_context(image)
+            self.assertEqual(proxy_context.level, 2)
+            for name in metric_names:
+                full_result = getattr(self.assessor, f'assess_{name}')(full_context)
+                proxy_result = getattr(proxy, f'assess_{name}')(proxy_context)
+                agreements[name] += full_result['severity'] == proxy_result['severity']
+        
+        for name in metric_names:
+            self.assertGreaterEqual(agreements[name] / corpus_size, 0.9, name)
+        
+    def test_assess_documents_batch(self):
+        """Test batch assessment with per-item errors in both result orders"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for seed in range(3):
+                path = os.path.join(tmp_dir, f'document_{seed}.png')
+                cv2.imwrite(path, synthetic_document(seed, 400, 300))
+                paths.append(path)
+            paths.insert(1, os.path.join(tmp_dir, 'missing.png'))
+            
+            ordered = list(self.assessor.assess_documents_batch(paths, workers=2))
+            unordered = list(self.assessor.assess_documents_batch(paths, workers=2, ordered=False))
+            inline = list(self.assessor.assess_documents_batch(paths, workers=1))
+        
+        self.assertEqual([r['image_path'] for r in ordered], paths)
+        self.assertEqual([r['success'] for r in ordered], [True, False, True, True])
+        self.assertEqual(sorted(r['index'] for r in unordered), [0, 1, 2, 3])
+        self.assertEqual([r['score'] for r in inline], [r['score'] for r in ordered])
+        
+    def test_assess_quality_map_aggregates(self):
+        """Test that tiled aggregates match whole-image metrics"""
+        image = synthetic_document(1, 700, 900)
+        result = self.assessor.assess_quality_map(image, tile_size=256)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['grid'], (3, 4))
+        self.assertEqual(result['maps']['blur'].shape, (3, 4))
+        self.assertEqual(result['metrics']['contrast'], self.assessor.assess_contrast(image))
+        self.assertEqual(result['metrics']['brightness'], self.assessor.assess_brightness(image))
+        full_blur = self.assessor.assess_blur(image)
+        self.assertAlmostEqual(result['metrics']['blur']['methods']['laplacian'],
+                               full_blur['methods']['laplacian'], places=1)
+        self.assertAlmostEqual(result['metrics']['blur']['methods']['gradient'],
+                               full_blur['methods']['gradient'], places=1)
+        
+    def test_assess_quality_map_flags_local_blur(self):
+        """Test that a locally blurred region is reported"""
+        image = np.full((512, 768), 240, dtype=np.uint8)
+        for y in range(30, 512, 32):
+            cv2.putText(image, 'NAME DOB 01/02/1990 ADDRESS', (10, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        image[256:, 256:512] = cv2.GaussianBlur(image[256:, 256:512], (31, 31), 0)
+        
+        result = self.assessor.assess_quality_map(image, tile_size=256)
+        flagged = [(region['row'], region['col']) for region in result['blurred_regions']]
+        self.assertIn((1, 1), flagged)
+        self.assertNotIn((0, 0), flagged)
+        
+    def test_assess_quality_map_invalid_image(self):
+        """Test tiled assessment with invalid image"""
+        result = self.assessor.assess_quality_map('nonexistent.jpg')
+        self.assertFalse(result['success'])
+        self.assertFalse(result['over_budget'])
+        
+    def test_assess_quality_map_checks_budget_before_decoding(self):
+        """Test that encoded input over the pixel budget is refused from its header"""
+        image = synthetic_document(1, 700, 900)
+        contents = cv2.imencode('.png', image)[1].tobytes()
+        with mock.patch('modules.document_processor.cv2.imdecode') as imdecode:
+            result = self.assessor.assess_quality_map(contents, image_limits={'max_pixels': 500_000})
+        self.assertFalse(result['success'])
+        self.assertTrue(result['over_budget'])
+        self.assertEqual(result['error'], 'pixels: 900x700 above limit 500000')
+        imdecode.assert_not_called()
+        
+        result = self.assessor.assess_quality_map(contents, tile_size=256,
+                                                  image_limits={'max_pixels': 1_000_000})
+        self.assertTrue(result['success'])
+        self.assertEqual(result['grid'], (3, 4))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
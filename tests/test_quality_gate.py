@@ -0,0 +1,152 @@
+"""
+Unit tests for Quality Gating Module
+"""
+
+import unittest
+import os
+import tempfile
+import numpy as np
+import cv2
+from PIL import Image
+from config import Config
+from modules.quality_gate import QualityGate
+
+def text_document(height: int, width: int) -> np.ndarray:
+    """Sharp black-on-white text page"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for y in range(60, height - 40, 45):
+        cv2.putText(image, 'JOHN CITIZEN 12 SAMPLE STREET 3000', (40, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (15, 15, 15), 2)
+    return image
+
+class TestQualityGate(unittest.TestCase):
+    
+    def setUp(self):
+        self.config = Config()
+        self.gate = QualityGate(self.config.quality_thresholds, self.config.quality_gate)
+        self.good_image = text_document(2200, 1700)
+    
+    def test_admission_rejects_low_dpi(self):
+        """Test that a tiny image is rejected before full assessment"""
+        result = self.gate.run_admission(text_document(300, 400))
+        self.assertEqual(result['decision'], 'REJECT')
+        self.assertEqual(result['stage'], 'admission')
+        self.assertIn('blur', result['skipped_stages'])
+        self.assertIn('ocr', result['skipped_stages'])
+        self.assertTrue(result['quality']['partial'])
+    
+    def test_admission_rejects_missing_image(self):
+        """Test that an undecodable document is rejected"""
+        result = self.gate.run_admission(None)
+        self.assertEqual(result['decision'], 'REJECT')
+        self.assertFalse(result['quality']['success'])
+    
+    def test_evaluate_passes_good_document(self):
+        """Test that a clean document passes both stages"""
+        result = self.gate.evaluate(self.good_image)
+        self.assertEqual(result['decision'], 'PASS')
+        self.assertEqual(result['stage'], 'assessment')
+        self.assertEqual(result['skipped_stages'], [])
+        self.assertIn('admission', result['timings_ms'])
+        self.assertIn('assessment', result['timings_ms'])
+        self.assertIn('rotation', result['quality']['metrics'])
+    
+    def test_evaluate_rejects_blurred_document(self):
+        """Test that a blurred document is rejected at full assessment"""
+        blurred = cv2.GaussianBlur(self.good_image, (31, 31), 0)
+        result = self.gate.evaluate(blurred)
+        self.assertEqual(result['decision'], 'REJECT')
+        self.assertEqual(result['stage'], 'assessment')
+        self.assertEqual(result['skipped_stages'], ['enhancement', 'ocr'])
+    
+    def test_evaluate_documents_stops_at_first_rejection(self):
+        """Test that one rejected document skips assessment of the others"""
+        results = self.gate.evaluate_documents([text_document(300, 400), self.good_image])
+        self.assertEqual(results[0]['decision'], 'REJECT')
+        self.assertEqual(results[1]['stage'], 'admission')
+        self.assertIn('rotation', results[1]['skipped_stages'])
+    
+    def test_probe_rejects_over_budget_before_decode(self):
+        """Test that the header probe rejects images over the pixel budget"""
+        gate = QualityGate(self.config.quality_thresholds, self.config.quality_gate,
+                           image_limits={'max_pixels': 1000000})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'large.png')
+            cv2.imwrite(path, self.good_image)
+            result = gate.evaluate(path)
+        self.assertEqual(result['decision'], 'REJECT')
+        self.assertEqual(result['stage'], 'probe')
+        self.assertIn('decode', result['skipped_stages'])
+        self.assertEqual(result['metadata']['width'], 1700)
+    
+    def test_declared_dpi_used_for_assessment(self):
+        """Test that header DPI replaces the estimate from the image width"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'scan.jpg')
+            cv2.imwrite(path, text_document(300, 400), [cv2.IMWRITE_JPEG_QUALITY, 95])
+            with Image.open(path) as img:
+                img.save(path, dpi=(300, 300))
+            result = self.gate.evaluate(path)
+        self.assertEqual(result['decision'], 'PASS')
+        self.assertEqual(result['quality']['metrics']['dpi']['dpi'], 300)
+        self.assertEqual(result['quality']['metrics']['dpi']['source'], 'metadata')
+    
+    def test_disabled_gate_never_rejects(self):
+        """Test that a disabled policy only records metrics"""
+        gate = QualityGate(self.config.quality_thresholds, {'enabled': False})
+        result = gate.evaluate(text_document(300, 400))
+        self.assertEqual(result['decision'], 'PASS')
+        self.assertEqual(result['stage'], 'assessment')
+    
+    def test_buffer_source_is_probed_and_gated(self):
+        """Test that in-memory file contents run every stage"""
+        ok, encoded = cv2.imencode('.png', self.good_image)
+        result = self.gate.evaluate(encoded.tobytes())
+        self.assertEqual(result['decision'], 'PASS')
+        self.assertEqual(result['stage'], 'assessment')
+        self.assertIn('probe', result['timings_ms'])
+        self.assertEqual(result['metadata']['width'], 1700)
+    
+    def test_multi_page_document_is_gated_per_page(self):
+        """Test that multi-page files pass the probe and aggregate page results"""
+        frames = [Image.fromarray(image) for image in (self.good_image, text_document(300, 400))]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'statement.tiff')
+            frames[0].save(path, save_all=True, append_images=frames[1:])
+            result = self.gate.evaluate(path)
+        self.assertEqual(result['decision'], 'PASS')
+        self.assertEqual(result['stage'], 'probe')
+        self.assertEqual(result['metadata']['pages'], 2)
+        
+        pages = [self.gate.evaluate(self.good_image), self.gate.evaluate(text_document(300, 400))]
+        document = self.gate.aggregate_pages(pages)
+        self.assertEqual(document['decision'], 'PASS')
+        self.assertEqual(document['rejected_pages'], [2])
+        self.assertTrue(document['page_reasons'][0].startswith('page 2: dpi'))
+        self.assertEqual(document['quality']['score'], pages[0]['quality']['score'])
+        self.assertEqual(len(document['quality']['pages']), 2)
+        self.assertEqual(self.gate.aggregate_pages(pages[1:])['decision'], 'REJECT')
+    
+    def test_white_background_scan_passes(self):
+        """Test that a clean scan on white paper is not rejected for brightness"""
+        image = np.full((3508, 2480, 3), 250, dtype=np.uint8)
+        for y in range(200, 3300, 90):
+            cv2.putText(image, 'JOHN CITIZEN 12 SAMPLE STREET 3000', (150, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.6, (20, 20, 20), 3)
+        result = self.gate.evaluate(image)
+        self.assertGreater(result['quality']['metrics']['brightness']['brightness'], 225)
+        self.assertEqual(result['decision'], 'PASS', result['reasons'])
+        
+        self.assertIsNotNone(self.gate.check_metric('brightness', {'brightness': 18.0}))
+        self.assertIsNotNone(self.gate.check_metric('brightness', {'brightness': 253.0}))
+    
+    def test_check_metric_limits(self):
+        """Test hard limits taken from quality thresholds"""
+        gate = QualityGate(self.config.quality_thresholds, {'reject_on': ['rotation', 'blur']})
+        self.assertIsNotNone(gate.check_metric('rotation', {'rotation': 7.5}))
+        self.assertIsNone(gate.check_metric('rotation', {'rotation': 2.0}))
+        self.assertIsNotNone(gate.check_metric('blur', {'blur': 35.0}))
+        self.assertIsNone(gate.check_metric('dpi', {'dpi': 50}))
+
+if __name__ == '__main__':
+    unittest.main()
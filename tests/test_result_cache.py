@@ -0,0 +1,103 @@
+"""
+Unit tests for Result Cache Module
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import numpy as np
+from database import Database
+from modules.result_cache import ResultCache, file_digest, pipeline_fingerprint
+
+class TestResultCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, 'cache.db'))
+        self.cache = ResultCache(self.db, pipeline_fingerprint({'version': 1}))
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_round_trip_counts_hits_and_misses(self):
+        """Test that a stored result is served on the next lookup"""
+        self.assertIsNone(self.cache.get('abc', 'quality'))
+        self.cache.put('abc', 'quality', {'success': True, 'score': np.int64(82),
+                                          'confidence': np.float32(0.5)})
+        result = self.cache.get('abc', 'quality')
+        self.assertEqual(result, {'success': True, 'score': 82, 'confidence': 0.5})
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['entries'], 1)
+    
+    def test_fingerprint_and_kind_isolate_entries(self):
+        """Test that another pipeline version or result kind misses"""
+        self.cache.put('abc', 'quality', {'success': True})
+        other = ResultCache(self.db, pipeline_fingerprint({'version': 2}))
+        self.assertIsNone(other.get('abc', 'quality'))
+        self.assertIsNone(self.cache.get('abc', 'ocr'))
+    
+    def test_get_or_compute_skips_failures(self):
+        """Test that failed results are recomputed rather than cached"""
+        calls = []
+        def compute():
+            calls.append(1)
+            return {'success': False, 'error': 'Failed to load image'}
+        self.cache.get_or_compute('abc', 'ocr', compute)
+        self.cache.get_or_compute('abc', 'ocr', compute)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+    
+    def test_evict_by_size_keeps_recent(self):
+        """Test that size eviction drops least recently used entries"""
+        for index in range(5):
+            self.cache.put(f'doc{index}', 'ocr', {'success': True, 'text': 'x' * 100})
+        self.cache.get('doc0', 'ocr')
+        entry_size = self.db.get_result_cache_usage()['bytes'] // 5
+        self.cache.max_bytes = entry_size * 2
+        self.cache.evict()
+        self.assertEqual(self.db.get_result_cache_usage()['entries'], 2)
+        self.assertIsNotNone(self.cache.get('doc0', 'ocr'))
+    
+    def test_evict_by_age(self):
+        """Test that entries unused past max_age_days are removed"""
+        self.cache.put('abc', 'quality', {'success': True})
+        self.assertEqual(self.db.evict_cached_results(older_than='9999-01-01'), 1)
+        self.assertIsNone(self.cache.get('abc', 'quality'))
+    
+    def test_counters_are_exact_across_threads(self):
+        """Test that concurrent lookups from the pipeline threads are all counted"""
+        db = mock.Mock()
+        db.get_cached_result.side_effect = lambda digest, fingerprint, kind: '{}' if kind == 'ocr' else None
+        db.get_result_cache_usage.return_value = {'entries': 0, 'bytes': 0}
+        cache = ResultCache(db, 'fingerprint')
+        
+        def lookups(_):
+            for _ in range(2000):
+                cache.get('abc', 'ocr')
+                cache.get('abc', 'quality')
+        
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lookups, range(8)))
+        finally:
+            sys.setswitchinterval(interval)
+        
+        self.assertEqual(cache.stats(), {'hits': 16000, 'misses': 16000, 'hit_rate': 0.5,
+                                         'entries': 0, 'bytes': 0})
+    
+    def test_file_digest_is_content_addressed(self):
+        """Test that identical bytes under different names share a digest"""
+        paths = [os.path.join(self.tmp_dir.name, name) for name in ('a.jpg', 'b.jpg')]
+        for path in paths:
+            with open(path, 'wb') as f:
+                f.write(b'same bytes')
+        self.assertEqual(file_digest(paths[0]), file_digest(paths[1]))
+
+if __name__ == '__main__':
+    unittest.main()
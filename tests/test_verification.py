@@ -0,0 +1,126 @@
+"""
+Unit tests for Verification Module
+"""
+
+import unittest
+import importlib.util
+import io
+import os
+import tempfile
+import threading
+from datetime import datetime
+from unittest import mock
+import cv2
+import numpy as np
+from PIL import Image
+from config import Config
+from database import Database
+from modules.quality_gate import QualityGate
+from modules.verification import VerificationPipeline
+
+def text_page(height: int, width: int) -> np.ndarray:
+    """Sharp black-on-white text page"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for y in range(60, height - 40, 45):
+        cv2.putText(image, 'JOHN CITIZEN 12 SAMPLE STREET 3000', (40, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (15, 15, 15), 2)
+    return image
+
+def encode(image: np.ndarray, image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, image_format, resolution=200)
+    return buffer.getvalue()
+
+class DictCache:
+    """In-memory stand-in for ResultCache"""
+    
+    def __init__(self):
+        self.entries = {}
+    
+    def get(self, digest, kind):
+        return self.entries.get((digest, kind))
+    
+    def put(self, digest, kind, result):
+        self.entries[(digest, kind)] = result
+
+class TestVerification(unittest.TestCase):
+    
+    def setUp(self):
+        self.config = Config()
+        self.gate = QualityGate(self.config.quality_thresholds, self.config.quality_gate)
+        self.cache = DictCache()
+        self.pipeline = VerificationPipeline(self.config, None, self.cache, None, None)
+        self.pdf = encode(text_page(2200, 1700), 'PDF')
+    
+    def test_missing_renderer_rejection_is_not_cached(self):
+        """Test that a PDF rejected for want of pypdfium2 is re-gated later"""
+        tiny = encode(text_page(300, 400), 'PNG')
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            results = self.pipeline.gate_documents(self.gate, [self.pdf, tiny], ['pdf', 'png'])
+        self.assertEqual(results[0]['decision'], 'REJECT')
+        self.assertTrue(results[0]['environment_error'])
+        self.assertIsNone(self.cache.get('pdf', 'quality'))
+    
+    @unittest.skipIf(importlib.util.find_spec('pypdfium2') is None, 'pypdfium2 is not installed')
+    def test_single_page_pdf_is_gated_per_page(self):
+        """Test that a one-page PDF passes the probe instead of failing to decode"""
+        png = encode(text_page(300, 400), 'PNG')
+        results = self.pipeline.gate_documents(self.gate, [self.pdf, png], ['pdf', 'png'])
+        self.assertEqual(results[0]['decision'], 'PASS')
+        self.assertEqual(results[0]['stage'], 'probe')
+        self.assertEqual(results[0]['metadata']['pages'], 1)
+        # The PNG's own low-DPI rejection is cached
+        self.assertEqual(results[1]['decision'], 'REJECT')
+        self.assertIsNotNone(self.cache.get('png', 'quality'))
+    
+    def test_multi_page_document_is_extracted_alongside_the_other(self):
+        """Test that a multi-page document does not serialise the two extractions"""
+        buffer = io.BytesIO()
+        pages = [Image.fromarray(text_page(2200, 1700)) for _ in range(2)]
+        pages[0].save(buffer, 'TIFF', save_all=True, append_images=pages[1:], compression='tiff_deflate')
+        statement = {'path': 'statement.tiff', 'contents': buffer.getvalue(), 'digest': 'tiff'}
+        licence = {'path': 'licence.png', 'contents': encode(text_page(2200, 1700), 'PNG'), 'digest': 'png'}
+        
+        # Both extractions must be running at once to pass the barrier
+        barrier = threading.Barrier(2, timeout=10)
+        threads = {}
+        
+        def extract_pages(gate, enhancer, ocr, source, digest):
+            barrier.wait()
+            threads['pages'] = threading.current_thread().name
+            page_gate = gate.evaluate(next(source.pages())[1])
+            return {'gate': page_gate, 'structured': {'fields': {}}, 'enhancement': None}
+        
+        def extract_document(enhancer, ocr, contents, digest, quality):
+            barrier.wait()
+            threads['document'] = threading.current_thread().name
+            return {'structured': {'fields': {}}, 'enhancement': None}
+        
+        with mock.patch.object(self.pipeline, 'extract_pages', extract_pages), \
+                mock.patch.object(self.pipeline, 'extract_document', extract_document):
+            context = self.pipeline.verify(licence, statement, 'ver_pages', record=False)
+        
+        self.assertEqual(context['gate'][1]['decision'], 'PASS')
+        # The multi-page document stays off the pool so its pages can fan out
+        self.assertEqual(threads['pages'], threading.current_thread().name)
+        self.assertTrue(threads['document'].startswith('pipeline'))
+    
+    def test_verifications_in_the_same_second_keep_their_own_rows(self):
+        """Test that parallel workers finishing together do not overwrite each other"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'cis.db'))
+            pipeline = VerificationPipeline(self.config, db, self.cache, None, mock.Mock())
+            contents = encode(text_page(300, 400), 'PNG')
+            document = {'path': 'licence.png', 'contents': contents, 'digest': 'png'}
+            
+            with mock.patch('modules.verification.datetime') as clock:
+                clock.now.return_value = datetime(2024, 5, 1, 9, 30, 0)
+                ids = [pipeline.verify(document, document)['verification']['id'] for _ in range(2)]
+            
+            self.assertNotEqual(ids[0], ids[1])
+            self.assertTrue(all(verification_id.startswith('ver_20240501_093000_') for verification_id in ids))
+            self.assertEqual(len(db.get_existing_verification_ids(ids)), 2)
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,15 +2,21 @@
 Flask UI Application
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, g, render_template, request, jsonify, redirect, send_file, url_for
 import os
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from collections import OrderedDict
 import logging
+import threading
 
 # Import our modules
-from modules.document_processor import DocumentQualityAssessor, DocumentEnhancer, OCRExtractor
-from modules.mismatch_detector import MismatchDetector, RiskAssessor
+from modules.document_source import probe_document
+from modules.image_io import check_image_budget, configure_image_cache, get_image_cache, save_stream
+from modules.job_queue import JobQueue, JobWorkerPool
+from modules.metrics import configure_metrics
+from modules.pipeline import configure_executor
+from modules.profiling import ADMIN_HEADER, PROFILE_HEADER, ProfileStore, RequestProfiler, check_token
+from modules.verification import create_verification_pipeline, read_document
 from modules.dispute_manager import DisputeManager
 from modules.report_generator import ReportGenerator
 from modules.audit_trail import AuditTrail
@@ -23,10 +29,31 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # Initialize components
 config = Config()
-db = Database(config.database_path)
+metrics = configure_metrics(**config.metrics)
+configure_image_cache(config.image_cache['max_bytes'])
+configure_executor(config.pipeline['workers'])
+db = Database(config.database_path, config.database)
 audit_trail = AuditTrail(config.audit_folder)
 dispute_manager = DisputeManager(db)
 report_generator = ReportGenerator(db)
+verification_pipeline = create_verification_pipeline(config, db, audit_trail)
+ocr_backend = verification_pipeline.ocr_backend
+result_cache = verification_pipeline.result_cache
+
+job_queue = JobQueue(db, config.jobs['lease_seconds'], config.jobs['max_attempts'])
+upload_buffers = OrderedDict()  # digest -> contents of recent uploads awaiting a worker
+upload_buffers_lock = threading.Lock()
+
+# Per-request profiling; None when disabled, so requests pay nothing
+PROFILED_ENDPOINTS = {'upload', 'verify', 'report'}
+profiler = None
+if config.profiling['enabled']:
+    profiling = config.profiling
+    profiler = RequestProfiler(
+        ProfileStore(profiling['folder'], profiling['max_profiles'], profiling['max_bytes']),
+        profiling['admin_token'], profiling['mode'], profiling['sample_rate'],
+        profiling['latency_threshold_ms'], profiling['sampling_interval_ms']
+    )
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -44,18 +71,31 @@ def upload():
         if not files or files[0].filename == '':
             return render_template('upload.html', error='No files selected')
         
-        # Save uploaded files
-        saved_paths = []
+        # Save uploaded files, hashing and buffering each in the same pass
+        documents = []
         for file in files:
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                saved_paths.append(filepath)
+                contents, digest = save_stream(file.stream, filepath)
+                
+                # Reject oversized images from their headers, before decoding;
+                # unreadable headers are left to the verification pipeline
+                metadata = probe_document(contents, config.documents['pdf_dpi'])
+                budget_errors = []
+                if metadata['success'] or metadata.get('over_budget'):
+                    budget_errors = check_image_budget(metadata, **config.image_limits)
+                if budget_errors:
+                    # Nothing from a rejected upload is kept (a repeated
+                    # filename was saved to the same path)
+                    for path in {document['path'] for document in documents} | {filepath}:
+                        os.remove(path)
+                    return render_template('upload.html', error=f'{filename}: {budget_errors[0]}')
+                documents.append({'path': filepath, 'contents': contents, 'digest': digest})
         
-        if len(saved_paths) >= 2:
-            # Redirect to verification
-            return redirect(url_for('verify', doc1=saved_paths[0], doc2=saved_paths[1]))
+        if len(documents) >= 2:
+            # Verify straight from the upload buffers
+            return submit_verification(documents[0], documents[1])
         else:
             return render_template('upload.html', error='Please upload at least 2 documents')
     
@@ -63,7 +103,7 @@ def upload():
 
 @app.route('/verify')
 def verify():
-    """Perform verification"""
+    """Perform verification of previously uploaded documents"""
     doc1_path = request.args.get('doc1')
     doc2_path = request.args.get('doc2')
     
@@ -71,72 +111,100 @@ def verify():
         return render_template('error.html', message='Missing document paths')
     
     try:
-        # Quality assessment
-        assessor = DocumentQualityAssessor()
-        quality1 = assessor.assess_document_quality(doc1_path)
-        quality2 = assessor.assess_document_quality(doc2_path)
-        
-        # OCR extraction
-        enhancer = DocumentEnhancer()
-        ocr = OCRExtractor()
-        
-        enhanced1, _ = enhancer.enhance_document(doc1_path)
-        enhanced2, _ = enhancer.enhance_document(doc2_path)
-        
-        extracted1 = ocr.extract_text_with_confidence(enhanced1)
-        extracted2 = ocr.extract_text_with_confidence(enhanced2)
-        
-        structured1 = ocr.extract_structured_data(enhanced1, extracted1)
-        structured2 = ocr.extract_structured_data(enhanced2, extracted2)
-        
-        # Mismatch detection
-        detector = MismatchDetector()
-        mismatches = detector.detect_mismatches(
-            structured1.get('fields', {}), 
-            structured2.get('fields', {})
-        )
-        
-        # Risk assessment
-        risk_assessor = RiskAssessor()
-        risk_result = risk_assessor.assess_risk_tier(
-            mismatches, 
-            min(quality1.get('score', 0), quality2.get('score', 0))
-        )
-        
-        # Save verification
-        verification_id = f"ver_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        verification = {
-            'id': verification_id,
-            'customer_id': 'customer_123',  # Would come from session/user
-            'document_paths': [doc1_path, doc2_path],
-            'extracted_data': {
-                'doc1': structured1,
-                'doc2': structured2
-            },
-            'quality_score': min(quality1.get('score', 0), quality2.get('score', 0)),
-            'risk_tier': risk_result['tier'],
-            'decision': risk_result['decision'],
-            'created_at': datetime.now().isoformat()
-        }
-        
-        db.save_verification(verification)
-        
-        # Log to audit trail
-        audit_trail.log_event(
-            'verification', verification_id, 'CREATED',
-            {'decision': risk_result['decision'], 'risk_tier': risk_result['tier']}
-        )
-        
-        return render_template('result.html', 
-                             verification=verification,
-                             quality1=quality1,
-                             quality2=quality2,
-                             mismatches=mismatches,
-                             risk=risk_result)
-    
-    except Exception as e:
+        documents = [read_document(doc1_path), read_document(doc2_path)]
+    except OSError as e:
         app.logger.error(f"Verification failed: {str(e)}")
         return render_template('error.html', message=f'Verification failed: {str(e)}')
+    return submit_verification(*documents)
+
+def submit_verification(doc1, doc2):
+    """
+    Queue the verification and redirect to its status page, or verify in
+    the request when background jobs are disabled
+    The upload buffers are kept in memory for a worker in this process;
+    a worker elsewhere (or after a restart) reads the stored files
+    """
+    g.profile_documents = [doc1, doc2]
+    if not config.jobs['enabled']:
+        try:
+            g.profile_context = verify_documents(doc1, doc2)
+            return render_template('result.html', **g.profile_context)
+        except Exception as e:
+            app.logger.error(f"Verification failed: {str(e)}")
+            return render_template('error.html', message=f'Verification failed: {str(e)}')
+    
+    with upload_buffers_lock:
+        for document in (doc1, doc2):
+            upload_buffers[document['digest']] = document['contents']
+            upload_buffers.move_to_end(document['digest'])
+        while len(upload_buffers) > config.jobs['max_buffered_documents']:
+            upload_buffers.popitem(last=False)
+    
+    job_id = job_queue.submit('verification', {
+        'documents': [{'path': doc['path'], 'digest': doc['digest']} for doc in (doc1, doc2)],
+        'profile': g.get('profile_reason')
+    })
+    verification_workers.notify()
+    return redirect(url_for('job_status', job_id=job_id))
+
+def run_verification_job(payload):
+    """
+    Job handler: verify the queued documents, from memory when still buffered
+    A job is profiled when the request that queued it was
+    """
+    capture = profiler.begin(payload.get('profile')) if profiler is not None else None
+    documents = []
+    context = None
+    try:
+        for document in payload['documents']:
+            with upload_buffers_lock:
+                contents = upload_buffers.pop(document['digest'], None)
+            if contents is None:
+                documents.append(read_document(document['path']))
+            else:
+                documents.append({'path': document['path'], 'contents': contents,
+                                  'digest': document['digest']})
+        context = verify_documents(*documents)
+        return context
+    finally:
+        if capture is not None:
+            profiler.finish(capture, lambda: {'route': 'job:verification',
+                                              **profile_metadata(documents, context)})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Verification job page: the result once done, otherwise a polling status page"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return render_template('error.html', message='Unknown verification job'), 404
+    if job['status'] == 'done':
+        return render_template('result.html', **job['result'])
+    if job['status'] == 'failed':
+        return render_template('error.html', message=f"Verification failed: {job['error']}")
+    return render_template('job.html', job=job)
+
+@app.route('/api/jobs/<job_id>')
+def job_status_api(job_id):
+    """Verification job status for polling clients"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify({
+        'id': job['id'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'error': job['error'],
+        'result_url': url_for('job_status', job_id=job_id) if job['status'] == 'done' else None
+    })
+
+@app.route('/api/jobs')
+def job_stats():
+    """Number of verification jobs in each status"""
+    return jsonify(job_queue.stats())
+
+def verify_documents(doc1, doc2):
+    """Verify and record two documents held in memory; returns the result.html context"""
+    return verification_pipeline.verify(doc1, doc2)
 
 @app.route('/dispute', methods=['GET', 'POST'])
 def dispute():
@@ -171,6 +239,94 @@ def dispute():
     verification_id = request.args.get('verification_id')
     return render_template('dispute.html', verification_id=verification_id)
 
+@app.route('/api/ocr/health')
+def ocr_health():
+    """OCR backend health; restarts unresponsive pool workers"""
+    return jsonify(ocr_backend.health())
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Decoded image and result cache counters"""
+    return jsonify({
+        'image_cache': get_image_cache().stats(),
+        'result_cache': result_cache.stats()
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Method latency histograms, error counters and cache/queue gauges in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def numeric_stats(stats, label):
+    """Gauge samples for the numeric entries of a stats() dict"""
+    return [({label: key}, value) for key, value in stats.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+metrics.register_gauge('rpr_image_cache', 'Decoded image cache state',
+                       lambda: numeric_stats(get_image_cache().stats(), 'stat'))
+metrics.register_gauge('rpr_result_cache', 'Persistent result cache state',
+                       lambda: numeric_stats(result_cache.stats(), 'stat'))
+metrics.register_gauge('rpr_jobs', 'Verification jobs by status',
+                       lambda: numeric_stats(job_queue.stats(), 'status'))
+metrics.register_gauge('rpr_upload_buffers', 'Uploaded documents buffered for a job worker',
+                       lambda: [({}, len(upload_buffers))])
+
+def profile_metadata(documents, context=None):
+    """Document dimensions (from their headers) and stage timings stored with a profile"""
+    described = []
+    for document in documents:
+        probe = probe_document(document['contents'], config.documents['pdf_dpi'])
+        described.append({'path': document['path'],
+                          **{key: probe.get(key) for key in ('format', 'width', 'height', 'pages', 'file_size')}})
+    return {'documents': described, 'timings_ms': (context or {}).get('timings_ms', {})}
+
+def start_request_profile():
+    """Start a capture for profiled routes; registered only when profiling is enabled"""
+    if request.endpoint in PROFILED_ENDPOINTS:
+        g.profile_reason = profiler.select(request.headers.get(PROFILE_HEADER))
+        g.profile = profiler.begin(g.profile_reason)
+
+def finish_request_profile(response):
+    """Store the request's capture and return its id in the X-Profile-Id header"""
+    capture = g.pop('profile', None)
+    if capture is not None:
+        profile_id = profiler.finish(capture, lambda: {
+            'route': request.path,
+            'status': response.status_code,
+            **profile_metadata(g.get('profile_documents', []), g.get('profile_context'))
+        })
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+    return response
+
+def abandon_request_profile(error=None):
+    """Store the capture of a request that raised before a response was made"""
+    capture = g.pop('profile', None)
+    if capture is not None:
+        profiler.finish(capture, {'route': request.path, 'error': str(error)})
+
+if profiler is not None:
+    app.before_request(start_request_profile)
+    app.after_request(finish_request_profile)
+    app.teardown_request(abandon_request_profile)
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """Captured profiles, newest first (admin token required)"""
+    if profiler is None or not check_token(config.profiling['admin_token'], request.headers.get(ADMIN_HEADER)):
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(profiler.store.list())
+
+@app.route('/admin/profiles/<profile_id>')
+def download_profile(profile_id):
+    """Download a captured profile: pstats (.prof) or collapsed stacks (.txt)"""
+    if profiler is None or not check_token(config.profiling['admin_token'], request.headers.get(ADMIN_HEADER)):
+        return jsonify({'error': 'Not found'}), 404
+    profile = profiler.store.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Unknown profile'}), 404
+    return send_file(os.path.abspath(profile['path']), as_attachment=True, download_name=profile['file'])
+
 @app.route('/report/<verification_id>')
 def report(verification_id):
     """Generate report"""
@@ -179,8 +335,14 @@ def report(verification_id):
 
 def allowed_file(filename):
     """Check if file type is allowed"""
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'tif', 'tiff'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Background verification workers, started once the job handler is defined
+verification_workers = JobWorkerPool(job_queue, 'verification', run_verification_job,
+                                     config.jobs['workers'], config.jobs['poll_interval'])
+if config.jobs['enabled']:
+    verification_workers.start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
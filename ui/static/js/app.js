@@ -52,4 +52,28 @@ document.addEventListener('DOMContentLoaded', function() {
             this.style.height = this.scrollHeight + 'px';
         });
     });
+    
+    // Poll a queued verification job and show the result when it finishes
+    const jobCard = document.querySelector('[data-job-status-url]');
+    
+    if (jobCard) {
+        const statusUrl = jobCard.dataset.jobStatusUrl;
+        const statusLabel = jobCard.querySelector('.job-status');
+        
+        const poll = function() {
+            fetch(statusUrl)
+                .then(response => response.json())
+                .then(job => {
+                    statusLabel.textContent = job.status;
+                    if (job.status === 'done' || job.status === 'failed') {
+                        window.location.reload();
+                    } else {
+                        setTimeout(poll, 1000);
+                    }
+                })
+                .catch(() => setTimeout(poll, 3000));
+        };
+        
+        setTimeout(poll, 1000);
+    }
 });
\ No newline at end of file